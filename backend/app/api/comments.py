@@ -1,21 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 from starlette.background import BackgroundTasks
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.schemas.comment import Comment, CommentCreate
-from app.crud.comment import create_comment, get_comments_by_post
-from app.api.deps import get_current_user
+from app.crud.comment import (
+    create_comment_async, delete_comment, get_comment_page, get_comments_since,
+    get_comments_version, get_subtree, comments_to_dicts
+)
+from app.crud.post import comments_count_update
+from app.api.deps import get_current_user, get_current_user_optional
 from app.models.user import User
-from app.models.post import Post
 from app.models.notification import Notification
 from app.models.comment import Comment as CommentModel
 from app.core.socket_manager import manager
+from app.core.counter_updates import counter_updates
+from app.crud.notification import notification_to_dict
+from app.core.etag import make_etag, etag_matches, not_modified, set_etag
+from app.core.serialization import COMMENT_LIST, serialize_response
 
 router = APIRouter()
 
+COMMENT_SORTS = ("oldest", "newest")
+
 async def send_notification_ws(user_id: int, message: dict):
     await manager.send_personal_message(message, user_id)
 
@@ -25,57 +35,184 @@ async def create_comment_endpoint(
     comment: CommentCreate, 
     background_tasks: BackgroundTasks,
     parent_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    new_comment = create_comment(
-        db=db, 
-        comment=comment, 
-        post_id=post_id, 
-        author_id=current_user.id,
-        parent_id=parent_id
-    )
-    
-    # Increment comment count
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if post:
-        post.comments_count += 1
-        db.commit()
+    # Increment comment count (atomic, same transaction as the insert; doubles as the existence check)
+    counters = (await db.execute(comments_count_update(post_id, 1))).first()
+    if counters is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    comments_count, post_author_id = counters
+
+    try:
+        new_comment = await create_comment_async(
+            db=db, 
+            comment=comment, 
+            post_id=post_id, 
+            author_id=current_user.id,
+            parent_id=parent_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
         
-        # Notify Post Author (if not self)
-        if post.author_id != current_user.id:
-            # Create DB Notification
-            notif = Notification(
-                recipient_id=post.author_id,
-                sender_id=current_user.id,
-                type="comment",
-                title="New Comment",
-                message=f"{current_user.full_name} commented on your post",
-                reference_id=post.id,
-                reference_type="post",
-                created_at=datetime.utcnow()
-            )
-            db.add(notif)
-            db.commit()
-            
-            # Real-time Send
-            background_tasks.add_task(send_notification_ws, post.author_id, {
-                "type": "comment",
-                "title": "New Comment",
-                "message": f"{current_user.full_name} commented on your post",
-                "reference_id": post.id,
-                "sender": {
-                    "name": current_user.full_name,
-                    "profile_photo": current_user.profile_photo_url
-                },
-                "created_at": datetime.utcnow().isoformat()
-            })
+    # Notify Post Author (if not self)
+    notif = None
+    if post_author_id != current_user.id:
+        # Create DB Notification
+        notif = Notification(
+            recipient_id=post_author_id,
+            sender_id=current_user.id,
+            type="comment",
+            title="New Comment",
+            message=f"{current_user.full_name} commented on your post",
+            reference_id=post_id,
+            reference_type="post",
+            created_at=datetime.utcnow()
+        )
+        db.add(notif)
 
+    await db.commit()
+
+    # Real-time Send (after commit: the notification id is the event id)
+    if notif is not None:
+        background_tasks.add_task(send_notification_ws, post_author_id, notification_to_dict(notif, sender=current_user))
+
+    counter_updates.record(post_id, comments_count=comments_count)
     return new_comment
 
 @router.get("/", response_model=List[Comment])
-def get_comments_endpoint(post_id: int, user_id: int = None, db: Session = Depends(get_db)):
-    return get_comments_by_post(db=db, post_id=post_id, user_id=user_id)
+def get_comments_endpoint(
+    post_id: int,
+    request: Request,
+    response: Response,
+    user_id: int = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = None,
+    sort: str = "oldest",
+    replies: int = Query(3, ge=0, le=20),
+    since: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Paginated comment thread, as a flat list threaded via parent_id.
+
+    - Default: a page of `limit` top-level comments (sort=oldest|newest),
+      each followed by its first `replies` replies. Every comment carries
+      reply_count; fetch the rest with GET /{comment_id}/replies.
+    - ?since=<comment id>: only comments (any depth) newer than that id,
+      for refreshing an open thread.
+
+    A next page, when there is one, is ?cursor=<X-Next-Cursor header>.
+    """
+    if sort not in COMMENT_SORTS:
+        raise HTTPException(status_code=400, detail="Invalid sort. Use 'oldest' or 'newest'")
+
+    etag = make_etag(
+        "comments", post_id, get_comments_version(db, post_id),
+        limit, cursor, sort, replies, since,
+        user_id, current_user.id if current_user else None
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # Votes are private, so user_vote only comes from the authenticated caller
+    viewer = dict(
+        user_id=current_user.id if current_user else user_id,
+        voter_id=current_user.id if current_user else None
+    )
+    if since is not None:
+        comments, next_cursor = get_comments_since(
+            db, post_id, cursor if cursor is not None else since, limit, **viewer
+        )
+    else:
+        comments, next_cursor = get_comment_page(
+            db, post_id, None, limit, cursor, sort == "newest", replies, **viewer
+        )
+
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return serialize_response(COMMENT_LIST, comments, response)
+
+@router.get("/{comment_id}/replies", response_model=List[Comment])
+def get_replies_endpoint(
+    post_id: int,
+    comment_id: int,
+    request: Request,
+    response: Response,
+    user_id: int = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = None,
+    replies: int = Query(3, ge=0, le=20),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    "Load more replies": a page of a comment's direct replies (oldest first),
+    each followed by its first `replies` replies. Pass the id of the last
+    reply already shown as ?cursor= to skip the ones included in the thread.
+    """
+    parent = db.query(CommentModel.id)\
+        .filter(CommentModel.id == comment_id, CommentModel.post_id == post_id).first()
+    if not parent:
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    etag = make_etag(
+        "replies", post_id, comment_id, get_comments_version(db, post_id),
+        limit, cursor, replies,
+        user_id, current_user.id if current_user else None
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    comments, next_cursor = get_comment_page(
+        db, post_id, comment_id, limit, cursor, False, replies,
+        user_id=current_user.id if current_user else user_id,
+        voter_id=current_user.id if current_user else None
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return serialize_response(COMMENT_LIST, comments, response)
+
+@router.get("/{comment_id}/thread", response_model=List[Comment])
+def get_thread_endpoint(
+    post_id: int,
+    comment_id: int,
+    request: Request,
+    response: Response,
+    user_id: int = None,
+    max_depth: Optional[int] = Query(None, ge=0),
+    limit: int = Query(200, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    A comment and its whole subtree (or down to max_depth levels below it),
+    depth-first, in one range query over the materialized path. Each comment
+    carries depth and descendant_count.
+    """
+    comment = db.query(CommentModel)\
+        .filter(CommentModel.id == comment_id, CommentModel.post_id == post_id).first()
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    etag = make_etag(
+        "thread", post_id, comment_id, get_comments_version(db, post_id),
+        max_depth, limit,
+        user_id, current_user.id if current_user else None
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    comments = comments_to_dicts(
+        db, get_subtree(db, comment, max_depth, limit),
+        user_id=current_user.id if current_user else user_id,
+        voter_id=current_user.id if current_user else None
+    )
+    return serialize_response(COMMENT_LIST, comments, response)
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_comment_endpoint(
@@ -91,12 +228,13 @@ def delete_comment_endpoint(
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
         
-    db.delete(comment)
+    delete_comment(db, comment)
     
-    # Decrement comment count
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if post and post.comments_count > 0:
-        post.comments_count -= 1
+    # Decrement comment count (atomic, clamped at 0)
+    counters = db.execute(comments_count_update(post_id, -1)).first()
         
     db.commit()
+
+    if counters is not None:
+        counter_updates.record(post_id, comments_count=counters.comments_count)
     return None
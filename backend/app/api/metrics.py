@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from app.api.deps import get_current_admin
+from app.models.user import User
+from app.core.config import settings
+from app.db.pool_stats import get_pool_stats
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def db_pool_metrics(admin: User = Depends(get_current_admin)):
+    """
+    Connection pool statistics for the worker that serves this request
+    (each gunicorn worker has its own pools).
+    """
+    stats = get_pool_stats()
+    stats["config"] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    return stats
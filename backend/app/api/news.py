@@ -1,7 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from datetime import datetime
 from typing import List
 from pydantic import BaseModel
+from app.core.etag import make_etag, etag_matches, not_modified, set_etag
 
 router = APIRouter()
 
@@ -12,39 +13,47 @@ class NewsItem(BaseModel):
     type: str # Academic, Event, Notice
     color: str
 
+# In a real app, this would query a 'News' table (and the ETag would come from its max updated_at).
+NEWS_ITEMS = [
+    {
+        "id": 1,
+        "title": "Mid-Term Exam Schedule Released",
+        "date": "Oct 15",
+        "type": "Academic",
+        "color": "bg-red-100 text-red-700"
+    },
+    {
+        "id": 2,
+        "title": "Guest Lecture: AI in Healthcare",
+        "date": "Oct 18",
+        "type": "Event",
+        "color": "bg-blue-100 text-blue-700"
+    },
+    {
+        "id": 3,
+        "title": "Library Maintenance Downtime",
+        "date": "Oct 20",
+        "type": "Notice",
+        "color": "bg-yellow-100 text-yellow-700"
+    },
+    {
+        "id": 4,
+        "title": "Hackathon Registration Open",
+        "date": "Oct 22",
+        "type": "Event",
+        "color": "bg-purple-100 text-purple-700"
+    }
+]
+
+NEWS_ETAG = make_etag("news", NEWS_ITEMS)
+
 @router.get("/", response_model=List[NewsItem])
-def get_campus_news():
+def get_campus_news(request: Request, response: Response):
     """
     Fetch real-time campus news and announcements.
-    In a real app, this would query a 'News' table.
+    Supports If-None-Match → 304.
     """
-    return [
-        {
-            "id": 1,
-            "title": "Mid-Term Exam Schedule Released",
-            "date": "Oct 15",
-            "type": "Academic",
-            "color": "bg-red-100 text-red-700"
-        },
-        {
-            "id": 2,
-            "title": "Guest Lecture: AI in Healthcare",
-            "date": "Oct 18",
-            "type": "Event",
-            "color": "bg-blue-100 text-blue-700"
-        },
-        {
-            "id": 3,
-            "title": "Library Maintenance Downtime",
-            "date": "Oct 20",
-            "type": "Notice",
-            "color": "bg-yellow-100 text-yellow-700"
-        },
-        {
-            "id": 4,
-            "title": "Hackathon Registration Open",
-            "date": "Oct 22",
-            "type": "Event",
-            "color": "bg-purple-100 text-purple-700"
-        }
-    ]
+    if etag_matches(request, NEWS_ETAG):
+        return not_modified(NEWS_ETAG)
+    set_etag(response, NEWS_ETAG)
+    return NEWS_ITEMS
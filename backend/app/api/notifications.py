@@ -1,32 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.api import deps
 from app.models.notification import Notification
 from app.models.user import User
 from app.core.socket_manager import manager
+from app.core.serialization import json_response
+from app.core.config import settings
+from app.crud.notification import notification_to_dict
+from app.api.realtime import admit, retry_after_hint, HandshakeBusy, load_missed_notifications
 
 router = APIRouter()
 
-# WebSocket Endpoint
-@router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int):
-    # In a real app, validation via token is better inside `connect` or dependency
-    # For prototype, we trust the param but we could verify if user exists
-    await manager.connect(websocket, user_id)
-    try:
-        while True:
-            # Keep alive / listen for client messages (e.g. "mark_read")
-            data = await websocket.receive_text()
-            # For now we just echo or ignore. 
-            # Real implementation might handle client ack.
-            pass
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
-
 # API Endpoints
 
 @router.get("/", response_model=List[dict])
@@ -40,6 +32,7 @@ def get_notifications(
     Fetch paginated notifications for the current user.
     """
     notifications = db.query(Notification)\
+        .options(joinedload(Notification.sender))\
         .filter(Notification.recipient_id == current_user.id)\
         .order_by(Notification.created_at.desc())\
         .offset(skip)\
@@ -47,24 +40,83 @@ def get_notifications(
         .all()
     
     # Transform for frontend - Include sender info
-    result = []
-    for n in notifications:
-        result.append({
-            "id": n.id,
-            "type": n.type,
-            "title": n.title,
-            "message": n.message,
-            "reference_id": n.reference_id,
-            "reference_type": n.reference_type,
-            "is_read": n.is_read,
-            "created_at": n.created_at.isoformat(),
-            "sender": {
-                "id": n.sender.id,
-                "name": n.sender.full_name,
-                "profile_photo": n.sender.profile_photo_url
-            } if n.sender else None
-        })
-    return result
+    result = [notification_to_dict(n) for n in notifications]
+    return json_response(result)
+
+# Server-Sent Events
+SSE_RETRY_MS = 5000
+
+def _sse_frame(text: str, event_id: Optional[int] = None) -> str:
+    # Payloads are compact JSON (no raw newlines), so one data: line suffices
+    if event_id is None:
+        return f"data: {text}\n\n"
+    return f"id: {event_id}\ndata: {text}\n\n"
+
+@router.get("/stream")
+async def notification_stream(
+    request: Request,
+    topics: Optional[str] = Query(None, description="Comma-separated extra topics, e.g. department:CSE,post:12"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Receive-only alternative to the /ws socket (text/event-stream). Carries
+    the same events from the same ConnectionManager. Authenticate with
+    ?token= (EventSource can't set headers) or an Authorization header.
+    On reconnect the browser sends Last-Event-ID (or pass ?last_event_id=)
+    and missed notifications are replayed first.
+    """
+    try:
+        user_id = await admit(request)
+    except HandshakeBusy:
+        retry_after = retry_after_hint()
+        raise HTTPException(status_code=503, detail="Too many connections, retry later", headers={"Retry-After": str(int(retry_after + 0.5))})
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    topic_list = [t.strip() for t in topics.split(",") if t.strip()] if topics else []
+    last_event_id = last_event_id or request.query_params.get("last_event_id")
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    # Register before loading the replay so nothing published in between is lost;
+    # events already covered by the replay are skipped below
+    try:
+        connection = manager.connect_stream(user_id, topic_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    replay = await manager.missed_events(user_id, last_id, load_missed_notifications) if last_id is not None else []
+    replayed_through = replay[-1][0] if replay else (last_id or 0)
+
+    async def event_stream():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            for event_id, text in replay:
+                yield _sse_frame(text, event_id)
+            while not connection.closed:
+                try:
+                    item = await asyncio.wait_for(connection.queue.get(), settings.WS_HEARTBEAT_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line: keeps proxies from timing out the idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None or connection.closed:
+                    break
+                event_id, text = item
+                if event_id is not None and event_id <= replayed_through:
+                    continue
+                yield _sse_frame(text, event_id)
+        finally:
+            manager.disconnect_stream(connection)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.put("/{notification_id}/read")
 def mark_read(
@@ -96,11 +148,16 @@ def mark_all_read(
     db.commit()
     return {"status": "success"}
 
+async def send_announcement(message: dict, recipients: List[tuple]):
+    # One envelope for everyone, encoded and replay-buffered once
+    await manager.broadcast_notifications(message, dict(recipients))
+
 @router.post("/announcement")
 async def create_announcement(
     title: str,
     message: str,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
@@ -115,32 +172,37 @@ async def create_announcement(
              pass 
 
     # 1. Create notifications for ALL users (except sender)
-    # This can be heavy, for 1000s of users, use background task
-    users = db.query(User).filter(User.id != current_user.id).all()
-    
-    notifications = []
-    for user in users:
-        n = Notification(
-            recipient_id=user.id,
-            sender_id=current_user.id,
-            type="announcement",
-            title=title,
-            message=message,
-            reference_type="announcement",
-            created_at=datetime.utcnow()
-        )
-        notifications.append(n)
-    
-    db.add_all(notifications)
-    db.commit()
-    
-    # 2. Broadcast via WebSocket
-    await manager.broadcast({
+    # One INSERT ... SELECT: no user rows are loaded into Python
+    now = datetime.utcnow()
+    recipients = select(
+        User.id,
+        literal(current_user.id),
+        literal("announcement"),
+        literal(title),
+        literal(message),
+        literal("announcement"),
+        literal(False),
+        literal(now)
+    ).where(User.id != current_user.id)
+    result = await db.execute(
+        insert(Notification).from_select(
+            ["recipient_id", "sender_id", "type", "title", "message", "reference_type", "is_read", "created_at"],
+            recipients
+        ).returning(Notification.recipient_id, Notification.id)
+    )
+    inserted = result.all()
+    await db.commit()
+
+    # 2. Push via WebSocket: each recipient gets their own row id, the same
+    # id GET /notifications/ and the reconnect replay return for it, so
+    # clients deduplicating by id see the announcement once
+    event = {
         "type": "announcement",
         "title": title,
         "message": message,
         "sender_name": current_user.full_name,
-        "created_at": datetime.utcnow().isoformat()
-    })
+        "created_at": now.isoformat()
+    }
+    background_tasks.add_task(send_announcement, event, inserted)
     
-    return {"status": "sent", "count": len(users)}
+    return {"status": "sent", "count": len(inserted)}
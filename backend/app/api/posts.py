@@ -1,13 +1,19 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response, Request
 from sqlalchemy.orm import Session, joinedload
 from app.db.session import get_db
 from app.api.auth import get_current_user
 from app.models.user import User
 from app.models.post import Post as PostModel
-from app.schemas.post import Post, PostCreate
+from app.schemas.post import Post, PostCreate, PostResponse
 from app.crud import post as crud_post
+from app.crud import tag as crud_tag
+from app.crud import vote as crud_vote
 from app.core.socket_manager import manager
+from app.core.feed_cache import feed_cache
+from app.core.counter_buffer import counter_buffer
+from app.core.etag import make_etag, etag_matches, not_modified, set_etag
+from app.core.serialization import POST_LIST, FastJSONResponse, serialize_response, to_jsonable
 
 router = APIRouter()
 
@@ -17,48 +23,138 @@ from app.api.deps import get_current_user_optional, get_current_admin
 # ... imports ...
 
 from datetime import datetime, timedelta
-from sqlalchemy import or_, desc, case, func
+from sqlalchemy import desc
 import traceback
 
 # ...
 
-@router.get("/", response_model=List[Post])
+FEED_SORTS = ("new", "hot")
+FEED_WINDOWS = {
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+    "month": timedelta(days=30),
+}
+
+def _feed_page_response(payload: dict, db: Session, current_user: Optional[User], etag: Optional[str] = None) -> FastJSONResponse:
+    """
+    Render a cached (user-agnostic) feed page, attaching the caller's votes.
+    """
+    posts = payload["posts"]
+    if current_user:
+        votes = crud_vote.get_user_votes(db, current_user.id, "post", [p["id"] for p in posts])
+        if votes:
+            posts = [dict(p, user_vote=votes.get(p["id"])) for p in posts]
+    response = FastJSONResponse(content=posts)
+    if payload["next_cursor"]:
+        response.headers["X-Next-Cursor"] = payload["next_cursor"]
+    set_etag(response, etag)
+    return response
+
+@router.get("/", response_model=List[PostResponse])
 def read_posts(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     department: Optional[str] = None,
     tags: Optional[str] = None,
+    tag_match: str = "any", # any, all
+    cursor: Optional[str] = None,
+    sort: str = "new", # new, hot
+    window: Optional[str] = None, # day, week, month (created_at filter)
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
+    """
+    Feed listing. sort=new (default) puts pinned posts first, then newest;
+    sort=hot reads the top of the indexed hot_score column.
+
+    tags is a comma separated list matched exactly through the post_tags
+    index: tag_match=any (OR, default) or tag_match=all (AND).
+
+    Supports two paging modes:
+    - Offset: ?skip=&limit= (legacy)
+    - Cursor: ?cursor=&limit= where the cursor is the X-Next-Cursor header
+      of the previous page. Seeks directly instead of scanning skipped rows.
+      Only available for sort=new.
+
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+    The first page (no skip/cursor) is served from the in-process feed cache.
+    """
+    if sort not in FEED_SORTS:
+        raise HTTPException(status_code=400, detail="Invalid sort. Use 'new' or 'hot'")
+    if window is not None and window not in FEED_WINDOWS:
+        raise HTTPException(status_code=400, detail="Invalid window. Use 'day', 'week' or 'month'")
+    if tag_match not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="Invalid tag_match. Use 'any' or 'all'")
+    if cursor and sort != "new":
+        raise HTTPException(status_code=400, detail="Cursor paging is only supported for sort=new")
+
     try:
         query = db.query(PostModel)
         
         if department and department != 'ALL':
             query = query.filter(PostModel.department == department)
             
-        if tags:
-            query = query.filter(PostModel.tags.ilike(f"%{tags}%"))
+        tag_names = crud_tag.parse_tags(tags)
+        if tag_names:
+            query = crud_tag.filter_by_tags(query, tag_names, match_all=(tag_match == "all"))
+
+        if window:
+            query = query.filter(PostModel.created_at >= datetime.utcnow() - FEED_WINDOWS[window])
             
-        # Temporal Pinning Logic:
-        # A post is "effectively pinned" if is_pinned=True AND (pinned_until IS NULL OR pinned_until > now)
-        # using func.now() avoids python/db timezone mismatches
-        db_now = func.now()
-        
-        # Create a custom sort expression (1 for pinned, 0 for regular)
-        is_effectively_pinned = case(
-            (
-                (PostModel.is_pinned == True) & 
-                ((PostModel.pinned_until == None) | (PostModel.pinned_until > db_now)), 
-                1
-            ),
-            else_=0
+        # Temporal Pinning Logic (1 for pinned, 0 for regular)
+        is_effectively_pinned = crud_post.effective_pin_expr()
+
+        # Conditional GET: a few index seeks decide 304 before any rows are loaded
+        is_admin = bool(current_user and current_user.role == "admin")
+        feed_version = crud_post.get_feed_version(query, department, is_effectively_pinned)
+        etag = make_etag(
+            "posts",
+            feed_version,
+            department, tags, tag_match, sort, window, skip, limit, cursor,
+            current_user.id if current_user else None, is_admin
         )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
 
-        # Order by Effective Pin first, then Created At
-        posts = query.options(joinedload(PostModel.author))\
-            .order_by(desc(is_effectively_pinned), PostModel.created_at.desc())\
-            .offset(skip).limit(limit).all()
+        cache_key = None
+        if not skip and not cursor:
+            cache_key = feed_cache.make_key(department, f"{tag_match}:{tags}" if tags else None, is_admin, limit, sort, window)
+            cached = feed_cache.get(cache_key)
+            # A page built from an older version would pair stale data with a fresh ETag
+            if cached is not None and cached["version"] == feed_version:
+                return _feed_page_response(cached, db, current_user, etag)
+
+        query = query.options(joinedload(PostModel.author))
+        if sort == "new" and (cursor or not skip):
+            # Pinned and unpinned buckets as two index-ordered queries
+            try:
+                rows = crud_post.get_feed_page(query, limit, cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        else:
+            if sort == "hot":
+                ordering = (PostModel.hot_score.desc(), PostModel.id.desc())
+            else:
+                # Legacy offset paging: Effective Pin first, then Created At (id breaks ties)
+                ordering = (desc(is_effectively_pinned), PostModel.created_at.desc(), PostModel.id.desc())
+            rows = query.add_columns(is_effectively_pinned)\
+                .order_by(*ordering)\
+                .offset(skip)\
+                .limit(limit).all()
+        posts = [post for post, _ in rows]
+
+        # Hand out a cursor for the next page (works for offset pages too, so clients can switch)
+        next_cursor = None
+        if sort == "new" and rows and len(rows) == limit:
+            last_post, last_pinned = rows[-1]
+            if last_post.created_at:
+                next_cursor = crud_post.encode_feed_cursor(
+                    last_pinned, last_post.created_at, last_post.id
+                )
+                response.headers["X-Next-Cursor"] = next_cursor
 
         # Redaction Logic
         # For python-side comparison, we ideally need timezone aware if DB is aware.
@@ -70,9 +166,29 @@ def read_posts(
                 if not current_user or current_user.role != "admin":
                    post.author = None
                    post.author_id = None
+
+        if cache_key is not None:
+            payload = {
+                "posts": to_jsonable(POST_LIST, posts),
+                "next_cursor": next_cursor,
+                "version": feed_version,
+            }
+            pin_expiry = min(
+                (p.pinned_until for p, pinned in rows if pinned and p.pinned_until),
+                default=None
+            )
+            feed_cache.set(cache_key, payload, pin_expiry=pin_expiry)
+            return _feed_page_response(payload, db, current_user, etag)
+
+        if current_user:
+            votes = crud_vote.get_user_votes(db, current_user.id, "post", [p.id for p in posts])
+            for post in posts:
+                post.user_vote = votes.get(post.id)
         
-        return posts
+        return serialize_response(POST_LIST, posts, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR in read_posts: {e}")
         traceback.print_exc()
@@ -108,6 +224,7 @@ def unpin_post(
     
     db.commit()
     db.refresh(post)
+    feed_cache.invalidate_department(post.department)
     return post
 
 @router.post("/", response_model=Post, status_code=status.HTTP_201_CREATED)
@@ -141,6 +258,7 @@ def create_post(
         post.tags = ",".join(current_tags)
 
     new_post = crud_post.create_post(db=db, post=post, author_id=current_user.id)
+    feed_cache.invalidate_department(new_post.department)
     
     # Broadcast new post
     # Create a simple representation for broadcast
@@ -169,19 +287,32 @@ def create_post(
         "tags": new_post.tags
     }
     
-    background_tasks.add_task(manager.broadcast, {
-        "type": "new_post",
-        "data": post_data
-    })
+    # Only clients watching this department (or the combined feed) get it
+    message = {"type": "new_post", "data": post_data}
+    for department in {new_post.department, "ALL"}:
+        background_tasks.add_task(manager.publish, f"department:{department}", message)
     
     return new_post
 
 @router.get("/{post_id}", response_model=Post)
 def read_post(
     post_id: int, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
+    version = crud_post.get_post_version(db, post_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    counter_buffer.add(PostModel, post_id, "view_count")
+
+    is_admin = bool(current_user and current_user.role == "admin")
+    etag = make_etag("post", post_id, version, current_user.id if current_user else None, is_admin)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     db_post = crud_post.get_post(db, post_id=post_id)
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -190,6 +321,9 @@ def read_post(
         if not current_user or current_user.role != "admin":
             db_post.author = None
             db_post.author_id = None
+
+    if current_user:
+        db_post.user_vote = crud_vote.get_user_votes(db, current_user.id, "post", [db_post.id]).get(db_post.id)
             
     return db_post
 
@@ -222,7 +356,9 @@ def delete_post(
              )
              db.add(log)
         
+    department = post.department
     crud_post.delete_post(db=db, post_id=post_id)
+    feed_cache.invalidate_department(department)
     return None
 
 # Simple in-memory rate limiting for shares (5 per minute per user)
@@ -258,19 +394,18 @@ def increment_share_count(
         )
     
     # Find post
-    post = crud_post.get_post(db, post_id)
+    post = db.query(PostModel.id, PostModel.share_count).filter(PostModel.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Increment share count
-    post.share_count = (post.share_count or 0) + 1
-    db.commit()
-    db.refresh(post)
+    # Increment share count (written behind in a batched UPDATE, with hot_score)
+    counter_buffer.add(PostModel, post_id, "share_count")
     
     # Record this share for rate limiting
     share_rate_limits[user_key].append(current_time)
     
-    return {"share_count": post.share_count, "message": "Share counted!"}
+    share_count = (post.share_count or 0) + counter_buffer.pending(PostModel, post_id, "share_count")
+    return {"share_count": share_count, "message": "Share counted!"}
 
 @router.put("/{post_id}/pin", response_model=Post)
 def pin_post(
@@ -310,4 +445,5 @@ def pin_post(
     
     db.commit()
     db.refresh(post)
+    feed_cache.invalidate_department(post.department)
     return post
@@ -4,16 +4,29 @@ from typing import Optional
 from app.db.session import get_db
 from app.schemas.reaction import ReactionCreate, ReactionResponse
 from app.crud.reaction import toggle_reaction
+from app.models.comment import Comment
+from app.core.counter_updates import counter_updates
 
 router = APIRouter()
 
 @router.post("/", response_model=Optional[ReactionCreate]) # Returning created reaction or None if removed
 def toggle_reaction_endpoint(reaction: ReactionCreate, db: Session = Depends(get_db)):
     # For now, simplistic approach. In real app, user_id comes from auth token
-    return toggle_reaction(
+    result = toggle_reaction(
         db=db,
         user_id=reaction.user_id,
         emoji=reaction.emoji,
         target_type=reaction.target_type,
         target_id=reaction.target_id
     )
+
+    # Live reaction counts for clients watching the post
+    delta = 1 if result else -1
+    if reaction.target_type == 'post':
+        counter_updates.record_reaction(reaction.target_id, None, reaction.emoji, delta)
+    else:
+        post_id = db.query(Comment.post_id).filter(Comment.id == reaction.target_id).scalar()
+        if post_id is not None:
+            counter_updates.record_reaction(post_id, reaction.target_id, reaction.emoji, delta)
+    # The ORM row has post_id/comment_id, not target_type/target_id: echo the request
+    return reaction if result else None
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import random
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import HTTPConnection
+
+from app.api import deps
+from app.db import session as db_session
+from app.core.config import settings
+from app.core.security import verify_resume_token
+from app.core.serialization import dumps_text
+from app.core.socket_manager import manager
+from app.core.replay_buffer import Event
+from app.crud.notification import notification_to_dict, get_notifications_since
+
+router = APIRouter()
+
+# Bounds concurrent token verifications (Firebase call + DB lookup) per worker,
+# so a reconnect storm after a deploy can't starve HTTP traffic
+handshake_slots = asyncio.Semaphore(settings.WS_MAX_CONCURRENT_HANDSHAKES)
+
+# "Try Again Later"; the close reason carries {"retry_after": seconds}
+HANDSHAKE_BUSY_CLOSE_CODE = status.WS_1013_TRY_AGAIN_LATER
+
+# Most notifications replayed from the DB when the in-memory buffer can't cover a gap
+REPLAY_DB_LIMIT = 100
+
+
+class HandshakeBusy(Exception):
+    pass
+
+
+def authenticate_token(token: str) -> Optional[int]:
+    """
+    Resolve a bearer token (local JWT or Firebase ID token) to a user id,
+    using the same logic as the HTTP endpoints. Blocking: run in a threadpool.
+    """
+    db = db_session.SessionLocal()
+    try:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        return deps.get_current_user(db, credentials).id
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+
+def _load_missed_notifications(user_id: int, last_id: int) -> List[Event]:
+    db = db_session.SessionLocal()
+    try:
+        notifications = get_notifications_since(db, user_id, last_id, REPLAY_DB_LIMIT)
+        return [(n.id, dumps_text(notification_to_dict(n))) for n in notifications]
+    finally:
+        db.close()
+
+
+async def load_missed_notifications(user_id: int, last_id: int) -> List[Event]:
+    """Replay fallback for ConnectionManager: missed notifications from the DB."""
+    return await run_in_threadpool(_load_missed_notifications, user_id, last_id)
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _bearer_token(conn: HTTPConnection) -> Optional[str]:
+    # Browsers can't set headers on WebSocket / EventSource requests, so ?token= is the usual route
+    token = conn.query_params.get("token")
+    if token:
+        return token
+    authorization = conn.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return None
+
+
+def retry_after_hint() -> float:
+    # Jittered so rejected clients don't come back in lockstep
+    return round(settings.WS_RETRY_AFTER_SECONDS * random.uniform(0.5, 1.5), 1)
+
+
+async def admit(conn: HTTPConnection) -> Optional[int]:
+    """
+    Identify the user behind a WebSocket handshake or event stream request
+    (anything with query params and headers). A valid resume token is checked
+    locally and admitted immediately; otherwise the full token verification
+    runs under the handshake semaphore. Raises HandshakeBusy when no slot
+    frees up in time.
+    """
+    resume = conn.query_params.get("resume")
+    if resume:
+        user_id = verify_resume_token(resume)
+        if user_id is not None:
+            return user_id
+        # Expired or invalid: fall back to full authentication
+
+    token = _bearer_token(conn)
+    if not token:
+        return None
+
+    try:
+        await asyncio.wait_for(handshake_slots.acquire(), settings.WS_HANDSHAKE_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HandshakeBusy()
+    try:
+        return await run_in_threadpool(authenticate_token, token)
+    finally:
+        handshake_slots.release()
+
+
+@router.websocket("/ws")
+async def realtime_socket(websocket: WebSocket):
+    """
+    Single real-time endpoint: authenticates once at handshake, then carries
+    notifications, topic events and heartbeats. Clients answer {"type": "ping"}
+    with {"type": "pong"} and subscribe with
+    {"action": "subscribe", "topic": "department:CSE"}. The {"type": "resume"}
+    frame carries a token to pass back as ?resume= when reconnecting, along
+    with ?last_event_id=<highest notification id seen> to receive missed
+    notifications in a single {"type": "replay"} frame.
+    """
+    try:
+        user_id = await admit(websocket)
+    except HandshakeBusy:
+        # Accept so the close code and reason actually reach the browser
+        await websocket.accept()
+        await websocket.close(
+            code=HANDSHAKE_BUSY_CLOSE_CODE,
+            reason=json.dumps({"retry_after": retry_after_hint()})
+        )
+        return
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    last_event_id = parse_last_event_id(websocket.query_params.get("last_event_id"))
+    await manager.connect(websocket, user_id, last_event_id, load_missed_notifications)
+    try:
+        while True:
+            text = await websocket.receive_text()
+            await manager.handle_client_message(websocket, user_id, text)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: socket already closed by the manager (eviction)
+        pass
+    finally:
+        manager.disconnect(websocket, user_id)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.db.session import get_db
+from app.schemas.search import SearchResult
+from app.crud import search as crud_search
+
+router = APIRouter()
+
+@router.get("/", response_model=List[SearchResult])
+def search_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked full-text search over posts (title, content, tags) and comments.
+    Served by the GIN (PostgreSQL) / FTS5 (SQLite) index, never a LIKE scan.
+    """
+    try:
+        return crud_search.search(db, q, skip=skip, limit=limit)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import insert, literal, select
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.models.vote import Vote, VoteType
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db, get_async_db
 from app.models.user import User
-from app.models.post import Post
-from app.models.comment import Comment
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_optional
+from app.crud.vote import apply_vote, get_vote_state, TargetNotFound
+from app.core.serialization import json_response
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 router = APIRouter()
 
+# Most posts + comments one GET /votes/state call may ask about
+VOTE_STATE_MAX_TARGETS = 300
+
 class VoteRequest(BaseModel):
     post_id: Optional[int] = None
     comment_id: Optional[int] = None
@@ -19,18 +23,63 @@ class VoteRequest(BaseModel):
 from starlette.background import BackgroundTasks
 from app.models.notification import Notification
 from app.core.socket_manager import manager
+from app.core.counter_updates import counter_updates
+from app.crud.notification import notification_to_dict
 from datetime import datetime
 
 async def send_vote_notification(user_id: int, message: dict):
     await manager.send_personal_message(message, user_id)
 
+def publish_vote_counters(target_type: str, target_id: int, result: dict):
+    # Coalesced live counters for clients watching the post (comment votes ride on the parent post)
+    if target_type == "post":
+        counter_updates.record(target_id, upvotes=result["upvotes"], downvotes=result["downvotes"])
+    else:
+        counter_updates.record(result["post_id"], target_id, upvotes=result["upvotes"], downvotes=result["downvotes"])
+
+async def create_upvote_notification(db: AsyncSession, post_id: int, author_id: int, voter: User) -> Optional[Notification]:
+    """
+    Insert the "upvoted your post" notification unless this voter already
+    triggered one for the post (no spam on re-votes): one INSERT ... SELECT
+    ... WHERE NOT EXISTS.
+    """
+    values = dict(
+        recipient_id=author_id,
+        sender_id=voter.id,
+        type="upvote",
+        title="New Upvote",
+        message=f"{voter.full_name} upvoted your post",
+        reference_id=post_id,
+        reference_type="post",
+        created_at=datetime.utcnow()
+    )
+    already_sent = select(Notification.id).where(
+        Notification.recipient_id == author_id,
+        Notification.sender_id == voter.id,
+        Notification.type == "upvote",
+        Notification.reference_id == post_id
+    ).exists()
+    stmt = insert(Notification).from_select(
+        list(values),
+        select(*[literal(v) for v in values.values()]).where(~already_sent)
+    ).returning(Notification.id)
+    notif_id = (await db.execute(stmt)).scalar()
+    if notif_id is None:
+        return None
+    return Notification(id=notif_id, is_read=False, **values)
+
 @router.post("/")
 async def cast_vote(
     vote_data: VoteRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Toggle a vote: voting the same way again removes it, the other way
+    switches it. The vote and the cached counters are each written with a
+    single statement (see crud.vote.apply_vote).
+    """
     # Validation
     if not vote_data.post_id and not vote_data.comment_id:
         raise HTTPException(status_code=400, detail="Must provide post_id or comment_id")
@@ -41,100 +90,61 @@ async def cast_vote(
     if vote_data.vote_type not in [1, -1]:
         raise HTTPException(status_code=400, detail="Invalid vote type. Use 1 for upvote, -1 for downvote")
 
-    # Check existence
-    model = Post if vote_data.post_id else Comment
+    target_type = "post" if vote_data.post_id else "comment"
     target_id = vote_data.post_id if vote_data.post_id else vote_data.comment_id
-    
-    target = db.query(model).filter(model.id == target_id).first()
-    if not target:
+
+    try:
+        result = await apply_vote(db, current_user.id, target_type, target_id, vote_data.vote_type)
+    except TargetNotFound:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Target not found")
 
-    # Check existing vote
-    existing_vote = db.query(Vote).filter(
-        Vote.user_id == current_user.id,
-        Vote.post_id == vote_data.post_id,
-        Vote.comment_id == vote_data.comment_id
-    ).first()
-
-    if existing_vote:
-        if existing_vote.vote_type == vote_data.vote_type:
-            # Remove vote (toggle off)
-            db.delete(existing_vote)
-            
-            # Update cache
-            if vote_data.vote_type == 1:
-                target.upvotes -= 1
-            else:
-                target.downvotes -= 1
-                
-            db.commit()
-            return {"status": "removed", "upvotes": target.upvotes, "downvotes": target.downvotes}
-        else:
-            # Switch vote
-            old_type = existing_vote.vote_type
-            existing_vote.vote_type = vote_data.vote_type
-            
-            # Update cache
-            if old_type == 1:
-                target.upvotes -= 1
-                target.downvotes += 1
-            else:
-                target.downvotes -= 1
-                target.upvotes += 1
-            
-            db.commit()
-            return {"status": "switched", "upvotes": target.upvotes, "downvotes": target.downvotes}
-    else:
-        # Create new vote
-        new_vote = Vote(
-            user_id=current_user.id,
-            post_id=vote_data.post_id,
-            comment_id=vote_data.comment_id,
-            vote_type=vote_data.vote_type
-        )
-        db.add(new_vote)
-        
-        # Update cache
-        if vote_data.vote_type == 1:
-            target.upvotes += 1
-            
-            # Notify Author (if Post and not self)
-            if vote_data.post_id and model == Post and target.author_id != current_user.id:
-                # Check for existing notification to prevent spam
-                existing = db.query(Notification).filter(
-                    Notification.recipient_id == target.author_id,
-                    Notification.sender_id == current_user.id,
-                    Notification.type == "upvote",
-                    Notification.reference_id == target.id
-                ).first()
-                
-                if not existing:
-                    notif = Notification(
-                        recipient_id=target.author_id,
-                        sender_id=current_user.id,
-                        type="upvote",
-                        title="New Upvote",
-                        message=f"{current_user.full_name} upvoted your post",
-                        reference_id=target.id,
-                        reference_type="post",
-                        created_at=datetime.utcnow()
-                    )
-                    db.add(notif)
-                    # We commit at end, so it's fine.
-                    
-                    background_tasks.add_task(send_vote_notification, target.author_id, {
-                        "type": "upvote",
-                        "title": "New Upvote",
-                        "message": f"{current_user.full_name} upvoted your post",
-                        "reference_id": target.id,
-                        "sender": {
-                            "name": current_user.full_name
-                        },
-                        "created_at": datetime.utcnow().isoformat()
-                    })
-
-        else:
-            target.downvotes += 1
-            
-        db.commit()
-        return {"status": "added", "upvotes": target.upvotes, "downvotes": target.downvotes}
+    # Notify the post author of a new upvote (if not self)
+    notif = None
+    if result["status"] == "added" and vote_data.vote_type == 1 and target_type == "post" \
+            and result["author_id"] is not None and result["author_id"] != current_user.id:
+        notif = await create_upvote_notification(db, target_id, result["author_id"], current_user)
+
+    await db.commit()
+    publish_vote_counters(target_type, target_id, result)
+    # Real-time Send (after commit: the notification id is the event id)
+    if notif is not None:
+        background_tasks.add_task(send_vote_notification, result["author_id"], notification_to_dict(notif, sender=current_user))
+    return {"status": result["status"], "upvotes": result["upvotes"], "downvotes": result["downvotes"]}
+
+def parse_ids(value: Optional[str], name: str) -> List[int]:
+    if not value:
+        return []
+    try:
+        return [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}. Use comma separated ids")
+
+@router.get("/state")
+def get_vote_state_endpoint(
+    response: Response,
+    post_ids: Optional[str] = None,
+    comment_ids: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Hydrate a page of cards in one request: current counters, reaction
+    tallies and the caller's vote/reactions for
+    ?post_ids=1,2,3&comment_ids=7,8 (up to VOTE_STATE_MAX_TARGETS in total).
+
+    {"posts": {"1": {"upvotes", "downvotes", "comments_count", "share_count",
+                     "user_vote", "reactions": [...]}},
+     "comments": {"7": {"upvotes", "downvotes", "user_vote", "reactions": [...]}}}
+
+    Anonymous callers get counters and tallies; user_vote is always null.
+    """
+    posts = parse_ids(post_ids, "post_ids")
+    comments = parse_ids(comment_ids, "comment_ids")
+    if len(posts) + len(comments) > VOTE_STATE_MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"At most {VOTE_STATE_MAX_TARGETS} targets per request")
+
+    state = get_vote_state(db, current_user.id if current_user else None, posts, comments)
+    # Per-user and changes with every vote
+    response.headers["Cache-Control"] = "private, no-cache"
+    return json_response(state, response)
@@ -0,0 +1,218 @@
+"""
+Pub/sub backplane for real-time events.
+
+Each worker process has its own ConnectionManager, so an event published in
+one worker must be fanned out to every worker's sockets. Publishers hand a
+JSON envelope to the backplane; every subscribed worker (including the
+publisher) receives it and delivers it to its local connections.
+
+- MemoryBackplane: in-process loopback, for single-worker runs and tests.
+- PostgresBackplane: LISTEN/NOTIFY on the application database.
+"""
+import abc
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+# Called when events may have been missed (e.g. while LISTEN was down)
+GapHandler = Callable[[], None]
+
+# NOTIFY payloads are capped at 8000 bytes by PostgreSQL
+PG_NOTIFY_MAX_BYTES = 7999
+
+# Larger envelopes are parked here and NOTIFY carries only the row id
+OUTBOX_TABLE = "realtime_outbox"
+OUTBOX_TTL_SECONDS = 60
+
+# LISTEN connection reconnect back-off
+RECONNECT_INITIAL_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 30.0
+
+
+class Backplane(abc.ABC):
+    """Interface: start() with a delivery handler, publish() envelopes, stop()."""
+
+    @abc.abstractmethod
+    async def start(self, handler: Handler, on_gap: Optional[GapHandler] = None):
+        ...
+
+    @abc.abstractmethod
+    async def publish(self, envelope: dict):
+        ...
+
+    async def stop(self):
+        pass
+
+
+class MemoryBackplane(Backplane):
+    """Loopback: delivers straight to the local handler."""
+
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler, on_gap: Optional[GapHandler] = None):
+        # Never drops events, so on_gap is never called
+        self.handler = handler
+
+    async def publish(self, envelope: dict):
+        if self.handler is not None:
+            await self.handler(envelope)
+
+
+class PostgresBackplane(Backplane):
+    """
+    LISTEN/NOTIFY fan-out. One dedicated listening connection per worker and
+    a second connection for publishing and outbox reads (asyncpg connections
+    are not safe for concurrent use).
+
+    NOTIFY payload: the envelope minus "data" as JSON, a newline, then the
+    already-encoded data text, so it isn't JSON-escaped a second time.
+    Payloads over the NOTIFY limit go through the outbox table and are sent
+    as {"ref": id}; receivers load the row.
+
+    A dropped LISTEN connection is reopened with exponential back-off.
+    Events NOTIFYed while it was down never reach this worker, so on_gap is
+    called when it drops and again once LISTEN is back; the replay buffer
+    then stops answering for anything before that, and resuming clients
+    catch up from the database instead.
+    """
+
+    def __init__(self, dsn: str, channel: str = settings.REALTIME_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self.handler: Optional[Handler] = None
+        self.on_gap: Optional[GapHandler] = None
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self, handler: Handler, on_gap: Optional[GapHandler] = None):
+        self.handler = handler
+        self.on_gap = on_gap
+        self._stopping = False
+        await self._listen()
+        async with self._publish_lock:
+            conn = await self._connection()
+            await conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {OUTBOX_TABLE} ("
+                "id BIGSERIAL PRIMARY KEY, payload TEXT NOT NULL, "
+                "created_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            )
+        logger.info(f"Realtime backplane listening on '{self.channel}'")
+
+    async def _listen(self):
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.channel, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._listen_conn = conn
+
+    def _on_terminated(self, connection):
+        if self._stopping or connection is not self._listen_conn:
+            return
+        logger.warning("Backplane LISTEN connection lost; reconnecting")
+        self._listen_conn = None
+        self._gap()
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = RECONNECT_INITIAL_SECONDS
+        while not self._stopping:
+            try:
+                await self._listen()
+                # Anything published until now went past this worker
+                self._gap()
+                logger.info(f"Realtime backplane listening on '{self.channel}' again")
+                return
+            except Exception as e:
+                logger.error(f"Backplane reconnect failed, retrying in {delay:.0f}s: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _gap(self):
+        if self.on_gap is not None:
+            self.on_gap()
+
+    async def _connection(self):
+        # Caller holds _publish_lock
+        if self._publish_conn is None or self._publish_conn.is_closed():
+            import asyncpg
+            self._publish_conn = await asyncpg.connect(self.dsn)
+        return self._publish_conn
+
+    def _on_notify(self, connection, pid, channel, payload):
+        asyncio.create_task(self._receive(payload))
+
+    async def _receive(self, payload: str):
+        try:
+            header, _, data = payload.partition("\n")
+            envelope = json.loads(header)
+            if "ref" in envelope:
+                async with self._publish_lock:
+                    conn = await self._connection()
+                    payload = await conn.fetchval(f"SELECT payload FROM {OUTBOX_TABLE} WHERE id = $1", envelope["ref"])
+                if payload is None:
+                    logger.warning(f"Backplane outbox row {envelope['ref']} is gone; dropping event")
+                    return
+                header, _, data = payload.partition("\n")
+                envelope = json.loads(header)
+        except ValueError:
+            logger.warning("Dropping malformed backplane payload")
+            return
+        envelope["data"] = data
+        await self.handler(envelope)
+
+    async def publish(self, envelope: dict):
+        header = {k: v for k, v in envelope.items() if k != "data"}
+        payload = json.dumps(header, default=str, separators=(",", ":")) + "\n" + envelope["data"]
+
+        async with self._publish_lock:
+            conn = await self._connection()
+            if len(payload.encode()) > PG_NOTIFY_MAX_BYTES:
+                async with conn.transaction():
+                    await conn.execute(
+                        f"DELETE FROM {OUTBOX_TABLE} WHERE created_at < now() - interval '{OUTBOX_TTL_SECONDS} seconds'"
+                    )
+                    ref = await conn.fetchval(f"INSERT INTO {OUTBOX_TABLE} (payload) VALUES ($1) RETURNING id", payload)
+                    # Delivered on commit, after the row is visible to receivers
+                    await conn.execute("SELECT pg_notify($1, $2)", self.channel, json.dumps({"ref": ref}))
+            else:
+                await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = self._publish_conn = None
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    # asyncpg wants plain postgresql:// (no +driver suffix)
+    scheme, rest = database_url.split("://", 1)
+    return f"postgresql://{rest}"
+
+
+def create_backplane(database_url: str = settings.DATABASE_URL) -> Backplane:
+    kind = settings.REALTIME_BACKPLANE
+    if kind == "auto":
+        kind = "postgres" if database_url.startswith("postgres") else "memory"
+
+    if kind == "postgres":
+        return PostgresBackplane(_asyncpg_dsn(database_url))
+    if kind == "memory":
+        return MemoryBackplane()
+    raise ValueError(f"Unknown REALTIME_BACKPLANE: {settings.REALTIME_BACKPLANE}")
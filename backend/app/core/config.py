@@ -19,6 +19,54 @@ class Settings(BaseSettings):
     # CORS
     BACKEND_CORS_ORIGINS: str = "*"  # Comma separated list of origins or *
 
+    # Connection pool, per engine (sync + async) and per worker process:
+    # worst case ≈ workers × 2 × (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+    # Sizing is ignored for SQLite.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True
+
+    # WebSockets: per-connection outbound queue; a client that falls this far
+    # behind (or stalls a single send this long) is disconnected
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SEND_TIMEOUT_SECONDS: float = 10
+    # Server pings every interval; sockets silent for the idle timeout are closed
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 25
+    WS_IDLE_TIMEOUT_SECONDS: float = 75
+    WS_MAX_CONNECTIONS_PER_USER: int = 5
+    # Handshake admission: at most this many token verifications at once per
+    # worker; a handshake that can't get a slot within the wait is told to
+    # retry after ~WS_RETRY_AFTER_SECONDS (jittered). Reconnects presenting a
+    # resume token (valid for the TTL) skip verification entirely.
+    WS_MAX_CONCURRENT_HANDSHAKES: int = 16
+    WS_HANDSHAKE_WAIT_SECONDS: float = 2
+    WS_RETRY_AFTER_SECONDS: float = 5
+    WS_RESUME_TOKEN_TTL_SECONDS: int = 300
+    # Live counters (votes, comments, reactions) go out at most once per
+    # interval per post, however fast they change
+    WS_COUNTER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # Missed-event replay on reconnect: last N personal events per user kept
+    # in memory (for at most this many users); older gaps come from the DB
+    WS_REPLAY_BUFFER_SIZE: int = 50
+    WS_REPLAY_MAX_USERS: int = 10000
+
+    # Cross-worker fan-out of real-time events: "auto" uses Postgres
+    # LISTEN/NOTIFY when DATABASE_URL is Postgres, else in-process "memory"
+    REALTIME_BACKPLANE: str = "auto"
+    REALTIME_CHANNEL: str = "loopin_realtime"
+
+    # Feed first-page cache (0 disables)
+    FEED_CACHE_TTL_SECONDS: float = 30
+    FEED_CACHE_MAX_ENTRIES: int = 256
+
+    # Write-behind counters (shares, views): deltas are summed in memory and
+    # written in batched UPDATEs every interval, or as soon as this many
+    # increments are pending. A hard crash loses at most that much.
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 5.0
+    COUNTER_FLUSH_MAX_PENDING: int = 1000
+
     class Config:
         case_sensitive = True
         env_file = ".env"
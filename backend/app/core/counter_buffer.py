@@ -0,0 +1,162 @@
+"""
+Write-behind buffer for hot counter columns (share and view counts).
+
+A viral post turns every share/view into a single-row UPDATE on the same
+row, and the writes contend for its lock. Instead, endpoints add deltas here
+and a background loop writes them as one UPDATE per table per batch:
+
+    UPDATE posts SET share_count = share_count + CASE id WHEN 1 THEN 40 WHEN 7 THEN 3 ELSE 0 END
+    WHERE id IN (1, 7)
+
+Flushes run every COUNTER_FLUSH_INTERVAL_SECONDS, as soon as
+COUNTER_FLUSH_MAX_PENDING increments are pending, and on shutdown. On a hard
+crash at most that many increments (or one interval's worth) are lost; a
+failed flush puts its deltas back for the next attempt.
+"""
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, update
+
+from app.core.config import settings
+from app.db import session as db_session
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement
+FLUSH_BATCH_SIZE = 500
+
+# model -> {column: per-row delta expression} -> extra SET values
+ExtraValues = Callable[[Dict[str, object]], dict]
+
+
+class CounterBuffer:
+    def __init__(
+        self,
+        interval: float = settings.COUNTER_FLUSH_INTERVAL_SECONDS,
+        max_pending: int = settings.COUNTER_FLUSH_MAX_PENDING
+    ):
+        self.interval = interval
+        self.max_pending = max_pending
+        # (model, row id) -> {column: delta}
+        self._pending: Dict[Tuple[type, int], Dict[str, int]] = {}
+        self._count = 0
+        # add() is also called from sync endpoints running in the threadpool
+        self._lock = threading.Lock()
+        self._extra: Dict[type, ExtraValues] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: asyncio.Task | None = None
+
+    def register(self, model: type, extra_values: ExtraValues):
+        """
+        Extra SET values for a model's flush UPDATE (e.g. recomputing a score
+        from the new counters), given each column's per-row delta expression.
+        """
+        self._extra[model] = extra_values
+
+    def add(self, model: type, row_id: int, column: str, delta: int = 1):
+        with self._lock:
+            deltas = self._pending.setdefault((model, row_id), {})
+            deltas[column] = deltas.get(column, 0) + delta
+            self._count += 1
+            full = self._count >= self.max_pending
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def pending(self, model: type, row_id: int, column: str) -> int:
+        """Delta not yet written, to add to the stored value when reporting it."""
+        with self._lock:
+            return self._pending.get((model, row_id), {}).get(column, 0)
+
+    def _statement(self, model: type, rows: Dict[int, Dict[str, int]]):
+        columns = sorted({column for deltas in rows.values() for column in deltas})
+        deltas = {
+            column: case(
+                {row_id: d[column] for row_id, d in rows.items() if d.get(column)},
+                value=model.id,
+                else_=0
+            )
+            for column in columns
+        }
+        values = {column: func.coalesce(getattr(model, column), 0) + deltas[column] for column in columns}
+        extra = self._extra.get(model)
+        if extra is not None:
+            values.update(extra(deltas))
+        return update(model)\
+            .where(model.id.in_(list(rows)))\
+            .values(values)\
+            .execution_options(synchronize_session=False)
+
+    def _restore(self, pending: Dict[Tuple[type, int], Dict[str, int]]):
+        with self._lock:
+            for key, deltas in pending.items():
+                current = self._pending.setdefault(key, {})
+                for column, delta in deltas.items():
+                    current[column] = current.get(column, 0) + delta
+                    self._count += 1
+
+    async def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._count = 0
+
+        by_model: Dict[type, Dict[int, Dict[str, int]]] = {}
+        for (model, row_id), deltas in pending.items():
+            deltas = {column: delta for column, delta in deltas.items() if delta}
+            if deltas:
+                by_model.setdefault(model, {})[row_id] = deltas
+        if not by_model:
+            return
+
+        try:
+            async with db_session.AsyncSessionLocal() as db:
+                for model, rows in by_model.items():
+                    ids: List[int] = sorted(rows)
+                    for start in range(0, len(ids), FLUSH_BATCH_SIZE):
+                        batch = {row_id: rows[row_id] for row_id in ids[start:start + FLUSH_BATCH_SIZE]}
+                        await db.execute(self._statement(model, batch))
+                await db.commit()
+        except BaseException:
+            # Nothing was committed (also when cancelled mid-UPDATE); retry
+            # with the next flush
+            self._restore(pending)
+            raise
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Counter buffer flush failed: {e!r}")
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            # A flush cut off by the cancel restores its deltas before the
+            # task finishes, so the final flush below picks them up
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final counter buffer flush failed: {e!r}")
+
+
+counter_buffer = CounterBuffer()
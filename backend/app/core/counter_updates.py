@@ -0,0 +1,83 @@
+"""
+Coalesced live counter updates for post:<id> subscribers.
+
+Votes, comments and reactions on a hot post can change its counters many
+times a second. Instead of one WebSocket message per change, endpoints record
+the change here and a background loop publishes at most one message per post
+(and per comment) every WS_COUNTER_FLUSH_INTERVAL_SECONDS:
+
+    {"type": "post_counters", "post_id": 1, "upvotes": 10, "downvotes": 2,
+     "comments_count": 4, "reactions": {"heart": 3, "+1": -1}}
+
+upvotes / downvotes / comments_count are the latest absolute values (safe to
+apply twice); "reactions" holds the net per-emoji change since the last flush.
+Comment counters use "type": "comment_counters" plus "comment_id".
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.socket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+
+class CounterCoalescer:
+    def __init__(self, interval: float = settings.WS_COUNTER_FLUSH_INTERVAL_SECONDS):
+        self.interval = interval
+        # (post_id, comment_id or None) -> pending fields
+        self._pending: Dict[Tuple[int, Optional[int]], dict] = {}
+        # record() is also called from sync endpoints running in the threadpool
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    def record(self, post_id: int, comment_id: Optional[int] = None, **counters):
+        """Latest absolute counter values, e.g. record(1, upvotes=10, downvotes=2)."""
+        with self._lock:
+            self._pending.setdefault((post_id, comment_id), {}).update(counters)
+
+    def record_reaction(self, post_id: int, comment_id: Optional[int], emoji: str, delta: int):
+        with self._lock:
+            reactions = self._pending.setdefault((post_id, comment_id), {}).setdefault("reactions", {})
+            reactions[emoji] = reactions.get(emoji, 0) + delta
+            if reactions[emoji] == 0:
+                del reactions[emoji]
+
+    async def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for (post_id, comment_id), fields in pending.items():
+            if not fields.get("reactions", True):
+                # Reactions toggled back and forth within the interval
+                del fields["reactions"]
+            if not fields:
+                continue
+            if comment_id is None:
+                message = {"type": "post_counters", "post_id": post_id}
+            else:
+                message = {"type": "comment_counters", "post_id": post_id, "comment_id": comment_id}
+            message.update(fields)
+            await manager.publish(f"post:{post_id}", message)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Counter flush failed: {e!r}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+counter_updates = CounterCoalescer()
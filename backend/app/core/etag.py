@@ -0,0 +1,50 @@
+"""
+Strong ETags and If-None-Match handling for polled GET endpoints.
+
+ETags are built from cheap version markers rather than from the response
+body, so a 304 is decided before the result set is loaded or serialized:
+
+- feeds: index seeks for the newest updated_at and oldest created_at plus
+  the department's generation row (app.crud.post.get_feed_version)
+- a single post: its updated_at
+- a comment thread: count, max id and max updated_at of the post's comments
+  and their reactions, over the post_id indexes
+  (app.crud.comment.get_comments_version)
+- news: the static item list, hashed once at import
+
+The caller's identity is mixed in wherever the body is per-user.
+"""
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response
+
+# Clients must revalidate, and per-user bodies must not be shared by proxies
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match contains etag (weak comparison, per RFC 9110).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,91 @@
+"""
+In-process cache for the first page of the feed.
+
+GET /posts/ with skip=0 and no cursor is by far the hottest request. Each
+entry stores the already-serialized page keyed by (department, tags, role
+bucket, limit, sort, window) and is dropped by post writes
+(create/delete/pin/unpin) on that department, by the earliest pin expiry on
+the page, or by a short TTL. Callers also store the feed version the page
+was built from and ignore hits whose version no longer matches.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+CacheKey = Tuple[str, str, str, int, str, str]
+
+
+class FeedCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> (expires_at monotonic, payload)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        department: Optional[str],
+        tags: Optional[str],
+        is_admin: bool,
+        limit: int,
+        sort: str = "new",
+        window: Optional[str] = None,
+    ) -> CacheKey:
+        # Admins see unmasked anonymous authors, so they get their own bucket
+        return (department or "ALL", tags or "", "admin" if is_admin else "public", limit, sort, window or "")
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: CacheKey, payload: Dict[str, Any], pin_expiry: Optional[datetime] = None) -> None:
+        """
+        Store a serialized page. pin_expiry is the earliest pinned_until
+        (naive UTC) on the page; the entry never outlives it.
+        """
+        if self.ttl_seconds <= 0:
+            return
+        ttl = self.ttl_seconds
+        if pin_expiry is not None:
+            ttl = min(ttl, (pin_expiry - datetime.utcnow()).total_seconds())
+            if ttl <= 0:
+                return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_department(self, department: Optional[str]) -> None:
+        """
+        Drop every page that can contain a post from this department.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == "ALL" or key[0] == department:
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+feed_cache = FeedCache(
+    ttl_seconds=settings.FEED_CACHE_TTL_SECONDS,
+    max_entries=settings.FEED_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,100 @@
+"""
+Recent personal events per user, so a reconnecting client can be sent just
+what it missed instead of refetching /notifications/.
+
+Event ids are notification row ids (monotonic). Every worker receives every
+event through the backplane, so each worker's buffer is complete for the
+ids it has seen. since() returns None when it can't prove completeness
+(worker started later, the backplane dropped events, or the user's ring
+overflowed) and the caller falls
+back to the database.
+"""
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.serialization import with_id
+
+Event = Tuple[int, str]  # (event id, encoded JSON)
+# (event id, encoded JSON, recipient user_id -> that user's event id or None)
+Broadcast = Tuple[int, str, Optional[Dict[int, int]]]
+
+
+class ReplayBuffer:
+    def __init__(self, size: int = settings.WS_REPLAY_BUFFER_SIZE, max_users: int = settings.WS_REPLAY_MAX_USERS):
+        self.size = size
+        self.max_users = max_users
+        # user_id -> last `size` events, least recently used first
+        self._users: "OrderedDict[int, Deque[Event]]" = OrderedDict()
+        # Events with id <= floor may be missing from the ring
+        self._floors: Dict[int, int] = {}
+        self._broadcasts: Deque[Broadcast] = deque(maxlen=size)
+        self._broadcast_floor = 0
+        # Highest id of any user ring dropped by the LRU cap
+        self._evicted_floor = 0
+        # Nothing before the first event this worker saw is known
+        self._start_floor: Optional[int] = None
+
+    def _observe(self, event_id: int):
+        if self._start_floor is None:
+            self._start_floor = event_id - 1
+
+    def record(self, user_id: int, event_id: int, text: str):
+        self._observe(event_id)
+        ring = self._users.get(user_id)
+        if ring is None:
+            ring = self._users[user_id] = deque(maxlen=self.size)
+            # Complete since this worker started, unless this user's earlier
+            # ring may have been dropped by the LRU cap
+            self._floors[user_id] = max(self._start_floor, self._evicted_floor)
+            if len(self._users) > self.max_users:
+                old_user, old_ring = self._users.popitem(last=False)
+                if old_ring:
+                    self._evicted_floor = max(self._evicted_floor, old_ring[-1][0])
+                self._floors.pop(old_user, None)
+        else:
+            self._users.move_to_end(user_id)
+        if len(ring) == self.size:
+            self._floors[user_id] = max(self._floors[user_id], ring[0][0])
+        ring.append((event_id, text))
+
+    def record_broadcast(self, event_id: int, text: str, ids: Optional[Dict[int, int]] = None):
+        """
+        One event for many users, stored once. With ids, only those users
+        get it, each under their own id (text then has no "id" key; event_id
+        is the highest of them).
+        """
+        self._observe(event_id)
+        if len(self._broadcasts) == self.size:
+            self._broadcast_floor = max(self._broadcast_floor, self._broadcasts[0][0])
+        self._broadcasts.append((event_id, text, ids))
+
+    def mark_gap(self):
+        """
+        Events may have been missed (the backplane lost its subscription):
+        nothing before the next event seen is known any more.
+        """
+        self._start_floor = None
+
+    def since(self, user_id: int, last_id: int) -> Optional[List[Event]]:
+        """Events for the user with id > last_id, oldest first; None if unknown."""
+        if self._start_floor is None or last_id < self._start_floor or last_id < self._broadcast_floor:
+            return None
+        ring = self._users.get(user_id)
+        floor = self._floors[user_id] if ring is not None else self._evicted_floor
+        if last_id < floor:
+            return None
+
+        events = []
+        for event_id, text, ids in self._broadcasts:
+            if ids is not None:
+                if user_id not in ids:
+                    continue
+                event_id = ids[user_id]
+                text = with_id(text, event_id)
+            if event_id > last_id:
+                events.append((event_id, text))
+        if ring is not None:
+            events.extend(e for e in ring if e[0] > last_id)
+        events.sort(key=lambda e: e[0])
+        return events
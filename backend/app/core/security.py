@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import jwt
+from jose import jwt, JWTError
 from app.core.config import settings
 import bcrypt
 
@@ -30,3 +30,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+RESUME_TOKEN_TYPE = "ws_resume"
+
+def create_resume_token(user_id: int) -> str:
+    """
+    Short-lived token that lets a WebSocket client reconnect without full
+    re-authentication (no Firebase call, no DB lookup).
+    """
+    expire = datetime.utcnow() + timedelta(seconds=settings.WS_RESUME_TOKEN_TTL_SECONDS)
+    return jwt.encode({"uid": user_id, "typ": RESUME_TOKEN_TYPE, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def verify_resume_token(token: str) -> Optional[int]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("typ") != RESUME_TOKEN_TYPE or not isinstance(payload.get("uid"), int):
+        return None
+    return payload["uid"]
@@ -0,0 +1,86 @@
+"""
+Fast JSON response path for list endpoints.
+
+With response_model=List[...], FastAPI validates the ORM objects, dumps them
+to Python dicts and then encodes those with the stdlib json module. Here the
+TypeAdapters are built once at import, use response-only schemas that skip
+re-validating trusted DB values (author emails), and pydantic-core writes
+JSON bytes directly, skipping the intermediate dicts. Plain dict payloads (cached feed
+pages, notifications) are encoded with orjson when it is installed.
+
+See benchmarks/bench_serialization.py for the per-request savings.
+"""
+import json
+from typing import Any, List, Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.schemas.post import PostResponse
+from app.schemas.comment import Comment
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+POST_LIST = TypeAdapter(List[PostResponse])
+COMMENT_LIST = TypeAdapter(List[Comment])
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse that encodes with orjson when available.
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_text(content: Any) -> str:
+    """
+    Encode plain data to a compact JSON string (orjson when available).
+    Used to serialize WebSocket payloads once per message, not per socket.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def with_id(text: str, event_id: int) -> str:
+    """
+    Prefix an already-encoded JSON object with an "id" key, so one encoded
+    message can carry a different id per recipient without re-encoding.
+    """
+    prefix = f'{{"id":{int(event_id)}'
+    return prefix + ("}" if text == "{}" else "," + text[1:])
+
+
+def _copy_headers(response: Optional[Response]) -> Optional[dict]:
+    # Headers set on FastAPI's injected Response are dropped when an endpoint returns its own Response
+    if response is None:
+        return None
+    return {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+
+
+def to_jsonable(adapter: TypeAdapter, items: Any) -> Any:
+    """
+    Validate ORM objects through the adapter and return JSON-ready Python data.
+    """
+    return adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+
+
+def serialize_response(adapter: TypeAdapter, items: Any, response: Optional[Response] = None) -> Response:
+    """
+    Validate ORM objects through the adapter and write JSON bytes in one pass.
+    """
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    return Response(content=body, media_type="application/json", headers=_copy_headers(response))
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Encode already JSON-ready data (dicts/lists of primitives).
+    """
+    return FastJSONResponse(content=content, headers=_copy_headers(response))
@@ -1,39 +1,394 @@
-from typing import List, Dict
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Iterable, List, Dict, Optional, Set
 from fastapi import WebSocket
 
+from app.core.config import settings
+from app.core.backplane import Backplane
+from app.core.serialization import dumps_text, with_id
+from app.core.security import create_resume_token
+from app.core.replay_buffer import ReplayBuffer, Event
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to clients evicted for not keeping up (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Client stopped answering heartbeats (application-defined range 4000-4999)
+IDLE_CLOSE_CODE = 4000
+# Oldest socket dropped to make room under the per-user cap
+CONNECTION_CAP_CLOSE_CODE = 4001
+# Server shutting down (RFC 6455 "Going Away")
+GOING_AWAY_CLOSE_CODE = 1001
+
+PING_TEXT = dumps_text({"type": "ping"})
+
+# Loads a user's missed events (id > last_id) from the database
+ReplayFallback = Callable[[int, int], Awaitable[List[Event]]]
+
+# Subscribable topics: department:<code>, post:<id>, user:<id>
+TOPIC_PATTERN = re.compile(r"^(department:[A-Za-z0-9_&\- ]{1,50}|post:\d+|user:\d+)$")
+MAX_TOPICS_PER_CONNECTION = 64
+
+
+class Connection:
+    """
+    One registered socket with its own bounded outbound queue, drained by a
+    dedicated sender task so a slow client only ever delays itself.
+    Server-Sent Event streams have websocket=None: the streaming response
+    drains the queue itself. Queue items are (event_id or None, text).
+    """
+    def __init__(self, websocket: Optional[WebSocket], user_id: int, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender_task: asyncio.Task | None = None
+        self.topics: Set[str] = set()
+        # Refreshed by every client frame (pongs included); sends don't count,
+        # since writes to a half-open socket still succeed
+        self.last_seen = time.monotonic()
+        self.resume_refresh_at = 0.0
+        self.closed = False
+
+
 class ConnectionManager:
-    def __init__(self):
-        # Map user_id to list of active websockets (user might have multiple tabs)
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+    def __init__(
+        self,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WS_SEND_TIMEOUT_SECONDS,
+        heartbeat_interval: float = settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+        idle_timeout: float = settings.WS_IDLE_TIMEOUT_SECONDS,
+        max_per_user: int = settings.WS_MAX_CONNECTIONS_PER_USER
+    ):
+        # Map user_id to list of active connections (user might have multiple tabs)
+        self.active_connections: Dict[int, List[Connection]] = {}
+        # topic -> subscribed connections, so publishing costs O(subscribers)
+        self.topics: Dict[str, Set[Connection]] = {}
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.max_per_user = max(1, max_per_user)
+        self._heartbeat_task: asyncio.Task | None = None
+        # Recent personal events, for replay when a client reconnects
+        self.replay_buffer = ReplayBuffer()
+        # Cross-worker fan-out; None means local delivery only
+        self.backplane: Backplane | None = None
+
+    async def start(self, backplane: Backplane):
+        self.backplane = backplane
+        await backplane.start(self.deliver, self.replay_buffer.mark_gap)
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
 
-    async def connect(self, websocket: WebSocket, user_id: int):
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self.backplane is not None:
+            await self.backplane.stop()
+            self.backplane = None
+
+        # Wind down every connection so no sender task outlives the loop
+        connections = [c for cs in self.active_connections.values() for c in cs]
+        for connection in connections:
+            self._remove(connection)
+        senders = [c.sender_task for c in connections if c.sender_task is not None]
+        if senders:
+            await asyncio.gather(*senders, return_exceptions=True)
+        await asyncio.gather(*(self._close(c, GOING_AWAY_CLOSE_CODE, "Server shutting down") for c in connections))
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        last_event_id: Optional[int] = None,
+        fallback: Optional[ReplayFallback] = None
+    ):
+        """
+        Accept and register a socket. With last_event_id, events the client
+        missed are sent first as one {"type": "replay", "events": [...]} frame.
+        """
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        connection = Connection(websocket, user_id, self.queue_size)
+        # Registered before the replay is loaded so nothing published meanwhile
+        # is lost; the sender starts once the replay is queued ahead of it
+        self._register(connection)
+        self._issue_resume_token(connection)
+        if last_event_id is not None:
+            await self._queue_replay(connection, last_event_id, fallback)
+        connection.sender_task = asyncio.create_task(self._sender(connection))
+
+    async def missed_events(self, user_id: int, last_id: int, fallback: Optional[ReplayFallback] = None) -> List[Event]:
+        """Events with id > last_id: from memory when complete, else from the fallback."""
+        events = self.replay_buffer.since(user_id, last_id)
+        if events is None:
+            events = await fallback(user_id, last_id) if fallback is not None else []
+        return events
+
+    async def _queue_replay(self, connection: Connection, last_id: int, fallback: Optional[ReplayFallback]):
+        events = await self.missed_events(connection.user_id, last_id, fallback)
+        replayed_through = events[-1][0] if events else last_id
+
+        # Pull out anything queued while loading, put the replay first
+        pending = []
+        while not connection.queue.empty():
+            pending.append(connection.queue.get_nowait())
+        if events:
+            # Pre-encoded events are spliced in without re-encoding
+            text = '{"type":"replay","events":[' + ",".join(t for _, t in events) + "]}"
+            self._enqueue(connection, text, replayed_through)
+        for event_id, text in pending:
+            if event_id is None or event_id > replayed_through:
+                self._enqueue(connection, text, event_id)
+
+    def connect_stream(self, user_id: int, topics: Iterable[str] = ()) -> Connection:
+        """
+        Register a Server-Sent Events stream. The caller drains
+        connection.queue (a None item means: close the stream) and calls
+        disconnect_stream() when the response ends. Raises ValueError for
+        invalid topics.
+        """
+        topics = list(topics)
+        for topic in topics:
+            self.validate_topic(topic, user_id)
+        connection = Connection(None, user_id, self.queue_size)
+        self._register(connection)
+        for topic in topics[:MAX_TOPICS_PER_CONNECTION]:
+            self._subscribe(connection, topic)
+        return connection
+
+    def disconnect_stream(self, connection: Connection):
+        self._remove(connection)
+
+    def _register(self, connection: Connection):
+        user_id = connection.user_id
+        connections = self.active_connections.setdefault(user_id, [])
+        # Per-user cap: the oldest socket is most likely a forgotten tab
+        while len(connections) >= self.max_per_user:
+            oldest = connections[0]
+            self._remove(oldest)
+            asyncio.create_task(self._close(oldest, CONNECTION_CAP_CLOSE_CODE, "Too many connections"))
+            connections = self.active_connections.setdefault(user_id, [])
+        connections.append(connection)
+        # Personal messages travel on the user's own topic
+        self._subscribe(connection, f"user:{user_id}")
 
     def disconnect(self, websocket: WebSocket, user_id: int):
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+        for connection in self.active_connections.get(user_id, []):
+            if connection.websocket is websocket:
+                self._remove(connection)
+                break
+
+    def _remove(self, connection: Connection):
+        connections = self.active_connections.get(connection.user_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+            if not connections:
+                del self.active_connections[connection.user_id]
+        for topic in list(connection.topics):
+            self._unsubscribe(connection, topic)
+        if connection.sender_task and connection.sender_task is not asyncio.current_task():
+            connection.sender_task.cancel()
+
+    def _issue_resume_token(self, connection: Connection):
+        # Lets the client reconnect (e.g. after a deploy) without re-authenticating;
+        # re-issued at half the TTL so long-lived sockets always hold a valid one
+        token = create_resume_token(connection.user_id)
+        connection.resume_refresh_at = time.monotonic() + settings.WS_RESUME_TOKEN_TTL_SECONDS / 2
+        self._enqueue(connection, dumps_text({"type": "resume", "resume_token": token}))
+
+    def _find(self, websocket: WebSocket, user_id: int) -> Connection | None:
+        for connection in self.active_connections.get(user_id, []):
+            if connection.websocket is websocket:
+                return connection
+        return None
+
+    def _subscribe(self, connection: Connection, topic: str):
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def _unsubscribe(self, connection: Connection, topic: str):
+        connection.topics.discard(topic)
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.topics[topic]
+
+    def validate_topic(self, topic: str, user_id: int):
+        """Raises ValueError for invalid or disallowed topics."""
+        if not TOPIC_PATTERN.match(topic):
+            raise ValueError(f"Invalid topic: {topic}")
+        if topic.startswith("user:") and topic != f"user:{user_id}":
+            raise ValueError("Cannot subscribe to another user's topic")
+
+    def subscribe(self, websocket: WebSocket, user_id: int, topic: str):
+        """Raises ValueError for invalid or disallowed topics."""
+        connection = self._find(websocket, user_id)
+        if connection is None:
+            raise ValueError("Connection is not registered")
+        self.validate_topic(topic, user_id)
+        if topic not in connection.topics and len(connection.topics) >= MAX_TOPICS_PER_CONNECTION:
+            raise ValueError("Too many subscriptions")
+        self._subscribe(connection, topic)
+
+    def unsubscribe(self, websocket: WebSocket, user_id: int, topic: str):
+        connection = self._find(websocket, user_id)
+        if connection is not None and topic != f"user:{user_id}":
+            self._unsubscribe(connection, topic)
+
+    async def handle_client_message(self, websocket: WebSocket, user_id: int, text: str):
+        """
+        Handle a control frame from the client:
+        {"action": "subscribe" | "unsubscribe", "topic": "department:CSE"}
+        Anything else (e.g. {"type": "pong"}) only marks the socket alive.
+        """
+        connection = self._find(websocket, user_id)
+        if connection is None:
+            return
+        connection.last_seen = time.monotonic()
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(data, dict) or data.get("action") not in ("subscribe", "unsubscribe"):
+            return
+
+        action, topic = data["action"], str(data.get("topic", ""))
+        try:
+            if action == "subscribe":
+                self.subscribe(websocket, user_id, topic)
+                reply = {"type": "subscribed", "topic": topic}
+            else:
+                self.unsubscribe(websocket, user_id, topic)
+                reply = {"type": "unsubscribed", "topic": topic}
+        except ValueError as e:
+            reply = {"type": "error", "topic": topic, "detail": str(e)}
+        self._enqueue(connection, dumps_text(reply))
+
+    def _enqueue(self, connection: Connection, text: str, event_id: Optional[int] = None):
+        try:
+            connection.queue.put_nowait((event_id, text))
+        except asyncio.QueueFull:
+            # Slow consumer: drop it rather than buffer without bound
+            logger.warning(f"Evicting slow WebSocket consumer (user {connection.user_id})")
+            self._remove(connection)
+            asyncio.create_task(self._close(connection, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _close(self, connection: Connection, code: int, reason: str = ""):
+        connection.closed = True
+        if connection.websocket is None:
+            # SSE stream: wake the response so it ends
+            try:
+                connection.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+            return
+        try:
+            await connection.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    async def _sender(self, connection: Connection):
+        try:
+            while True:
+                event_id, text = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_text(text), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Broken pipe, stale or stalled connection: unregister it
+            logger.info(f"Dropping WebSocket for user {connection.user_id}: {e!r}")
+            self._remove(connection)
+            await self._close(connection, SLOW_CONSUMER_CLOSE_CODE)
+
+    async def _heartbeat(self):
+        """
+        Ping every socket each interval, evict those silent past the idle
+        timeout and refresh resume tokens that are halfway to expiry.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            cutoff = now - self.idle_timeout
+            for connections in list(self.active_connections.values()):
+                for connection in list(connections):
+                    if connection.websocket is None:
+                        # SSE streams send their own keep-alive comments
+                        continue
+                    if connection.last_seen < cutoff:
+                        logger.info(f"Evicting idle WebSocket (user {connection.user_id})")
+                        self._remove(connection)
+                        asyncio.create_task(self._close(connection, IDLE_CLOSE_CODE, "Idle timeout"))
+                    else:
+                        self._enqueue(connection, PING_TEXT)
+                        if now >= connection.resume_refresh_at:
+                            self._issue_resume_token(connection)
+
+    async def _publish(self, envelope: dict):
+        if self.backplane is None:
+            await self.deliver(envelope)
+            return
+        try:
+            await self.backplane.publish(envelope)
+        except Exception as e:
+            # Backplane down: still reach the clients attached to this worker
+            logger.error(f"Backplane publish failed, delivering locally: {e!r}")
+            await self.deliver(envelope)
+
+    async def deliver(self, envelope: dict):
+        """Backplane handler: push an envelope to this worker's sockets."""
+        # Already encoded by the publisher: every socket gets the same string
+        text, event_id = envelope["data"], envelope.get("id")
+        # Per-recipient ids; JSON object keys arrive as strings off the backplane
+        ids = envelope.get("ids")
+        if ids is not None:
+            ids = {int(user_id): recipient_event_id for user_id, recipient_event_id in ids.items()}
+        if event_id is not None:
+            if envelope["kind"] == "broadcast":
+                self.replay_buffer.record_broadcast(event_id, text, ids)
+            elif envelope["topic"].startswith("user:"):
+                self.replay_buffer.record(int(envelope["topic"][5:]), event_id, text)
+
+        if envelope["kind"] == "topic":
+            # Copy: eviction mutates the index
+            for connection in list(self.topics.get(envelope["topic"], ())):
+                self._enqueue(connection, text, event_id)
+        elif ids is not None:
+            for user_id, connections in list(self.active_connections.items()):
+                if user_id in ids:
+                    user_text = with_id(text, ids[user_id])
+                    for connection in list(connections):
+                        self._enqueue(connection, user_text, ids[user_id])
+        else:
+            for connections in list(self.active_connections.values()):
+                for connection in list(connections):
+                    self._enqueue(connection, text, event_id)
+
+    async def publish(self, topic: str, message: dict, event_id: Optional[int] = None):
+        """
+        Send to every connection subscribed to topic, on any worker.
+        event_id (a notification id) lets clients resume after a disconnect.
+        """
+        await self._publish({"kind": "topic", "topic": topic, "id": event_id, "data": dumps_text(message)})
 
     async def send_personal_message(self, message: dict, user_id: int):
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    # Handle broken pipe or stale connection
-                    pass
-
-    async def broadcast(self, message: dict):
-        for user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    pass
+        # Notification payloads carry their row id, which doubles as the event id
+        await self.publish(f"user:{user_id}", message, event_id=message.get("id"))
+
+    async def broadcast(self, message: dict, event_id: Optional[int] = None):
+        await self._publish({"kind": "broadcast", "id": event_id, "data": dumps_text(message)})
+
+    async def broadcast_notifications(self, message: dict, ids: Dict[int, int]):
+        """
+        Send one message to many users as a single envelope, each recipient
+        under their own notification id (ids: user_id -> notification id).
+        Only users in ids receive it.
+        """
+        if ids:
+            await self._publish({"kind": "broadcast", "id": max(ids.values()), "ids": ids, "data": dumps_text(message)})
 
 manager = ConnectionManager()
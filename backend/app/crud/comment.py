@@ -1,45 +1,321 @@
-from sqlalchemy.orm import Session, joinedload
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.comment import Comment
+from app.models.reaction import Reaction
 from app.schemas.comment import CommentCreate
-from app.crud.reaction import get_reaction_counts
+from app.crud.reaction import get_reaction_counts_batch
+from app.crud.vote import get_user_votes
 
-def create_comment(db: Session, comment: CommentCreate, post_id: int, author_id: int, parent_id: int = None):
-    db_comment = Comment(
+# Materialized paths: each comment's path is the fixed-width ids of its
+# ancestors and itself, e.g. "00000000120000000345" for 345 replying to 12.
+# Digits only, so ordering is the same under any collation; a subtree is
+# the range [path, path of the next sibling id). Comments written before
+# scripts/add_comment_paths.py ran have path NULL; their threads fall back
+# to walking parent_id until the backfill fills them in.
+PATH_SEGMENT_WIDTH = 10
+
+def path_segment(comment_id: int) -> str:
+    return f"{comment_id:0{PATH_SEGMENT_WIDTH}d}"
+
+def path_ids(path: str) -> List[int]:
+    """Ids along a path, root first (the last one is the comment itself)."""
+    return [int(path[i:i + PATH_SEGMENT_WIDTH]) for i in range(0, len(path), PATH_SEGMENT_WIDTH)]
+
+def subtree_bounds(path: str) -> Tuple[str, str]:
+    """[low, high) range of paths in the subtree rooted at path (not NULL)."""
+    return path, path[:-PATH_SEGMENT_WIDTH] + path_segment(int(path[-PATH_SEGMENT_WIDTH:]) + 1)
+
+def _new_comment(comment: CommentCreate, post_id: int, author_id: int, parent: Optional[Comment]) -> Comment:
+    if parent is not None and parent.post_id != post_id:
+        raise ValueError("Invalid parent comment")
+    return Comment(
         content=comment.content,
         post_id=post_id,
         author_id=author_id,
-        parent_id=parent_id,
+        parent_id=parent.id if parent is not None else None,
+        depth=(parent.depth or 0) + 1 if parent is not None else 0,
+        descendant_count=0,
         is_anonymous=comment.is_anonymous
     )
+
+def _place(db_comment: Comment, parent: Optional[Comment]):
+    """
+    Set the path once the id is known; returns the UPDATE that bumps the
+    cached descendant_count of every ancestor, or None for a top-level comment.
+    A reply to a comment without a path gets none either (left to the backfill).
+    """
+    if parent is not None and parent.path is None:
+        return None
+    db_comment.path = (parent.path if parent is not None else "") + path_segment(db_comment.id)
+    if parent is None:
+        return None
+    return update(Comment)\
+        .where(Comment.id.in_(path_ids(parent.path)))\
+        .values(descendant_count=Comment.descendant_count + 1)\
+        .execution_options(synchronize_session=False)
+
+def create_comment(db: Session, comment: CommentCreate, post_id: int, author_id: int, parent_id: int = None):
+    """Raises ValueError if parent_id is not a comment on the same post."""
+    parent = db.get(Comment, parent_id) if parent_id is not None else None
+    if parent_id is not None and parent is None:
+        raise ValueError("Invalid parent comment")
+    db_comment = _new_comment(comment, post_id, author_id, parent)
     db.add(db_comment)
+    db.flush()
+    bump_ancestors = _place(db_comment, parent)
+    if bump_ancestors is not None:
+        db.execute(bump_ancestors)
     db.commit()
     db.refresh(db_comment)
     return db_comment
 
-def get_comments_by_post(db: Session, post_id: int, user_id: int = None):
-    # Get all comments for post
-    comments = db.query(Comment).options(joinedload(Comment.author)).filter(Comment.post_id == post_id).order_by(Comment.created_at).all()
-    
-    # We want to return a nested structure, but Pydantic models are flat or recursive.
-    # Let's populate reactions first.
-    
-    # Optimization: Fetch all reactions for these comments in one query? 
-    # For simplicity, call get_reaction_counts loop or leave empty for now.
-    # Ideally, we enrich the objects.
-    
-    # Let's just return flat list and let frontend partial nest, 
-    # OR build tree here.
-    
-    # For now, simplistic approach: attach reactions manually
-    for c in comments:
-        c.reactions = get_reaction_counts(db, "comment", c.id, user_id)
-        c.replies = [] # Reset for recursion if needed, though SQLALchemy relations handle this lazily
-
-    # If we want detailed tree, we filter parent_id=None and let SQLAlchemy load replies.
-    # But getting reaction counts for nested replies is tricky with lazy loading.
-    
-    # Let's return the simplified list and let frontend handle threading visually via parent_id,
-    # OR creating a recursive response.
-    
-    # Better: Return all comments, let frontend build tree.
-    return comments
+async def create_comment_async(db: AsyncSession, comment: CommentCreate, post_id: int, author_id: int, parent_id: int = None):
+    """
+    Async variant of create_comment. Flushes (so the id is available) but
+    leaves the commit to the caller, so related counter/notification writes
+    share one transaction.
+    """
+    parent = await db.get(Comment, parent_id) if parent_id is not None else None
+    if parent_id is not None and parent is None:
+        raise ValueError("Invalid parent comment")
+    db_comment = _new_comment(comment, post_id, author_id, parent)
+    db.add(db_comment)
+    await db.flush()
+    bump_ancestors = _place(db_comment, parent)
+    if bump_ancestors is not None:
+        await db.execute(bump_ancestors)
+    # A new comment has no replies/reactions; mark them loaded so serialization
+    # doesn't trigger a lazy load (not allowed on AsyncSession)
+    set_committed_value(db_comment, "replies", [])
+    set_committed_value(db_comment, "reactions", [])
+    return db_comment
+
+def delete_comment(db: Session, comment: Comment):
+    """
+    Delete a single comment (caller commits). As before, its replies move up
+    to top level; their paths and depths are rewritten with one range UPDATE
+    and the ancestors' descendant counts drop by the size of the subtree.
+    Without a path (not backfilled yet) only the replies' parent_id changes.
+    """
+    if comment.path is None:
+        db.query(Comment).filter(Comment.parent_id == comment.id).update(
+            {Comment.parent_id: None}, synchronize_session=False
+        )
+        db.delete(comment)
+        return
+
+    low, high = subtree_bounds(comment.path)
+    ancestors = path_ids(comment.path)[:-1]
+    if ancestors:
+        db.query(Comment).filter(Comment.id.in_(ancestors)).update(
+            {Comment.descendant_count: Comment.descendant_count - (1 + (comment.descendant_count or 0))},
+            synchronize_session=False
+        )
+    db.query(Comment).filter(Comment.post_id == comment.post_id, Comment.path > low, Comment.path < high).update(
+        {
+            Comment.path: func.substr(Comment.path, len(low) + 1),
+            Comment.depth: Comment.depth - ((comment.depth or 0) + 1),
+        },
+        synchronize_session=False
+    )
+    db.query(Comment).filter(Comment.parent_id == comment.id).update(
+        {Comment.parent_id: None}, synchronize_session=False
+    )
+    db.delete(comment)
+
+def rebuild_comment_paths(db: Session) -> int:
+    """
+    Recompute path, depth and descendant_count for every comment from
+    parent_id (backfill for existing rows). Returns the number of comments.
+    """
+    parents = dict(db.query(Comment.id, Comment.parent_id).all())
+    paths: Dict[int, str] = {}
+
+    def resolve(comment_id: int) -> str:
+        # Walk up to the first resolved ancestor, then fill in on the way down
+        chain = []
+        while comment_id is not None and comment_id not in paths:
+            chain.append(comment_id)
+            parent_id = parents.get(comment_id)
+            comment_id = parent_id if parent_id in parents else None
+        prefix = paths[comment_id] if comment_id is not None else ""
+        for cid in reversed(chain):
+            prefix = paths[cid] = prefix + path_segment(cid)
+        return prefix
+
+    descendants: Dict[int, int] = {cid: 0 for cid in parents}
+    for cid in parents:
+        for ancestor in path_ids(resolve(cid))[:-1]:
+            descendants[ancestor] += 1
+
+    db.bulk_update_mappings(Comment, [
+        {
+            "id": cid,
+            "path": path,
+            "depth": len(path) // PATH_SEGMENT_WIDTH - 1,
+            "descendant_count": descendants[cid],
+        }
+        for cid, path in paths.items()
+    ])
+    db.commit()
+    return len(paths)
+
+def get_comments_version(db: Session, post_id: int):
+    """
+    Cheap change marker for a post's comment thread: new/deleted/voted
+    comments and added/removed reactions all change it.
+    """
+    comments = db.query(func.count(Comment.id), func.max(Comment.id), func.max(Comment.updated_at))\
+        .filter(Comment.post_id == post_id).one()
+    reactions = db.query(func.count(Reaction.id), func.max(Reaction.id))\
+        .join(Comment, Comment.id == Reaction.comment_id)\
+        .filter(Comment.post_id == post_id).one()
+    return tuple(comments) + tuple(reactions)
+
+def get_reply_counts(db: Session, comment_ids: List[int]) -> Dict[int, int]:
+    """Direct reply count per comment id (absent = no replies), one grouped query."""
+    if not comment_ids:
+        return {}
+    rows = db.query(Comment.parent_id, func.count(Comment.id))\
+        .filter(Comment.parent_id.in_(comment_ids))\
+        .group_by(Comment.parent_id).all()
+    return dict(rows)
+
+def get_first_replies(db: Session, parent_ids: List[int], per_parent: int) -> List[Comment]:
+    """
+    The oldest per_parent direct replies of each parent, in one query
+    (ROW_NUMBER() per parent_id, served by ix_comments_parent_id_id).
+    """
+    if not parent_ids or per_parent <= 0:
+        return []
+    rank = func.row_number().over(partition_by=Comment.parent_id, order_by=Comment.id).label("rank")
+    ranked = db.query(Comment.id.label("id"), rank)\
+        .filter(Comment.parent_id.in_(parent_ids)).subquery()
+    return db.query(Comment)\
+        .join(ranked, ranked.c.id == Comment.id)\
+        .filter(ranked.c.rank <= per_parent)\
+        .order_by(Comment.id).all()
+
+def comments_to_dicts(db: Session, comments: List[Comment], user_id: int = None, voter_id: int = None) -> List[dict]:
+    """
+    Response dicts for a set of comments. Constant query count: reply counts,
+    reaction tallies and the caller's votes are one query each.
+    """
+    ids = [c.id for c in comments]
+    reply_counts = get_reply_counts(db, ids)
+    reactions = get_reaction_counts_batch(db, "comment", ids, user_id)
+    votes = get_user_votes(db, voter_id, "comment", ids)
+
+    # Plain dicts: assigning to the ORM relationships (reactions, replies)
+    # would try to persist them and lazy-load the reply tree
+    return [
+        {
+            "id": c.id,
+            "content": c.content,
+            "post_id": c.post_id,
+            "author_id": c.author_id,
+            "parent_id": c.parent_id,
+            "created_at": c.created_at,
+            "is_anonymous": c.is_anonymous,
+            "upvotes": c.upvotes or 0,
+            "downvotes": c.downvotes or 0,
+            "user_vote": votes.get(c.id),
+            "reactions": reactions.get(c.id, []),
+            "reply_count": reply_counts.get(c.id, 0),
+            "depth": c.depth or 0,
+            "descendant_count": c.descendant_count or 0,
+            "replies": [],
+        }
+        for c in comments
+    ]
+
+def get_comment_page(
+    db: Session,
+    post_id: int,
+    parent_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[int] = None,
+    newest_first: bool = False,
+    replies_per_comment: int = 3,
+    user_id: int = None,
+    voter_id: int = None
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    One page of a post's top-level comments (parent_id=None) or of one
+    comment's direct replies, each followed by its first replies_per_comment
+    replies, as a flat list (the frontend threads them via parent_id).
+
+    Keyset paging on id: cursor is the last id of the previous page, returned
+    as the second element when there is a next page. Cost is proportional to
+    the page, not the thread.
+    """
+    query = db.query(Comment).filter(Comment.post_id == post_id, Comment.parent_id == parent_id)
+    if newest_first:
+        if cursor is not None:
+            query = query.filter(Comment.id < cursor)
+        query = query.order_by(Comment.id.desc())
+    else:
+        if cursor is not None:
+            query = query.filter(Comment.id > cursor)
+        query = query.order_by(Comment.id.asc())
+
+    # One extra row tells us whether there is a next page
+    page = query.limit(limit + 1).all()
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+    page = page[:limit]
+
+    replies = get_first_replies(db, [c.id for c in page], replies_per_comment)
+    return comments_to_dicts(db, page + replies, user_id, voter_id), next_cursor
+
+def get_comments_since(
+    db: Session,
+    post_id: int,
+    since_id: int,
+    limit: int = 100,
+    user_id: int = None,
+    voter_id: int = None
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    Comments at any depth added after since_id (ids are monotonic), oldest
+    first, for refreshing an open thread. Paged like get_comment_page.
+    """
+    page = db.query(Comment)\
+        .filter(Comment.post_id == post_id, Comment.id > since_id)\
+        .order_by(Comment.id.asc())\
+        .limit(limit + 1).all()
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+    return comments_to_dicts(db, page[:limit], user_id, voter_id), next_cursor
+
+def get_subtree(db: Session, comment: Comment, max_depth: Optional[int] = None, limit: int = 200) -> List[Comment]:
+    """
+    A comment and its replies at any depth, depth-first, as one range scan
+    on ix_comments_post_id_path. max_depth is relative to the comment.
+    """
+    if comment.path is None:
+        return _get_subtree_by_parent(db, comment, max_depth, limit)
+    low, high = subtree_bounds(comment.path)
+    query = db.query(Comment).filter(Comment.post_id == comment.post_id, Comment.path >= low, Comment.path < high)
+    if max_depth is not None:
+        query = query.filter(Comment.depth <= (comment.depth or 0) + max_depth)
+    return query.order_by(Comment.path).limit(limit).all()
+
+def _get_subtree_by_parent(db: Session, comment: Comment, max_depth: Optional[int], limit: int) -> List[Comment]:
+    """get_subtree for comments without a path: one query per level on parent_id."""
+    children: Dict[int, List[Comment]] = {}
+    level, depth, fetched = [comment.id], 0, 1
+    while level and fetched < limit and (max_depth is None or depth < max_depth):
+        rows = db.query(Comment).filter(Comment.parent_id.in_(level))\
+            .order_by(Comment.id).limit(limit - fetched).all()
+        for row in rows:
+            children.setdefault(row.parent_id, []).append(row)
+        level, depth, fetched = [row.id for row in rows], depth + 1, fetched + len(rows)
+
+    ordered, stack = [], [comment]
+    while stack:
+        node = stack.pop()
+        ordered.append(node)
+        stack.extend(reversed(children.get(node.id, [])))
+    return ordered
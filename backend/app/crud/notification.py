@@ -0,0 +1,39 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload
+from app.models.notification import Notification
+from app.models.user import User
+
+def notification_to_dict(n: Notification, sender: Optional[User] = None) -> dict:
+    """
+    Notification as sent to the frontend, both by GET /notifications/ and as a
+    live event (where "id" doubles as the event id). Pass sender when the
+    relationship can't be lazy-loaded (AsyncSession).
+    """
+    sender = sender if sender is not None else n.sender
+    return {
+        "id": n.id,
+        "type": n.type,
+        "title": n.title,
+        "message": n.message,
+        "reference_id": n.reference_id,
+        "reference_type": n.reference_type,
+        "is_read": n.is_read or False,
+        "created_at": n.created_at.isoformat(),
+        "sender": {
+            "id": sender.id,
+            "name": sender.full_name,
+            "profile_photo": sender.profile_photo_url
+        } if sender else None
+    }
+
+def get_notifications_since(db: Session, user_id: int, last_id: int, limit: int = 100) -> List[Notification]:
+    """
+    Notifications newer than last_id, oldest first (ids are monotonic), for
+    replaying events a client missed while disconnected.
+    """
+    return db.query(Notification)\
+        .options(joinedload(Notification.sender))\
+        .filter(Notification.recipient_id == user_id, Notification.id > last_id)\
+        .order_by(Notification.id.asc())\
+        .limit(limit)\
+        .all()
@@ -1,6 +1,114 @@
+import base64
+import json
+from sqlalchemy import Float, and_, case, cast, func, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.models.post import Post
+from math import log10
+from datetime import datetime
+from app.models.post import Post, FeedGeneration
 from app.schemas.post import PostCreate
+from app.models.tag import PostTag
+from app.crud.tag import set_post_tags
+from app.core.counter_buffer import counter_buffer
+
+# Hot ranking: log-scaled engagement plus a creation-time term.
+# Every 12.5h of age is worth 10x the engagement, so newer posts outrank
+# older ones without ever rewriting stored scores as time passes.
+HOT_EPOCH = datetime(2024, 1, 1)
+HOT_DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 2
+SHARE_WEIGHT = 3
+
+def compute_hot_score(upvotes: int, downvotes: int, comments_count: int, share_count: int, created_at: datetime) -> float:
+    points = (upvotes or 0) - (downvotes or 0) \
+        + COMMENT_WEIGHT * (comments_count or 0) \
+        + SHARE_WEIGHT * (share_count or 0)
+    order = log10(max(abs(points), 1))
+    sign = 1 if points > 0 else -1 if points < 0 else 0
+    seconds = ((created_at or datetime.utcnow()) - HOT_EPOCH).total_seconds()
+    return round(sign * order + seconds / HOT_DECAY_SECONDS, 7)
+
+def refresh_hot_score(post: Post) -> None:
+    """
+    Recompute post.hot_score from its cached counters. Call after changing
+    upvotes/downvotes/comments_count/share_count, before committing.
+    """
+    post.hot_score = compute_hot_score(
+        post.upvotes, post.downvotes, post.comments_count, post.share_count, post.created_at
+    )
+
+def _engagement_term(upvotes, downvotes, comments_count, share_count):
+    # SQL form of sign * order in compute_hot_score (log() is base 10 in both PostgreSQL and SQLite)
+    points = upvotes - downvotes \
+        + COMMENT_WEIGHT * func.coalesce(comments_count, 0) \
+        + SHARE_WEIGHT * func.coalesce(share_count, 0)
+    order = func.log(cast(case((func.abs(points) > 1, func.abs(points)), else_=1), Float))
+    return case((points > 0, order), (points < 0, -order), else_=0.0)
+
+def hot_score_after_change(upvotes_delta=0, downvotes_delta=0, share_delta=0, comments_delta=0):
+    """
+    SQL expression for hot_score after adding the deltas (ints or SQL
+    expressions) to the counters, for use in the same UPDATE that changes
+    them (column references there read the old row). The creation-time term
+    of a post's score never changes, so only the engagement term is swapped.
+    """
+    upvotes = func.coalesce(Post.upvotes, 0)
+    downvotes = func.coalesce(Post.downvotes, 0)
+    shares = func.coalesce(Post.share_count, 0)
+    comments = func.coalesce(Post.comments_count, 0)
+    return Post.hot_score \
+        - _engagement_term(upvotes, downvotes, comments, shares) \
+        + _engagement_term(upvotes + upvotes_delta, downvotes + downvotes_delta, comments + comments_delta, shares + share_delta)
+
+def comments_count_update(post_id: int, delta: int):
+    """
+    Atomic UPDATE adding delta to a post's comments_count (never below 0)
+    with hot_score and updated_at to match, RETURNING (comments_count,
+    author_id). Like the vote counter UPDATE, concurrent writers can't
+    overwrite each other; no row comes back if the post doesn't exist.
+    """
+    count = func.coalesce(Post.comments_count, 0)
+    applied = case((count + delta < 0, -count), else_=delta)
+    return update(Post)\
+        .where(Post.id == post_id)\
+        .values(
+            comments_count=count + applied,
+            hot_score=hot_score_after_change(comments_delta=applied),
+            updated_at=datetime.utcnow()
+        )\
+        .returning(Post.comments_count, Post.author_id)\
+        .execution_options(synchronize_session=False)
+
+def _buffered_counter_values(deltas: dict) -> dict:
+    # Extra SET values when counter_buffer flushes posts (see app.core.counter_buffer)
+    share_delta = deltas.get("share_count")
+    if share_delta is None:
+        # Views alone don't change what a post shows: keep the ETag marker
+        return {"updated_at": Post.updated_at}
+    return {
+        "hot_score": hot_score_after_change(share_delta=share_delta),
+        "updated_at": case((share_delta != 0, datetime.utcnow()), else_=Post.updated_at),
+    }
+
+counter_buffer.register(Post, _buffered_counter_values)
+
+def recompute_hot_scores(db: Session, batch_size: int = 1000) -> int:
+    """
+    Rebuild hot_score for every post (backfill or after changing weights).
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        batch = db.query(Post).filter(Post.id > last_id).order_by(Post.id).limit(batch_size).all()
+        if not batch:
+            break
+        for post in batch:
+            refresh_hot_score(post)
+        db.commit()
+        updated += len(batch)
+        last_id = batch[-1].id
+    return updated
 
 def create_post(db: Session, post: PostCreate, author_id: int = None):
     db_post = Post(
@@ -10,9 +118,14 @@ def create_post(db: Session, post: PostCreate, author_id: int = None):
         tags=post.tags,
         type=post.type,
         is_anonymous=post.is_anonymous,
-        author_id=author_id
+        author_id=author_id,
+        created_at=datetime.utcnow()
     )
+    refresh_hot_score(db_post)
     db.add(db_post)
+    db.flush()
+    set_post_tags(db, db_post.id, db_post.tags)
+    bump_feed_generation(db, db_post.department)
     db.commit()
     db.refresh(db_post)
     return db_post
@@ -22,6 +135,51 @@ from sqlalchemy.orm import joinedload
 def get_posts(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Post).options(joinedload(Post.author)).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
 
+def get_post_version(db: Session, post_id: int):
+    """
+    Cheap change marker for a single post (None if it doesn't exist).
+    """
+    row = db.query(Post.updated_at, Post.created_at).filter(Post.id == post_id).first()
+    if row is None:
+        return None
+    return row.updated_at or row.created_at or ""
+
+def bump_feed_generation(db: Session, department: str):
+    """
+    Count a post insert/delete against the department's feed generation
+    (caller commits, so it lands in the same transaction as the write).
+    """
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    db.execute(
+        insert(FeedGeneration)
+        .values(department=department, generation=1)
+        .on_conflict_do_update(
+            index_elements=[FeedGeneration.department],
+            set_={"generation": FeedGeneration.generation + 1}
+        )
+    )
+
+def get_feed_version(query, department: Optional[str], pin_expr):
+    """
+    Change marker for a filtered feed query, built from index seeks only
+    (never a count over the matching posts):
+
+    - newest updated_at (ix_posts_updated_at, read backwards): inserts,
+      edits, pins and counter updates all bump it
+    - the department's insert/delete generation (all departments for ALL)
+    - oldest created_at: moves when a post ages out of a ?window=
+    - effective pins across the (small, global) pinned bucket: catches pin
+      expiry. Left unfiltered so it always seeks ix_posts_is_pinned_created_at_id
+    """
+    db = query.session
+    latest = query.with_entities(Post.updated_at).order_by(Post.updated_at.desc()).limit(1).scalar()
+    oldest = query.with_entities(Post.created_at).order_by(Post.created_at.asc()).limit(1).scalar()
+    pinned = db.query(func.sum(pin_expr)).filter(Post.is_pinned == True).scalar()
+    generations = db.query(func.sum(FeedGeneration.generation))
+    if department and department != "ALL":
+        generations = generations.filter(FeedGeneration.department == department)
+    return (latest, generations.scalar() or 0, oldest, pinned or 0)
+
 def get_post(db: Session, post_id: int):
     return db.query(Post).filter(Post.id == post_id).first()
 
@@ -30,6 +188,95 @@ def delete_post(db: Session, post_id: int):
     # For now, simplistic delete.
     db_post = db.query(Post).filter(Post.id == post_id).first()
     if db_post:
+        db.query(PostTag).filter(PostTag.post_id == post_id).delete(synchronize_session=False)
         db.delete(db_post)
+        bump_feed_generation(db, db_post.department)
         db.commit()
     return db_post
+
+# Keyset (cursor) pagination for the feed
+
+def effective_pin_expr():
+    """
+    1 for posts that are effectively pinned, 0 otherwise.
+
+    A post is "effectively pinned" if is_pinned=True AND (pinned_until IS NULL OR pinned_until > now).
+    Using func.now() avoids python/db timezone mismatches.
+    """
+    db_now = func.now()
+    return case(
+        (
+            (Post.is_pinned == True) &
+            ((Post.pinned_until == None) | (Post.pinned_until > db_now)),
+            1
+        ),
+        else_=0
+    )
+
+
+def encode_feed_cursor(pinned: int, created_at: datetime, post_id: int) -> str:
+    """
+    Build an opaque cursor pointing just past the given feed row.
+    """
+    raw = json.dumps([int(pinned), created_at.isoformat(), post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_feed_cursor(cursor: str):
+    """
+    Parse a cursor from encode_feed_cursor into (pinned, created_at, id).
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        pinned, created_at, post_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return int(pinned), datetime.fromisoformat(created_at), int(post_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def get_feed_page(query, limit: int, cursor: Optional[str] = None):
+    """
+    One sort=new page as (post, pinned) pairs: effectively pinned posts
+    first, then the rest, each newest first, resuming after the cursor.
+
+    Each bucket is its own query ordered by (created_at, id) alone, so
+    ix_posts_is_pinned_created_at_id / ix_posts_created_at_id (or the
+    department variant) supply both the seek and the order. A single
+    ORDER BY pin DESC, created_at DESC would sort the whole filtered set.
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    newest_first = (Post.created_at.desc(), Post.id.desc())
+    after = None
+    in_pinned_bucket = True
+    if cursor:
+        pinned, created_at, post_id = decode_feed_cursor(cursor)
+        # Bound on created_at alone first, so it is an index range seek
+        after = and_(
+            Post.created_at <= created_at,
+            or_(Post.created_at < created_at, Post.id < post_id)
+        )
+        in_pinned_bucket = bool(pinned)
+
+    rows = []
+    if in_pinned_bucket:
+        pinned_posts = query.filter(
+            Post.is_pinned == True,
+            (Post.pinned_until == None) | (Post.pinned_until > func.now())
+        )
+        if after is not None:
+            pinned_posts = pinned_posts.filter(after)
+        rows = [(post, 1) for post in pinned_posts.order_by(*newest_first).limit(limit).all()]
+        # The unpinned bucket is read from its top
+        after = None
+
+    if len(rows) < limit:
+        rest = query.filter(effective_pin_expr() == 0)
+        if after is not None:
+            rest = rest.filter(after)
+        rows += [(post, 0) for post in rest.order_by(*newest_first).limit(limit - len(rows)).all()]
+    return rows
@@ -1,5 +1,6 @@
+from typing import Dict, Iterable, List
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, literal
 from app.models.reaction import Reaction
 
 def toggle_reaction(db: Session, user_id: int, emoji: str, target_type: str, target_id: int):
@@ -35,27 +36,25 @@ def toggle_reaction(db: Session, user_id: int, emoji: str, target_type: str, tar
     db.commit()
     return new_reaction
 
-def get_reaction_counts(db: Session, target_type: str, target_id: int, user_id: int = None):
-    # Group by emoji
-    query = db.query(Reaction.emoji, func.count(Reaction.id))
-    if target_type == 'post':
-        query = query.filter(Reaction.post_id == target_id)
-    else:
-        query = query.filter(Reaction.comment_id == target_id)
-    
-    counts = query.group_by(Reaction.emoji).all()
-    
-    # Check user reactions
-    user_reactions = set()
-    if user_id:
-        u_query = db.query(Reaction.emoji).filter(Reaction.user_id == user_id)
-        if target_type == 'post':
-            u_query = u_query.filter(Reaction.post_id == target_id)
-        else:
-            u_query = u_query.filter(Reaction.comment_id == target_id)
-        user_reactions = {r[0] for r in u_query.all()}
+def get_reaction_counts_batch(db: Session, target_type: str, target_ids: Iterable[int], user_id: int = None) -> Dict[int, List[dict]]:
+    """
+    Emoji counts (and whether user_id reacted) for many posts or comments in
+    one grouped query, keyed by target id. Targets without reactions are absent.
+    """
+    ids = list(set(target_ids))
+    if not ids:
+        return {}
+    column = Reaction.post_id if target_type == 'post' else Reaction.comment_id
+
+    mine = func.sum(case((Reaction.user_id == user_id, 1), else_=0)) if user_id else literal(0)
+    rows = db.query(column, Reaction.emoji, func.count(Reaction.id), mine)\
+        .filter(column.in_(ids))\
+        .group_by(column, Reaction.emoji)\
+        .all()
 
-    return [
-        {"emoji": emoji, "count": count, "user_reacted": emoji in user_reactions}
-        for emoji, count in counts
-    ]
+    counts: Dict[int, List[dict]] = {}
+    for target_id, emoji, count, reacted in rows:
+        counts.setdefault(target_id, []).append(
+            {"emoji": emoji, "count": count, "user_reacted": bool(reacted)}
+        )
+    return counts
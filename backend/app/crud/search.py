@@ -0,0 +1,91 @@
+import re
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db.search_index import SEARCH_VECTOR_COLUMN
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+# Rank from the stored search_vector columns, then snippet only the page being
+# returned (ts_headline is expensive)
+POSTGRES_SEARCH = text(f"""
+    WITH q AS (SELECT websearch_to_tsquery('english', :q) AS query),
+    hits AS (
+        SELECT 'post' AS type, p.id AS id, p.id AS post_id,
+               ts_rank(p.{SEARCH_VECTOR_COLUMN}, q.query) AS rank, p.created_at AS created_at
+        FROM posts p, q
+        WHERE p.{SEARCH_VECTOR_COLUMN} @@ q.query
+        UNION ALL
+        SELECT 'comment', c.id, c.post_id,
+               ts_rank(c.{SEARCH_VECTOR_COLUMN}, q.query), c.created_at
+        FROM comments c, q
+        WHERE c.{SEARCH_VECTOR_COLUMN} @@ q.query
+        ORDER BY rank DESC, created_at DESC
+        LIMIT :limit OFFSET :skip
+    )
+    SELECT h.type, h.id, h.post_id, p.title,
+           ts_headline('english', CASE WHEN h.type = 'post' THEN p.content ELSE c.content END, q.query,
+                       'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=1, MaxWords=24, MinWords=8') AS snippet,
+           h.rank, h.created_at
+    FROM hits h
+    JOIN posts p ON p.id = h.post_id
+    LEFT JOIN comments c ON h.type = 'comment' AND c.id = h.id,
+    q
+    ORDER BY h.rank DESC, h.created_at DESC
+""")
+
+# bm25() is lower-is-better; negate so both dialects return higher-is-better ranks
+SQLITE_SEARCH = text(f"""
+    WITH hits AS (
+        SELECT 'post' AS type, posts_fts.rowid AS id, posts_fts.rowid AS post_id,
+               -bm25(posts_fts) AS rank,
+               snippet(posts_fts, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 16) AS snippet
+        FROM posts_fts WHERE posts_fts MATCH :q
+        UNION ALL
+        SELECT 'comment', c.id, c.post_id,
+               -bm25(comments_fts),
+               snippet(comments_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 16)
+        FROM comments_fts JOIN comments c ON c.id = comments_fts.rowid
+        WHERE comments_fts MATCH :q
+    )
+    SELECT h.type, h.id, h.post_id, p.title, h.snippet, h.rank,
+           CASE WHEN h.type = 'post' THEN p.created_at ELSE c.created_at END AS created_at
+    FROM hits h
+    JOIN posts p ON p.id = h.post_id
+    LEFT JOIN comments c ON h.type = 'comment' AND c.id = h.id
+    ORDER BY h.rank DESC, created_at DESC
+    LIMIT :limit OFFSET :skip
+""")
+
+def to_fts5_query(q: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match, the last
+    one as a prefix (search-as-you-type).
+    """
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def search(db: Session, q: str, skip: int = 0, limit: int = 20) -> List[dict]:
+    """
+    Ranked full-text search over post title/content/tags and comment content.
+
+    Raises:
+        NotImplementedError: for database backends without a search index
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement, query = POSTGRES_SEARCH, q
+    elif dialect == "sqlite":
+        statement, query = SQLITE_SEARCH, to_fts5_query(q)
+        if not query:
+            return []
+    else:
+        raise NotImplementedError(f"Full-text search is not available for {dialect}")
+
+    rows = db.execute(statement, {"q": query, "skip": skip, "limit": limit}).mappings().all()
+    return [dict(row) for row in rows]
@@ -0,0 +1,73 @@
+from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.tag import Tag, PostTag
+from app.models.post import Post
+
+def parse_tags(tags: Optional[str]) -> List[str]:
+    """
+    Split a comma separated tag string into unique normalized names (order kept).
+    """
+    names = []
+    for raw in (tags or "").split(","):
+        name = raw.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def get_or_create_tags(db: Session, names: List[str]) -> List[Tag]:
+    if not names:
+        return []
+    existing = {t.name: t for t in db.query(Tag).filter(Tag.name.in_(names)).all()}
+    for name in names:
+        if name in existing:
+            continue
+        # Savepoint so a concurrent insert of the same tag doesn't abort the outer transaction
+        try:
+            with db.begin_nested():
+                tag = Tag(name=name)
+                db.add(tag)
+            existing[name] = tag
+        except IntegrityError:
+            existing[name] = db.query(Tag).filter(Tag.name == name).one()
+    return [existing[name] for name in names]
+
+def set_post_tags(db: Session, post_id: int, tags: Optional[str]) -> None:
+    """
+    Replace the post's tag links with the tags in the comma separated string.
+    Does not commit.
+    """
+    db.query(PostTag).filter(PostTag.post_id == post_id).delete(synchronize_session=False)
+    for tag in get_or_create_tags(db, parse_tags(tags)):
+        db.add(PostTag(post_id=post_id, tag_id=tag.id))
+
+def filter_by_tags(query, names: List[str], match_all: bool = False):
+    """
+    Restrict a Post query to posts carrying any (or all) of the given tag names.
+    Resolves through ix_post_tags_tag_id_post_id instead of scanning posts.tags.
+    """
+    matching = select(PostTag.post_id)\
+        .join(Tag, Tag.id == PostTag.tag_id)\
+        .where(Tag.name.in_(names))
+    if match_all:
+        matching = matching.group_by(PostTag.post_id)\
+            .having(func.count(PostTag.tag_id) == len(names))
+    return query.filter(Post.id.in_(matching))
+
+def backfill_post_tags(db: Session, batch_size: int = 500) -> int:
+    """
+    Populate post_tags from the legacy comma separated posts.tags column.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        batch = db.query(Post.id, Post.tags).filter(Post.id > last_id).order_by(Post.id).limit(batch_size).all()
+        if not batch:
+            break
+        for post_id, tags in batch:
+            set_post_tags(db, post_id, tags)
+        db.commit()
+        updated += len(batch)
+        last_id = batch[-1][0]
+    return updated
@@ -0,0 +1,147 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.vote import Vote
+from app.models.post import Post
+from app.models.comment import Comment
+from app.crud.post import hot_score_after_change
+from app.crud.reaction import get_reaction_counts_batch
+from app.core.counter_buffer import counter_buffer
+
+def get_user_votes(db: Session, user_id: Optional[int], target_type: str, target_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    The user's vote_type for each voted target, in one query:
+    WHERE user_id = ? AND post_id/comment_id IN (...).
+    Served by the unique (user_id, post_id) / (user_id, comment_id) indexes.
+    """
+    ids = list(set(target_ids))
+    if not user_id or not ids:
+        return {}
+    column = Vote.post_id if target_type == 'post' else Vote.comment_id
+    rows = db.query(column, Vote.vote_type)\
+        .filter(Vote.user_id == user_id, column.in_(ids), Vote.vote_type != 0)\
+        .all()
+    return {target_id: vote_type for target_id, vote_type in rows}
+
+
+def get_vote_state(db: Session, user_id: Optional[int], post_ids: List[int], comment_ids: List[int]) -> dict:
+    """
+    Counters, reactions and the user's vote for a page of posts and comments,
+    keyed by id. Set-based: one query per table for counters, votes and
+    reaction tallies, however many targets. Missing targets are left out.
+    """
+    state = {"posts": {}, "comments": {}}
+    if post_ids:
+        votes = get_user_votes(db, user_id, "post", post_ids)
+        reactions = get_reaction_counts_batch(db, "post", post_ids, user_id)
+        rows = db.query(Post.id, Post.upvotes, Post.downvotes, Post.comments_count, Post.share_count)\
+            .filter(Post.id.in_(set(post_ids))).all()
+        for post_id, upvotes, downvotes, comments_count, share_count in rows:
+            state["posts"][post_id] = {
+                "upvotes": upvotes or 0,
+                "downvotes": downvotes or 0,
+                "comments_count": comments_count or 0,
+                "share_count": (share_count or 0) + counter_buffer.pending(Post, post_id, "share_count"),
+                "user_vote": votes.get(post_id),
+                "reactions": reactions.get(post_id, []),
+            }
+    if comment_ids:
+        votes = get_user_votes(db, user_id, "comment", comment_ids)
+        reactions = get_reaction_counts_batch(db, "comment", comment_ids, user_id)
+        rows = db.query(Comment.id, Comment.upvotes, Comment.downvotes)\
+            .filter(Comment.id.in_(set(comment_ids))).all()
+        for comment_id, upvotes, downvotes in rows:
+            state["comments"][comment_id] = {
+                "upvotes": upvotes or 0,
+                "downvotes": downvotes or 0,
+                "user_vote": votes.get(comment_id),
+                "reactions": reactions.get(comment_id, []),
+            }
+    return state
+
+class TargetNotFound(Exception):
+    pass
+
+def _upsert_insert(db: AsyncSession):
+    # INSERT ... ON CONFLICT is dialect-specific in SQLAlchemy
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+async def apply_vote(db: AsyncSession, user_id: int, target_type: str, target_id: int, vote_type: int) -> dict:
+    """
+    Toggle the user's vote on a post or comment in two statements (caller
+    commits):
+
+    1. INSERT ... ON CONFLICT DO UPDATE: a new vote is inserted; voting the
+       same way again retracts it (vote_type 0); voting the other way
+       switches it. RETURNING gives the old and new vote_type.
+    2. UPDATE ... SET upvotes = upvotes + :d ... RETURNING for the cached
+       counters (and a post's hot_score and updated_at), so concurrent votes
+       can't lose updates.
+
+    Returns {"status", "upvotes", "downvotes", "author_id", "post_id"}.
+    Raises TargetNotFound if the post/comment doesn't exist.
+    """
+    is_post = target_type == "post"
+    model = Post if is_post else Comment
+    column = Vote.post_id if is_post else Vote.comment_id
+
+    stmt = _upsert_insert(db)(Vote).values(
+        user_id=user_id,
+        post_id=target_id if is_post else None,
+        comment_id=None if is_post else target_id,
+        vote_type=vote_type,
+        previous_vote_type=0
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vote.user_id, column],
+        # Matches the partial unique indexes db_migration_profile_voting.py
+        # creates (WHERE post_id/comment_id IS NOT NULL) as well as the
+        # model's full unique constraints
+        index_where=column.isnot(None),
+        # Column references here read the existing row
+        set_={
+            "vote_type": case((Vote.vote_type == vote_type, 0), else_=vote_type),
+            "previous_vote_type": Vote.vote_type,
+        }
+    ).returning(Vote.vote_type, Vote.previous_vote_type)
+    try:
+        new, old = (await db.execute(stmt)).one()
+    except IntegrityError:
+        # Foreign key: the target doesn't exist (PostgreSQL)
+        raise TargetNotFound()
+
+    upvotes_delta = (new == 1) - (old == 1)
+    downvotes_delta = (new == -1) - (old == -1)
+    values = {
+        "upvotes": func.coalesce(model.upvotes, 0) + upvotes_delta,
+        "downvotes": func.coalesce(model.downvotes, 0) + downvotes_delta,
+        "updated_at": datetime.utcnow(),
+    }
+    if is_post:
+        values["hot_score"] = hot_score_after_change(upvotes_delta, downvotes_delta)
+    owner = model.author_id if is_post else model.post_id
+    counters = (await db.execute(
+        update(model)
+        .where(model.id == target_id)
+        .values(**values)
+        .returning(model.upvotes, model.downvotes, owner)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if counters is None:
+        raise TargetNotFound()
+
+    status = "removed" if new == 0 else "added" if old == 0 else "switched"
+    upvotes, downvotes, owner_id = counters
+    return {
+        "status": status,
+        "upvotes": upvotes,
+        "downvotes": downvotes,
+        "author_id": owner_id if is_post else None,
+        "post_id": target_id if is_post else owner_id,
+    }
@@ -0,0 +1,149 @@
+"""
+Connection pool instrumentation.
+
+Records, per engine, how long each pool checkout took (including any wait
+for a free connection), checkout timeouts, and current/peak in-use and
+overflow counts, so pool exhaustion shows up as numbers instead of
+mysterious request latency. Stats are per worker process.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Recent checkout latencies kept for percentiles
+LATENCY_WINDOW = 1000
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent_waits = deque(maxlen=LATENCY_WINDOW)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._recent_waits.append(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def on_checkout(self, *args) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_checkin(self, *args) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def on_connect(self, *args) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_invalidate(self, *args) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool: Optional[Pool] = None) -> dict:
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkout_ms": {
+                    "avg": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": round(_percentile(waits, 0.50) * 1000, 3),
+                    "p95": round(_percentile(waits, 0.95) * 1000, 3),
+                    "p99": round(_percentile(waits, 0.99) * 1000, 3),
+                    "max": round(self.max_wait * 1000, 3),
+                },
+            }
+        if pool is not None:
+            data["pool_class"] = type(pool).__name__
+            # QueuePool-family only; other pools don't track these
+            for attr in ("size", "checkedout", "overflow", "checkedin"):
+                method = getattr(pool, attr, None)
+                if callable(method):
+                    data[attr] = method()
+            if "overflow" in data:
+                # QueuePool reports unused capacity as a negative overflow
+                data["overflow"] = max(data["overflow"], 0)
+        return data
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * q), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+_registry: Dict[str, tuple] = {}
+
+
+def instrument_pool(engine: Engine, name: str) -> PoolStats:
+    """
+    Attach stats to an engine's pool: checkout/checkin/connect/invalidate
+    listeners, plus a timing wrapper around engine.raw_connection() (the call
+    that blocks in pool.connect() when the pool is exhausted and raises
+    TimeoutError on pool_timeout). Both live on the engine, so they survive
+    engine.dispose() replacing the pool. Pass async_engine.sync_engine for
+    async engines.
+    """
+    stats = PoolStats(name)
+    # Pool events registered on an Engine carry over to every pool it creates
+    event.listen(engine, "checkout", stats.on_checkout)
+    event.listen(engine, "checkin", stats.on_checkin)
+    event.listen(engine, "connect", stats.on_connect)
+    event.listen(engine, "invalidate", stats.on_invalidate)
+
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        finally:
+            stats.record_wait(time.perf_counter() - start)
+
+    engine.raw_connection = timed_raw_connection
+    _registry[name] = (engine, stats)
+    return stats
+
+
+def get_pool_stats() -> dict:
+    """
+    Snapshot of every instrumented pool in this worker.
+    """
+    return {
+        "pid": os.getpid(),
+        "pools": {name: stats.snapshot(engine.pool) for name, (engine, stats) in _registry.items()},
+    }
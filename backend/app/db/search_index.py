@@ -0,0 +1,117 @@
+"""
+Full-text search index DDL.
+
+PostgreSQL: stored generated tsvector columns (posts.search_vector,
+comments.search_vector) with GIN indexes. PostgreSQL recomputes the column
+only when its source columns are written, so ranking reads the stored
+vector instead of re-parsing every hit's text. The columns live outside the
+ORM models, which keep working on SQLite.
+
+SQLite: external-content FTS5 tables (posts_fts, comments_fts) kept in sync
+by triggers on the base tables.
+
+All statements are idempotent. Adding the generated columns rewrites both
+tables, so they run from scripts/add_search_vector_columns.py before a
+deploy, never in worker startup; create_tables() only checks they exist.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+POST_TSVECTOR = (
+    "to_tsvector('english', coalesce(title, '') || ' ' || "
+    "coalesce(content, '') || ' ' || coalesce(tags, ''))"
+)
+COMMENT_TSVECTOR = "to_tsvector('english', coalesce(content, ''))"
+
+POSTGRES_DDL = [
+    f"ALTER TABLE posts ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector GENERATED ALWAYS AS ({POST_TSVECTOR}) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN ({SEARCH_VECTOR_COLUMN})",
+    f"ALTER TABLE comments ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector GENERATED ALWAYS AS ({COMMENT_TSVECTOR}) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_comments_search_vector ON comments USING GIN ({SEARCH_VECTOR_COLUMN})",
+    # Superseded expression indexes
+    "DROP INDEX IF EXISTS ix_posts_fts",
+    "DROP INDEX IF EXISTS ix_comments_fts",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, content, tags, content='posts', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content, tags) VALUES ('delete', old.id, old.title, old.content, old.tags);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, content, tags ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content, tags) VALUES ('delete', old.id, old.title, old.content, old.tags);
+        INSERT INTO posts_fts(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+    END""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(content, content='comments', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+
+def search_indexes_exist(engine: Engine) -> bool:
+    """
+    Whether the full-text indexes for the engine's dialect are in place
+    (always True for dialects without search support).
+    """
+    dialect = engine.dialect.name
+    inspector = inspect(engine)
+    if dialect == "postgresql":
+        return all(
+            SEARCH_VECTOR_COLUMN in {c["name"] for c in inspector.get_columns(table)}
+            for table in ("posts", "comments")
+        )
+    if dialect == "sqlite":
+        return {"posts_fts", "comments_fts"} <= set(inspector.get_table_names())
+    return True
+
+
+def check_search_indexes(engine: Engine) -> None:
+    """
+    Warn when the migration hasn't been run; search fails until it is.
+    """
+    if not search_indexes_exist(engine):
+        logger.warning(
+            "Full-text search indexes are missing; run scripts/add_search_vector_columns.py"
+        )
+
+
+def create_search_indexes(engine: Engine) -> None:
+    """
+    Create the full-text indexes for the engine's dialect (no-op for others).
+    """
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            for stmt in POSTGRES_DDL:
+                conn.execute(text(stmt))
+        elif dialect == "sqlite":
+            existing = {
+                row[0] for row in conn.execute(text(
+                    "SELECT name FROM sqlite_master WHERE name IN ('posts_fts', 'comments_fts')"
+                ))
+            }
+            for stmt in SQLITE_DDL:
+                conn.execute(text(stmt))
+            # Index rows that predate the FTS tables
+            if "posts_fts" not in existing:
+                conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+            if "comments_fts" not in existing:
+                conn.execute(text("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')"))
+        conn.commit()
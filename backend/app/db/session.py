@@ -4,12 +4,17 @@ Database session management with proper lifecycle handling.
 This module provides:
 - SQLAlchemy engine with connection pooling
 - Session factory for database transactions
+- Async engine/session factory for `async def` routes (asyncpg / aiosqlite)
 - Base class for ORM models
-- Database dependency for FastAPI routes
+- Database dependencies for FastAPI routes
 """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from typing import Generator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncGenerator, Generator
+
+from app.core.config import settings
+from app.db.pool_stats import instrument_pool
 
 # Create Base for models (no engine binding here!)
 Base = declarative_base()
@@ -17,6 +22,24 @@ Base = declarative_base()
 # Global engine and session factory (will be initialized in startup event)
 engine = None
 SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
+
+
+def _pool_options(database_url: str) -> dict:
+    """
+    Engine pool options from settings (app/core/config.py).
+    """
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if "sqlite" not in database_url:
+        # SQLite uses its own pool classes that don't take sizing arguments
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
 
 
 def init_db(database_url: str) -> None:
@@ -37,11 +60,11 @@ def init_db(database_url: str) -> None:
     # Create engine with connection pooling
     engine = create_engine(
         database_url,
-        pool_pre_ping=True,
-        # pool_size/max_overflow are ignored by SQLite or can be omitted if causing issues
         echo=False,
-        connect_args=connect_args
+        connect_args=connect_args,
+        **_pool_options(database_url)
     )
+    instrument_pool(engine, "sync")
     
     # Create session factory
     SessionLocal = sessionmaker(
@@ -51,6 +74,47 @@ def init_db(database_url: str) -> None:
     )
 
 
+def to_async_url(database_url: str) -> str:
+    """
+    Map a sync DATABASE_URL to its async driver (asyncpg / aiosqlite).
+    """
+    scheme, sep, rest = database_url.partition("://")
+    base = scheme.split("+")[0]
+    if base in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if base == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    raise ValueError(f"No async driver configured for '{scheme}'")
+
+
+def init_async_db(database_url: str) -> None:
+    """
+    Initialize the async engine and session factory.
+    
+    Used by `async def` routes so DB round-trips don't block the event loop
+    (and every WebSocket on the worker). Call in FastAPI startup after init_db().
+    
+    Args:
+        database_url: Same DATABASE_URL as init_db(); the driver is swapped
+    """
+    global async_engine, AsyncSessionLocal
+
+    async_engine = create_async_engine(
+        to_async_url(database_url),
+        echo=False,
+        **_pool_options(database_url)
+    )
+    instrument_pool(async_engine.sync_engine, "async")
+
+    # expire_on_commit=False: attributes stay readable after commit without
+    # an implicit (and in async, illegal) lazy refresh
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
 def create_tables() -> None:
     """
     Create all database tables.
@@ -64,10 +128,16 @@ def create_tables() -> None:
     from app.models import comment  # noqa: F401
     from app.models import reaction  # noqa: F401
     from app.models import audit_log # noqa: F401
+    from app.models import tag  # noqa: F401
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
+    # Full-text search indexes (GIN / FTS5) are outside the ORM metadata and
+    # created by a migration script; startup only checks for them
+    from app.db.search_index import check_search_indexes
+    check_search_indexes(engine)
+
 
 def close_db() -> None:
     """
@@ -75,9 +145,24 @@ def close_db() -> None:
     
     This should be called in FastAPI shutdown event.
     """
-    global engine
+    global engine, SessionLocal
     if engine:
         engine.dispose()
+    engine = None
+    SessionLocal = None
+
+
+async def close_async_db() -> None:
+    """
+    Close async database connections.
+    
+    This should be called in FastAPI shutdown event.
+    """
+    global async_engine, AsyncSessionLocal
+    if async_engine:
+        await async_engine.dispose()
+    async_engine = None
+    AsyncSessionLocal = None
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -100,3 +185,22 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency for `async def` routes.
+    
+    Usage:
+        @router.post("/votes")
+        async def cast_vote(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Vote))
+    
+    Yields:
+        Async database session
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database not initialized. Call init_async_db() first.")
+
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -14,7 +14,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.db.session import init_db, create_tables, close_db
+from app.db.session import init_db, init_async_db, create_tables, close_db, close_async_db
+from app.core.backplane import create_backplane
+from app.core.socket_manager import manager
+from app.core.counter_updates import counter_updates
+from app.core.counter_buffer import counter_buffer
 from app.api import auth
 
 # Configure logging
@@ -31,8 +35,10 @@ async def lifespan(app: FastAPI):
     Application lifespan manager.
     
     Handles startup and shutdown events:
-    - Startup: Initialize database connection and create tables
-    - Shutdown: Close database connections
+    - Startup: Initialize database connection, create tables, start the
+      real-time backplane
+    - Shutdown: Stop the backplane, close WebSockets, flush buffered
+      counters and close database connections
     """
     # Startup
     logger.info("Starting application...")
@@ -42,11 +48,18 @@ async def lifespan(app: FastAPI):
     try:
         # Initialize database
         init_db(settings.DATABASE_URL)
-        logger.info("Database engine initialized")
+        init_async_db(settings.DATABASE_URL)
+        logger.info("Database engines initialized")
         
         # Create tables
         create_tables()
         logger.info("Database tables created/verified")
+
+        # Real-time fan-out across workers
+        await manager.start(create_backplane(settings.DATABASE_URL))
+        counter_updates.start()
+        # Write-behind share/view counters
+        counter_buffer.start()
         
         logger.info("Application startup complete")
     except Exception as e:
@@ -57,7 +70,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down application...")
+    await counter_updates.stop()
+    await manager.stop()
+    # Write out buffered counters while the database is still open
+    await counter_buffer.stop()
     close_db()
+    await close_async_db()
     logger.info("Database connections closed")
     logger.info("Application shutdown complete")
 
@@ -109,20 +127,20 @@ app.include_router(comments.router, prefix="/posts/{post_id}/comments", tags=["c
 app.include_router(reactions.router, prefix="/reactions", tags=["reactions"])
 app.include_router(votes.router, prefix="/votes", tags=["votes"])
 
-from fastapi import WebSocket, WebSocketDisconnect
-from app.core.socket_manager import manager
-
-@app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: int):
-    await manager.connect(websocket, client_id)
-    try:
-        while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, client_id)
+# Real-time (authenticated WebSocket)
+from app.api import realtime
+app.include_router(realtime.router, tags=["realtime"])
 
 # Notifications
 # Notifications
 from app.api import notifications, news
 app.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 app.include_router(news.router, prefix="/news", tags=["news"])
+
+# Search
+from app.api import search
+app.include_router(search.router, prefix="/search", tags=["search"])
+
+# Metrics (admin only)
+from app.api import metrics
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -9,6 +9,7 @@ class Comment(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # ETag version marker
     is_anonymous = Column(Boolean, default=False)
     
     # Vote Counts (Cached)
@@ -16,9 +17,16 @@ class Comment(Base):
     downvotes = Column(Integer, default=0)
     
     # Relationships
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
+
+    # Materialized path: fixed-width ids from the root down to this comment
+    # (see app.crud.comment.path_segment). A subtree is one range on
+    # (post_id, path), already in depth-first order.
+    path = Column(String, nullable=True)
+    depth = Column(Integer, default=0)  # 0 for top-level comments
+    descendant_count = Column(Integer, default=0)  # Replies at any depth (cached)
     
     post = relationship("Post", backref="comments")
     author = relationship("User", backref="comments")
@@ -27,6 +35,15 @@ class Comment(Base):
     # Reactions relationship
     reactions = relationship("Reaction", backref="comment", foreign_keys="Reaction.comment_id")
 
+    __table_args__ = (
+        # Keyset pages of top-level comments: WHERE post_id = ? AND parent_id IS NULL ORDER BY id
+        Index('ix_comments_post_id_parent_id_id', 'post_id', 'parent_id', 'id'),
+        # Replies of a set of comments (first K each, reply counts, "load more")
+        Index('ix_comments_parent_id_id', 'parent_id', 'id'),
+        # Subtree range scans
+        Index('ix_comments_post_id_path', 'post_id', 'path'),
+    )
+
 # Add reactions relationship to Post as well
 from app.models.post import Post
 Post.reactions = relationship("Reaction", backref="post", foreign_keys="Reaction.post_id")
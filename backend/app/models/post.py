@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -10,6 +10,7 @@ class Post(Base):
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True) # ETag version marker
     
     # Ghost Mode
     is_anonymous = Column(Boolean, default=False)
@@ -19,6 +20,10 @@ class Post(Base):
     downvotes = Column(Integer, default=0)
     comments_count = Column(Integer, default=0)
     share_count = Column(Integer, default=0)  # Track share popularity
+    view_count = Column(Integer, default=0)  # Written behind (app.core.counter_buffer)
+
+    # Time-decayed rank for sort=hot (maintained by app.crud.post.refresh_hot_score)
+    hot_score = Column(Float, default=0.0, index=True)
     
     # Author (optional for now, can be linked to User if we enforce auth)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -30,3 +35,20 @@ class Post(Base):
     type = Column(String, default="discussion") # discussion, question, announcement
     is_pinned = Column(Boolean, default=False)
     pinned_until = Column(DateTime, nullable=True)
+
+    # Keyset pagination: (created_at, id) seeks are index range scans,
+    # optionally narrowed by department.
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_department_created_at_id", "department", "created_at", "id"),
+        # The (small) pinned bucket of the feed, newest first
+        Index("ix_posts_is_pinned_created_at_id", "is_pinned", "created_at", "id"),
+    )
+
+class FeedGeneration(Base):
+    __tablename__ = "feed_generations"
+
+    # Bumped on every post insert/delete in the department; part of the feed
+    # ETag version, since a deleted row leaves no updated_at behind
+    department = Column(String, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
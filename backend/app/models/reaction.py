@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -24,4 +24,7 @@ class Reaction(Base):
     __table_args__ = (
         UniqueConstraint('user_id', 'post_id', 'emoji', name='unique_user_post_emoji'),
         UniqueConstraint('user_id', 'comment_id', 'emoji', name='unique_user_comment_emoji'),
+        # Per-target emoji tallies (GROUP BY target, emoji) straight from the index
+        Index('ix_reactions_post_id_emoji', 'post_id', 'emoji'),
+        Index('ix_reactions_comment_id_emoji', 'comment_id', 'emoji'),
     )
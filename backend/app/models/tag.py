@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.db.session import Base
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False) # Normalized: stripped, lowercase
+
+class PostTag(Base):
+    __tablename__ = "post_tags"
+
+    # PK (post_id, tag_id) serves "tags of a post"; the reverse index serves tag filters
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_post_tags_tag_id_post_id", "tag_id", "post_id"),
+    )
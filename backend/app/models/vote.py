@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 import enum
@@ -14,7 +14,9 @@ class Vote(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=True)
     comment_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
-    vote_type = Column(Integer, nullable=False) # 1 for upvote, -1 for downvote
+    vote_type = Column(Integer, nullable=False) # 1 for upvote, -1 for downvote, 0 for retracted
+    # vote_type before the last change, so the vote upsert can RETURN the transition
+    previous_vote_type = Column(Integer, default=0)
 
     # Relationships
     user = relationship("User", backref="votes")
@@ -22,4 +24,8 @@ class Vote(Base):
     __table_args__ = (
         UniqueConstraint('user_id', 'post_id', name='unique_user_post_vote'),
         UniqueConstraint('user_id', 'comment_id', name='unique_user_comment_vote'),
+        # The unique constraints above serve "my votes on these targets";
+        # these serve per-target lookups (tallies, cleanup on delete)
+        Index('ix_votes_post_id', 'post_id'),
+        Index('ix_votes_comment_id', 'comment_id'),
     )
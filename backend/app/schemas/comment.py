@@ -22,6 +22,11 @@ class Comment(CommentBase):
     
     # We will compute these or fetch them
     replies: List['Comment'] = []
+    # Direct replies in total; fewer may be included in a page
+    reply_count: int = 0
+    depth: int = 0
+    # Replies at any depth
+    descendant_count: int = 0
     reactions: List[ReactionResponse] = []
     
     # Vote info
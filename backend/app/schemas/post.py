@@ -1,7 +1,7 @@
 from pydantic import BaseModel, model_validator
 from datetime import datetime
 from typing import Optional
-from app.schemas.user import UserBasic
+from app.schemas.user import UserBasic, UserBasicResponse
 
 
 class PostBase(BaseModel):
@@ -34,6 +34,7 @@ class Post(PostBase):
     downvotes: int = 0
     comments_count: int = 0
     share_count: int = 0  # Track share popularity
+    view_count: int = 0
     user_vote: Optional[int] = None # 1, -1, or None (if not voted)
     
     # Validator removed to handle redaction in API (for Admin Unmasking)
@@ -41,3 +42,7 @@ class Post(PostBase):
 
     class Config:
         from_attributes = True
+
+class PostResponse(Post):
+    # Used by the fast list serializers (app.core.serialization)
+    author: Optional[UserBasicResponse] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class SearchResult(BaseModel):
+    type: str # 'post' or 'comment'
+    id: int
+    post_id: int
+    title: str # Title of the post (or of the comment's post)
+    snippet: Optional[str] = None # Matched text, terms wrapped in <mark></mark>
+    rank: float
+    created_at: Optional[datetime] = None
@@ -30,3 +30,8 @@ class UserBasic(BaseModel):
 
     class Config:
         from_attributes = True
+
+class UserBasicResponse(UserBasic):
+    # Output only: emails come from the DB (validated on write). Re-running the
+    # email validator for every author dominated feed serialization time.
+    email: str
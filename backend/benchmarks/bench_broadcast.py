@@ -0,0 +1,148 @@
+"""
+Broadcast cost vs audience size:
+- sequential send_json: the original manager, awaiting each socket in turn
+- queued, encode per socket: per-connection send queues, one json encode per recipient
+- queued, encode once: ConnectionManager as shipped, one encode per message
+
+Run from backend/:
+    python benchmarks/bench_broadcast.py [--sockets 1000 10000] [--rounds 20]
+
+Sockets are in-memory fakes, so this measures the server-side CPU spent per
+broadcast (encode + enqueue + hand-off to the socket), not network time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.socket_manager import ConnectionManager
+
+
+class PerSocketEncodingManager(ConnectionManager):
+    """Same queues and sender tasks, but encodes for every recipient like send_json did."""
+    async def broadcast(self, message: dict):
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                self._enqueue(connection, json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+
+class FakeWebSocket:
+    """Accepts frames instantly; signals once every socket has received the round."""
+    def __init__(self, counter):
+        self.counter = counter
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.counter.hit()
+
+    async def send_json(self, data: dict):
+        # What Starlette's WebSocket.send_json does before sending
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        self.counter.hit()
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class Counter:
+    def __init__(self, target: int):
+        self.target = target
+        self.count = 0
+        self.done = asyncio.Event()
+
+    def reset(self):
+        self.count = 0
+        self.done.clear()
+
+    def hit(self):
+        self.count += 1
+        if self.count >= self.target:
+            self.done.set()
+
+
+def make_message() -> dict:
+    # Shaped like the new_post event from app/api/posts.py
+    return {
+        "type": "new_post",
+        "data": {
+            "id": 12345, "title": "Mid-sem timetable released", "content": "Lorem ipsum dolor sit amet " * 20,
+            "department": "CSE", "type": "announcement", "created_at": datetime.utcnow().isoformat(),
+            "upvotes": 0, "downvotes": 0, "comments_count": 0, "share_count": 0,
+            "author": {"id": 7, "full_name": "Dept Office", "username": "cse-office", "email": "cse@campus.edu",
+                       "profile_photo_url": None, "role": "admin", "enrollment_number": None},
+            "author_id": 7, "is_anonymous": False, "tags": "academic,exams",
+        },
+    }
+
+
+async def run(n: int, rounds: int):
+    message = make_message()
+    counter = Counter(n)
+    sockets = [FakeWebSocket(counter) for _ in range(n)]
+
+    # Old path: sequential send_json, encoding once per socket
+    async def per_socket():
+        for ws in sockets:
+            await ws.send_json(message)
+
+    async def connect_all(manager):
+        for i, ws in enumerate(sockets):
+            await manager.connect(ws, i)
+        return manager
+
+    async def queued(manager):
+        async def fn():
+            await manager.broadcast(message)
+            await counter.done.wait()
+        return fn
+
+    per_socket_manager = await connect_all(PerSocketEncodingManager(queue_size=rounds + 1))
+    once_manager = await connect_all(ConnectionManager(queue_size=rounds + 1))
+    variants = (
+        ("sequential send_json", per_socket),
+        ("queued, encode per socket", await queued(per_socket_manager)),
+        ("queued, encode once", await queued(once_manager)),
+    )
+
+    results = []
+    for name, fn in variants:
+        counter.reset()
+        await fn()  # warm up
+        start = time.perf_counter()
+        for _ in range(rounds):
+            counter.reset()
+            await fn()
+        results.append((name, (time.perf_counter() - start) / rounds * 1e3))
+
+    for manager in (per_socket_manager, once_manager):
+        for connections in list(manager.active_connections.values()):
+            for connection in list(connections):
+                manager.disconnect(connection.websocket, connection.user_id)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sockets", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for n in args.sockets:
+        results = asyncio.run(run(n, args.rounds))
+        print(f"{n} sockets, {args.rounds} rounds")
+        for name, msec in results:
+            print(f"  {name:<28} {msec:8.2f} ms/broadcast  ({msec * 1e3 / n:.2f} µs/socket)")
+        saved = results[1][1] - results[2][1]
+        print(f"  encode-once saving: {saved:.2f} ms/broadcast ({saved / results[1][1]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
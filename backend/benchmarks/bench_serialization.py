@@ -0,0 +1,89 @@
+"""
+Serialization cost per feed request: FastAPI's response_model path vs the
+fast path in app.core.serialization.
+
+Run from backend/:
+    python benchmarks/bench_serialization.py [--posts 100] [--rounds 200]
+
+No database is needed; posts are plain objects shaped like ORM rows.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from pydantic import TypeAdapter
+
+from app.schemas.post import Post
+from app.core.serialization import POST_LIST, FastJSONResponse, to_jsonable
+
+
+def make_posts(n: int):
+    now = datetime.utcnow()
+    posts = []
+    for i in range(n):
+        author = SimpleNamespace(
+            id=i, email=f"user{i}@campus.edu", username=f"user{i}", full_name=f"User {i}",
+            profile_photo_url=None, role="student", enrollment_number=None,
+        )
+        posts.append(SimpleNamespace(
+            id=i, title=f"Post {i}", content="Lorem ipsum dolor sit amet " * 20,
+            is_pinned=False, pinned_until=None, department="CSE", type="discussion",
+            tags="academic,lab", is_anonymous=False, created_at=now - timedelta(minutes=i),
+            author_id=i, author=author, upvotes=i, downvotes=0, comments_count=3,
+            share_count=1, user_vote=None,
+        ))
+    return posts
+
+
+def fast_path(posts) -> bytes:
+    return POST_LIST.dump_json(POST_LIST.validate_python(posts, from_attributes=True))
+
+
+def timeit(fn, arg, rounds: int) -> float:
+    fn(arg)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(arg)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    adapter = TypeAdapter(List[Post])
+    cached_page = to_jsonable(POST_LIST, posts)
+
+    def response_model_path(objs):
+        # What FastAPI's serialize_response + JSONResponse do for response_model=List[Post]
+        value = adapter.validate_python(objs, from_attributes=True)
+        content = adapter.dump_python(value, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    results = [
+        ("response_model (validate + dict + json.dumps)", timeit(response_model_path, posts, args.rounds)),
+        ("fast path (PostResponse validate + dump_json)", timeit(fast_path, posts, args.rounds)),
+        ("cached page: stdlib json.dumps", timeit(lambda c: json.dumps(c).encode("utf-8"), cached_page, args.rounds)),
+        ("cached page: FastJSONResponse.render", timeit(FastJSONResponse(content=[]).render, cached_page, args.rounds)),
+    ]
+
+    print(f"{args.posts} posts per request, {args.rounds} rounds")
+    for name, usec in results:
+        print(f"  {name:<48} {usec:10.1f} µs/request")
+    saved = results[0][1] - results[1][1]
+    print(f"  CPU saved per uncached feed request: {saved:.1f} µs ({saved / results[0][1]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
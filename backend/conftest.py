@@ -0,0 +1,83 @@
+"""
+Shared pytest fixtures: the app against a throwaway SQLite database.
+"""
+import sys
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import app.db.session as db_session
+from app.main import app
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def client(database_url, monkeypatch):
+    """TestClient with the lifespan run, so engines and tables exist."""
+    monkeypatch.setattr(settings, "DATABASE_URL", database_url)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    session = db_session.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(client):
+    """Create a user and return Authorization headers for them."""
+    def make_user(email, role="student"):
+        session = db_session.SessionLocal()
+        session.add(User(email=email, username=email.split("@")[0], full_name="Test User", role=role))
+        session.commit()
+        session.close()
+        return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+    return make_user
+
+
+@pytest.fixture
+def make_post(client):
+    """Create a post through the API and return its id."""
+    def make_post(headers, title="Post", department="CSE", tags=None):
+        body = {"title": title, "content": "c", "department": department}
+        if tags is not None:
+            body["tags"] = tags
+        response = client.post("/posts/", json=body, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return make_post
+
+
+@pytest.fixture
+def recorded_statements(client):
+    """Context manager collecting the SQL the sync engine runs inside it."""
+    @contextmanager
+    def recorded_statements():
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db_session.engine, "before_cursor_execute", record)
+    return recorded_statements
@@ -0,0 +1,42 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from app.models.user import User  # noqa: F401 - registers the mapper for relationship("User")
+from app.crud.comment import rebuild_comment_paths
+from sqlalchemy import text, inspect
+
+def add_comment_paths():
+    print("🔄 Migrating: Adding materialized paths to comments table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        columns = [col['name'] for col in inspect(session.engine).get_columns('comments')]
+        with session.engine.connect() as conn:
+            if 'path' not in columns:
+                conn.execute(text("ALTER TABLE comments ADD COLUMN path VARCHAR"))
+            if 'depth' not in columns:
+                conn.execute(text("ALTER TABLE comments ADD COLUMN depth INTEGER DEFAULT 0"))
+            if 'descendant_count' not in columns:
+                conn.execute(text("ALTER TABLE comments ADD COLUMN descendant_count INTEGER DEFAULT 0"))
+            # Subtree range scans
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_comments_post_id_path ON comments (post_id, path)"))
+            conn.commit()
+        print("✅ path, depth and descendant_count columns ready.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+        return
+
+    # Backfill (also repairs paths if they ever drift from parent_id)
+    db = session.SessionLocal()
+    try:
+        count = rebuild_comment_paths(db)
+        print(f"✅ Backfilled paths for {count} comments.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    add_comment_paths()
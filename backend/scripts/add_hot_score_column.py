@@ -0,0 +1,37 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from app.models.user import User  # noqa: F401 - registers the mapper for relationship("User")
+from app.crud.post import recompute_hot_scores
+from sqlalchemy import text, inspect
+
+def add_hot_score_column():
+    print("🔄 Migrating: Adding hot_score column to posts table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        columns = [col['name'] for col in inspect(session.engine).get_columns('posts')]
+        with session.engine.connect() as conn:
+            if 'hot_score' not in columns:
+                conn.execute(text("ALTER TABLE posts ADD COLUMN hot_score FLOAT DEFAULT 0"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_hot_score ON posts (hot_score)"))
+            conn.commit()
+        print("✅ hot_score column and index ready.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+        return
+
+    # Backfill (also the way to re-rank everything after changing weights)
+    db = session.SessionLocal()
+    try:
+        count = recompute_hot_scores(db)
+        print(f"✅ Backfilled hot_score for {count} posts.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    add_hot_score_column()
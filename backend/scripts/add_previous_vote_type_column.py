@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text, inspect
+
+def add_previous_vote_type_column():
+    print("🔄 Migrating: Adding previous_vote_type column to votes table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        columns = [col['name'] for col in inspect(session.engine).get_columns('votes')]
+        with session.engine.connect() as conn:
+            if 'previous_vote_type' not in columns:
+                # Read back by the vote upsert's RETURNING clause
+                conn.execute(text("ALTER TABLE votes ADD COLUMN previous_vote_type INTEGER DEFAULT 0"))
+            conn.commit()
+        print("✅ Migration Successful: previous_vote_type column ready.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_previous_vote_type_column()
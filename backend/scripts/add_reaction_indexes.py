@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_reaction_indexes():
+    print("🔄 Migrating: Adding tally indexes to reactions table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            # Serve GROUP BY post_id/comment_id, emoji for batched reaction counts
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_reactions_post_id_emoji ON reactions (post_id, emoji)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_reactions_comment_id_emoji ON reactions (comment_id, emoji)"))
+            conn.commit()
+        print("✅ Migration Successful: Reaction indexes added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_reaction_indexes()
@@ -0,0 +1,23 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.db.search_index import create_search_indexes
+from app.core.config import settings
+
+def add_search_vector_columns():
+    print("🔄 Migrating: Adding full-text search indexes to posts and comments...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        # PostgreSQL: adding a stored generated column rewrites the table;
+        # run this before deploying. SQLite: FTS5 tables and triggers.
+        create_search_indexes(session.engine)
+        print("✅ Migration Successful: full-text search indexes ready.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_search_vector_columns()
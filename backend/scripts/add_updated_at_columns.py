@@ -0,0 +1,30 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text, inspect
+
+def add_updated_at_columns():
+    print("🔄 Migrating: Adding updated_at (ETag version) columns...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        inspector = inspect(session.engine)
+        with session.engine.connect() as conn:
+            for table in ("posts", "comments"):
+                columns = [col['name'] for col in inspector.get_columns(table)]
+                if 'updated_at' not in columns:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP"))
+                    conn.execute(text(f"UPDATE {table} SET updated_at = created_at"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_updated_at ON posts (updated_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_comments_post_id ON comments (post_id)"))
+            conn.commit()
+        print("✅ Migration Successful: updated_at columns added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_updated_at_columns()
@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text, inspect
+
+def add_view_count_column():
+    print("🔄 Migrating: Adding view_count column to posts table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        columns = [col['name'] for col in inspect(session.engine).get_columns('posts')]
+        with session.engine.connect() as conn:
+            if 'view_count' not in columns:
+                conn.execute(text("ALTER TABLE posts ADD COLUMN view_count INTEGER DEFAULT 0"))
+            conn.commit()
+        print("✅ Migration Successful: view_count column ready.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_view_count_column()
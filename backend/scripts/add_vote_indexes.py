@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_vote_indexes():
+    print("🔄 Migrating: Adding lookup indexes to votes table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            # (user_id, post_id) / (user_id, comment_id) are already covered by the unique constraints
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_votes_post_id ON votes (post_id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_votes_comment_id ON votes (comment_id)"))
+            conn.commit()
+        print("✅ Migration Successful: Vote indexes added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_vote_indexes()
@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from app.models.user import User  # noqa: F401 - registers the mapper for relationship("User")
+from app.models.tag import Tag, PostTag
+from app.crud.tag import backfill_post_tags
+
+def create_tag_tables():
+    print("🔄 Migrating: Creating tags / post_tags tables and backfilling from posts.tags...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        Tag.__table__.create(session.engine, checkfirst=True)
+        PostTag.__table__.create(session.engine, checkfirst=True)
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+        return
+
+    db = session.SessionLocal()
+    try:
+        count = backfill_post_tags(db)
+        print(f"✅ Migration Successful: Tags indexed for {count} posts.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    create_tag_tables()
@@ -0,0 +1,133 @@
+import asyncio
+import itertools
+import json
+
+import asyncpg
+
+from app.core.backplane import PG_NOTIFY_MAX_BYTES, PostgresBackplane
+from app.core.socket_manager import ConnectionManager
+
+
+class FakeServer:
+    """Just enough of PostgreSQL for the backplane: NOTIFY and the outbox."""
+
+    def __init__(self):
+        self.listeners = []
+        self.outbox = {}
+        self.notified = []
+        self.ids = itertools.count(1)
+
+    async def connect(self, dsn):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+        self.on_terminated = None
+
+    async def add_listener(self, channel, callback):
+        self.server.listeners.append((self, callback))
+
+    def add_termination_listener(self, callback):
+        self.on_terminated = callback
+
+    def terminate(self):
+        # What asyncpg does when the server drops the connection
+        self.closed = True
+        self.server.listeners = [(c, cb) for c, cb in self.server.listeners if c is not self]
+        self.on_terminated(self)
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, *args):
+        if "pg_notify" in query:
+            channel, payload = args
+            self.server.notified.append(payload)
+            for conn, callback in self.server.listeners:
+                callback(conn, 0, channel, payload)
+
+    async def fetchval(self, query, *args):
+        if query.startswith("INSERT"):
+            ref = next(self.server.ids)
+            self.server.outbox[ref] = args[0]
+            return ref
+        return self.server.outbox.get(args[0])
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+async def settle():
+    # Notifications are handled in their own tasks
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _outbox_round_trip(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(asyncpg, "connect", server.connect)
+    received = []
+
+    async def handler(envelope):
+        received.append(envelope)
+
+    backplane = PostgresBackplane("postgresql://fake")
+    await backplane.start(handler)
+
+    small = {"kind": "topic", "topic": "post:1", "id": None, "data": '{"type":"ping"}'}
+    large = {"kind": "topic", "topic": "user:1", "id": 7, "data": json.dumps({"text": "x" * PG_NOTIFY_MAX_BYTES})}
+    await backplane.publish(small)
+    await backplane.publish(large)
+    await settle()
+
+    # The large payload went through an outbox row; NOTIFY carried its id
+    assert server.notified[1] == '{"ref": 1}'
+    assert len(server.outbox) == 1
+    assert received == [small, large]
+    await backplane.stop()
+
+
+def test_large_payloads_go_through_outbox(monkeypatch):
+    asyncio.run(_outbox_round_trip(monkeypatch))
+
+
+async def _reconnect_gap(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(asyncpg, "connect", server.connect)
+    manager = ConnectionManager()
+    await manager.start(PostgresBackplane("postgresql://fake"))
+
+    for event_id in (1, 2):
+        await manager.send_personal_message({"id": event_id, "type": "reply"}, 1)
+    await settle()
+    assert [event_id for event_id, _ in manager.replay_buffer.since(1, 1)] == [2]
+
+    # LISTEN drops; event 3 is published by another worker meanwhile
+    manager.backplane._listen_conn.terminate()
+    server.notified.append("event 3, never seen here")
+    await manager.backplane._reconnect_task
+    assert manager.backplane._listen_conn is not None
+
+    # Resuming from 2 can't be served from the ring any more
+    assert manager.replay_buffer.since(1, 2) is None
+    await manager.send_personal_message({"id": 4, "type": "reply"}, 1)
+    await settle()
+    assert manager.replay_buffer.since(1, 2) is None
+    assert [event_id for event_id, _ in manager.replay_buffer.since(1, 3)] == [4]
+    await manager.stop()
+
+
+def test_reconnect_invalidates_replay(monkeypatch):
+    asyncio.run(_reconnect_gap(monkeypatch))
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import app.db.session as db_session
+from app.core.counter_buffer import CounterBuffer
+from app.models.post import Post
+
+
+async def _counter_buffer_restore(post_id):
+    buffer = CounterBuffer(interval=60, max_pending=1000)
+    buffer.add(Post, post_id, "share_count", 3)
+    buffer.add(Post, post_id, "view_count", 2)
+
+    class FailingSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement):
+            raise RuntimeError("database unavailable")
+
+    working_factory = db_session.AsyncSessionLocal
+    db_session.AsyncSessionLocal = FailingSession
+    try:
+        await buffer.flush()
+        raise AssertionError("flush should have failed")
+    except RuntimeError:
+        pass
+    finally:
+        db_session.AsyncSessionLocal = working_factory
+
+    assert buffer.pending(Post, post_id, "share_count") == 3
+    assert buffer.pending(Post, post_id, "view_count") == 2
+
+    # Increments during the outage stack on top of the restored ones
+    buffer.add(Post, post_id, "share_count")
+    await buffer.flush()
+    assert buffer.pending(Post, post_id, "share_count") == 0
+
+
+async def _counter_buffer_stop_mid_flush(post_id):
+    buffer = CounterBuffer(interval=60, max_pending=2)
+    flush_started = asyncio.Event()
+
+    class HangingSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement):
+            flush_started.set()
+            await asyncio.Event().wait()
+
+    working_factory = db_session.AsyncSessionLocal
+    db_session.AsyncSessionLocal = HangingSession
+    try:
+        buffer.start()
+        buffer.add(Post, post_id, "share_count", 3)
+        buffer.add(Post, post_id, "view_count", 2)  # hits max_pending, wakes the loop
+        await asyncio.wait_for(flush_started.wait(), 5)
+    finally:
+        db_session.AsyncSessionLocal = working_factory
+
+    # Shutdown cancels the stuck flush; its deltas must reach the final one
+    await buffer.stop()
+    assert buffer.pending(Post, post_id, "share_count") == 0
+
+
+@pytest.fixture
+
+
+def db(database_url):
+    """A session on a fresh database, without starting the app."""
+    db_session.init_db(database_url)
+    db_session.init_async_db(database_url)
+    db_session.create_tables()
+    session = db_session.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+
+
+def post_id(db):
+    post = Post(title="Share me", content="c", department="CSE", share_count=10, view_count=0)
+    db.add(post)
+    db.commit()
+    return post.id
+
+
+def test_counter_buffer_restores_failed_flush(db, post_id):
+    asyncio.run(_counter_buffer_restore(post_id))
+
+    db.expire_all()
+    post = db.get(Post, post_id)
+    assert (post.share_count, post.view_count) == (14, 2), (post.share_count, post.view_count)
+
+
+def test_counter_buffer_stop_during_flush(db, post_id):
+    # No increments lost when shutdown cancels a flush
+    asyncio.run(_counter_buffer_stop_mid_flush(post_id))
+
+    db.expire_all()
+    post = db.get(Post, post_id)
+    assert (post.share_count, post.view_count) == (13, 2), (post.share_count, post.view_count)
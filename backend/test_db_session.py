@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+import app.db.session as db_session
+from app.db.session import _pool_options, to_async_url
+from app.models.post import Post
+
+
+def test_async_urls():
+    assert to_async_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert to_async_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert to_async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u:p@db/app")
+
+
+def test_pool_options_from_settings(monkeypatch):
+    monkeypatch.setattr(db_session.settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(db_session.settings, "DB_POOL_RECYCLE", 600)
+    assert _pool_options("sqlite:///x.db") == {"pool_pre_ping": db_session.settings.DB_POOL_PRE_PING}
+
+    # Both engines get the same sizing; no connection is opened here
+    db_session.init_db("postgresql://u:p@localhost/app")
+    db_session.init_async_db("postgresql://u:p@localhost/app")
+    try:
+        for engine in (db_session.engine, db_session.async_engine.sync_engine):
+            assert engine.pool.size() == 7
+            assert engine.pool._recycle == 600
+        assert db_session.async_engine.dialect.driver == "asyncpg"
+    finally:
+        db_session.close_db()
+        asyncio.run(db_session.close_async_db())
+    assert db_session.engine is None and db_session.AsyncSessionLocal is None
+
+
+async def _async_session_round_trip():
+    async with db_session.AsyncSessionLocal() as db:
+        post = Post(title="Async", content="c", department="CSE")
+        db.add(post)
+        await db.commit()
+        # expire_on_commit=False: readable after commit without a lazy load
+        assert post.title == "Async"
+        titles = (await db.execute(select(Post.title))).scalars().all()
+    assert titles == ["Async"]
+    await db_session.close_async_db()
+
+
+def test_async_session(database_url):
+    db_session.init_db(database_url)
+    db_session.init_async_db(database_url)
+    db_session.create_tables()
+    asyncio.run(_async_session_round_trip())
+    db_session.close_db()
+
+    async def first_session():
+        return await db_session.get_async_db().__anext__()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(first_session())
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from app.core.feed_cache import FeedCache
+
+
+def test_feed_cache_invalidation(client, make_user, make_post):
+    cache = FeedCache(ttl_seconds=60, max_entries=3)
+    cse, ece, combined = (FeedCache.make_key(d, None, False, 20) for d in ("CSE", "ECE", "ALL"))
+    for key in (cse, ece, combined):
+        cache.set(key, {"department": key[0]})
+    assert cache.get(cse) == {"department": "CSE"}
+
+    # A CSE write drops the CSE and combined pages, not ECE's
+    cache.invalidate_department("CSE")
+    assert cache.get(cse) is None and cache.get(combined) is None
+    assert cache.get(ece) is not None
+
+    # A page never outlives the earliest pin expiry on it
+    cache.set(cse, {"pinned": True}, pin_expiry=datetime.utcnow() - timedelta(seconds=1))
+    assert cache.get(cse) is None
+
+    # Cached first pages never hide a new post
+    user = make_user("cache@example.com")
+    first = make_post(user, "Cached")
+    assert [p["id"] for p in client.get("/posts/", params={"department": "CSE"}).json()] == [first]
+    second = make_post(user, "Fresh")
+    assert [p["id"] for p in client.get("/posts/", params={"department": "CSE"}).json()] == [second, first]
+
+
+def test_cursor_walk_matches_feed(client, make_user, make_post):
+    admin = make_user("admin@example.com", role="admin")
+    ids = [make_post(admin, f"Post {i}") for i in range(8)]
+    # Pin an old post so it has to lead every walk
+    assert client.put(f"/posts/{ids[1]}/pin", headers=admin).status_code == 200
+
+    full = [p["id"] for p in client.get("/posts/", params={"skip": 0, "limit": 100}).json()]
+    assert full[0] == ids[1], full
+    assert sorted(full) == sorted(ids)
+
+    walked, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/posts/", params=params)
+        assert response.status_code == 200, response.text
+        walked += [p["id"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert walked == full, (walked, full)
+
+    assert client.get("/posts/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_tag_matching(client, make_user, make_post):
+    user = make_user("tags@example.com")
+    # Titles avoid the auto-tagging keywords, so only these tags apply
+    exam = make_post(user, "First", tags="Academic, Exam")
+    academic = make_post(user, "Second", tags="academic")
+    event = make_post(user, "Third", tags="Event")
+    # Substrings of a tag must not match (the old ILIKE scan did)
+    make_post(user, "Fourth", tags="exams")
+    make_post(user, "Fifth")
+
+    def feed(**params):
+        response = client.get("/posts/", params=params)
+        assert response.status_code == 200, response.text
+        return sorted(p["id"] for p in response.json())
+
+    assert feed(tags="academic") == sorted([exam, academic])
+    assert feed(tags="ACADEMIC,event") == sorted([exam, academic, event])
+    assert feed(tags="academic,exam", tag_match="all") == [exam]
+    assert feed(tags="academic,event", tag_match="all") == []
+    assert feed(tags="exam") == [exam]
+
+    assert client.get("/posts/", params={"tags": "exam", "tag_match": "some"}).status_code == 400
+
+
+def test_etags(client, make_user, make_post):
+    author = make_user("etag-author@example.com")
+    voter = make_user("etag-voter@example.com")
+    post_id = make_post(author, "Cache me")
+
+    for path in ("/posts/", f"/posts/{post_id}"):
+        first = client.get(path, headers=voter)
+        etag = first.headers["ETag"]
+        again = client.get(path, headers={**voter, "If-None-Match": etag})
+        assert again.status_code == 304, (path, again.status_code)
+        assert again.headers["ETag"] == etag and again.content == b""
+
+    feed_etag = client.get("/posts/", headers=voter).headers["ETag"]
+    post_etag = client.get(f"/posts/{post_id}", headers=voter).headers["ETag"]
+    assert client.post("/votes/", json={"post_id": post_id, "vote_type": 1}, headers=voter).status_code == 200
+
+    # A vote changes both ETags
+    feed = client.get("/posts/", headers={**voter, "If-None-Match": feed_etag})
+    assert feed.status_code == 200 and feed.headers["ETag"] != feed_etag
+    post = client.get(f"/posts/{post_id}", headers={**voter, "If-None-Match": post_etag})
+    assert post.status_code == 200 and post.headers["ETag"] != post_etag
+    assert post.json()["upvotes"] == 1
+
+    # ETags are per caller: another user's tag never validates
+    assert client.get("/posts/", headers={**author, "If-None-Match": feed.headers["ETag"]}).status_code == 200
+
+
+def test_user_vote_on_feed_and_comments(client, make_user, make_post, recorded_statements):
+    author = make_user("uv-author@example.com")
+    voter = make_user("uv-voter@example.com")
+    posts = [make_post(author, f"Post {i}") for i in range(5)]
+    comment = client.post(f"/posts/{posts[0]}/comments/", json={"content": "x"}, headers=author).json()["id"]
+    client.post("/votes/", json={"post_id": posts[0], "vote_type": 1}, headers=voter)
+    client.post("/votes/", json={"post_id": posts[1], "vote_type": -1}, headers=voter)
+    client.post("/votes/", json={"comment_id": comment, "vote_type": 1}, headers=voter)
+
+    with recorded_statements() as statements:
+        feed = client.get("/posts/", headers=voter).json()
+    assert {p["id"]: p["user_vote"] for p in feed} == {
+        posts[0]: 1, posts[1]: -1, posts[2]: None, posts[3]: None, posts[4]: None
+    }
+    # One votes lookup for the whole page
+    assert len([s for s in statements if "FROM votes" in s]) == 1
+
+    # The cached page is shared; votes are per caller
+    assert all(p["user_vote"] is None for p in client.get("/posts/", headers=author).json())
+    assert client.get(f"/posts/{posts[1]}", headers=voter).json()["user_vote"] == -1
+    comments = client.get(f"/posts/{posts[0]}/comments/", headers=voter).json()
+    assert [c["user_vote"] for c in comments] == [1]
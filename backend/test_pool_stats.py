@@ -0,0 +1,23 @@
+from sqlalchemy import create_engine, text
+
+from app.db.pool_stats import instrument_pool, get_pool_stats
+
+
+def test_stats_survive_dispose(database_url):
+    engine = create_engine(database_url)
+    instrument_pool(engine, "test")
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    # dispose() swaps in a fresh pool; the hooks live on the engine
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        stats = get_pool_stats()["pools"]["test"]
+        assert stats["in_use"] == 1 and stats["checkouts"] == 2, stats
+
+    stats = get_pool_stats()["pools"]["test"]
+    assert (stats["checkouts"], stats["checkins"], stats["connects"]) == (2, 2, 2), stats
+    assert stats["checkout_ms"]["max"] > 0, stats
+    engine.dispose()
@@ -0,0 +1,43 @@
+from app.crud.reaction import get_reaction_counts_batch
+
+
+def react(client, user_id, emoji, target_type, target_id):
+    body = {"user_id": user_id, "emoji": emoji, "target_type": target_type, "target_id": target_id}
+    assert client.post("/reactions/", json=body).status_code == 200
+
+
+def test_reaction_counts_batch(client, db, make_user, make_post, recorded_statements):
+    headers = make_user("react@example.com")
+    make_user("other@example.com")
+    posts = [make_post(headers, f"Post {i}") for i in range(3)]
+    react(client, 1, "heart", "post", posts[0])
+    react(client, 2, "heart", "post", posts[0])
+    react(client, 2, "+1", "post", posts[1])
+
+    with recorded_statements() as statements:
+        counts = get_reaction_counts_batch(db, "post", posts, user_id=1)
+    assert len(statements) == 1
+    assert counts == {
+        posts[0]: [{"emoji": "heart", "count": 2, "user_reacted": True}],
+        posts[1]: [{"emoji": "+1", "count": 1, "user_reacted": False}],
+    }
+    assert get_reaction_counts_batch(db, "post", []) == {}
+
+
+def test_vote_state_queries_do_not_grow_with_targets(client, make_user, make_post, recorded_statements):
+    headers = make_user("scale@example.com")
+    posts = [make_post(headers, f"Post {i}") for i in range(10)]
+    for post_id in posts:
+        react(client, 1, "heart", "post", post_id)
+
+    def state(ids):
+        with recorded_statements() as statements:
+            response = client.get("/votes/state", params={"post_ids": ",".join(map(str, ids))}, headers=headers)
+        return response.json(), len(statements)
+
+    _, one = state(posts[:1])
+    many, ten = state(posts)
+    assert 0 < one == ten
+    for post_id in posts:
+        assert many["posts"][str(post_id)]["reactions"] == [{"emoji": "heart", "count": 1, "user_reacted": True}]
+        assert many["posts"][str(post_id)]["user_vote"] is None
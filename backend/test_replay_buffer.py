@@ -0,0 +1,62 @@
+from app.core.replay_buffer import ReplayBuffer
+
+
+def ids(events):
+    return None if events is None else [event_id for event_id, _ in events]
+
+
+def test_replay_ring_overflow():
+    buffer = ReplayBuffer(size=3, max_users=10)
+    for event_id in range(1, 6):
+        buffer.record(1, event_id, f"e{event_id}")
+
+    # Ring holds 3..5; anything that needs event 1 or 2 must go to the database
+    assert ids(buffer.since(1, 2)) == [3, 4, 5]
+    assert ids(buffer.since(1, 4)) == [5]
+    assert buffer.since(1, 1) is None
+    assert buffer.since(1, 0) is None
+
+
+def test_replay_lru_eviction():
+    buffer = ReplayBuffer(size=5, max_users=2)
+    buffer.record(1, 1, "a")
+    buffer.record(1, 2, "b")
+    buffer.record(2, 3, "c")
+    buffer.record(3, 4, "d")  # evicts user 1 (least recently used)
+
+    # User 1's events up to 2 are gone with the ring
+    assert buffer.since(1, 1) is None
+    assert ids(buffer.since(1, 2)) == []
+    # A user first seen after the eviction can't prove anything below it either
+    buffer.record(4, 5, "e")  # evicts user 2
+    assert buffer.since(4, 1) is None
+    assert ids(buffer.since(4, 2)) == [5]
+    assert buffer.since(2, 2) is None
+    assert ids(buffer.since(2, 3)) == []
+
+
+def test_replay_broadcast_and_start_floor():
+    buffer = ReplayBuffer(size=2, max_users=10)
+    buffer.record(1, 10, "first")
+    # Nothing before the first event this worker saw is known
+    assert buffer.since(1, 8) is None
+    assert ids(buffer.since(1, 9)) == [10]
+
+    for event_id in (11, 12, 13):
+        buffer.record_broadcast(event_id, "all")
+    # Broadcast ring holds 12, 13; 11 was dropped
+    assert buffer.since(1, 10) is None
+    assert ids(buffer.since(1, 11)) == [12, 13]
+
+
+def test_replay_per_recipient_broadcast():
+    buffer = ReplayBuffer(size=5, max_users=10)
+    buffer.record(1, 10, '{"id":10}')
+    # One announcement, stored once: user 1 got row 11, user 2 row 12
+    buffer.record_broadcast(12, '{"type":"announcement"}', {1: 11, 2: 12})
+
+    assert buffer.since(1, 10) == [(11, '{"id":11,"type":"announcement"}')]
+    assert buffer.since(2, 11) == [(12, '{"id":12,"type":"announcement"}')]
+    assert buffer.since(2, 12) == []
+    # The sender wasn't a recipient
+    assert buffer.since(3, 10) == []
@@ -0,0 +1,43 @@
+import logging
+
+import app.db.session as db_session
+from app.crud.search import to_fts5_query
+from app.db.search_index import create_search_indexes, search_indexes_exist
+
+
+def test_fts5_query_escaping():
+    assert to_fts5_query("robotics club") == '"robotics" "club"*'
+    # Operators and quotes in user input can't reach FTS5 syntax
+    assert to_fts5_query('NEAR("a" OR b) -c') == '"NEAR" "a" "OR" "b" "c"*'
+    assert to_fts5_query("  ?! ") == ""
+
+
+def test_startup_only_checks_indexes(database_url, caplog):
+    db_session.init_db(database_url)
+    with caplog.at_level(logging.WARNING, logger="app.db.search_index"):
+        db_session.create_tables()
+    # No DDL at startup: the migration script creates the indexes
+    assert not search_indexes_exist(db_session.engine)
+    assert "add_search_vector_columns.py" in caplog.text
+
+    create_search_indexes(db_session.engine)
+    assert search_indexes_exist(db_session.engine)
+
+
+def test_search_posts_and_comments(client, make_user):
+    # What scripts/add_search_vector_columns.py does before a deploy
+    create_search_indexes(db_session.engine)
+    user = make_user("search@example.com")
+    robotics = client.post("/posts/", json={"title": "Robotics meetup", "content": "Bring your robots", "department": "CSE"}, headers=user).json()["id"]
+    other = client.post("/posts/", json={"title": "Library hours", "content": "Open late", "department": "CSE"}, headers=user).json()["id"]
+    comment = client.post(f"/posts/{other}/comments/", json={"content": "Is the robotics lab open too?"}, headers=user).json()["id"]
+
+    hits = client.get("/search/", params={"q": "robotics"}).json()
+    assert {(h["type"], h["id"]) for h in hits} == {("post", robotics), ("comment", comment)}, hits
+    assert all("<mark>" in h["snippet"] for h in hits), hits
+    assert next(h for h in hits if h["type"] == "comment")["post_id"] == other
+
+    # Search-as-you-type: the last word matches as a prefix
+    assert [h["id"] for h in client.get("/search/", params={"q": "libr"}).json()] == [other]
+    assert client.get("/search/", params={"q": "submarine"}).json() == []
+    assert client.get("/search/", params={"q": ""}).status_code == 422
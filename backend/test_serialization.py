@@ -0,0 +1,45 @@
+import json
+
+from fastapi import Response
+
+import app.core.serialization as serialization
+from app.core.serialization import COMMENT_LIST, POST_LIST, dumps_text, serialize_response, with_id
+from app.models.comment import Comment
+from app.models.post import Post
+
+
+def test_dumps_text_same_with_and_without_orjson(monkeypatch):
+    payload = {"type": "new_post", "title": "Café ☕", "tags": ["a", "b"], "counts": {"up": 1}, "pinned": None}
+    fast = dumps_text(payload)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert dumps_text(payload) == fast
+    assert json.loads(fast) == payload
+
+
+def test_with_id_splices_without_reencoding():
+    text = dumps_text({"type": "announcement", "title": "Hi"})
+    assert json.loads(with_id(text, 7)) == {"id": 7, "type": "announcement", "title": "Hi"}
+    assert with_id("{}", 7) == '{"id":7}'
+
+
+def test_serialize_response_matches_schema(client, db, make_user, make_post):
+    headers = make_user("json@example.com")
+    post_id = make_post(headers, "Serialize me")
+    client.post(f"/posts/{post_id}/comments/", json={"content": "x"}, headers=headers)
+
+    injected = Response(headers={"ETag": '"abc"', "X-Next-Cursor": "next"})
+    injected.headers["Content-Length"] = "3"
+    posts = db.query(Post).all()
+    response = serialize_response(POST_LIST, posts, injected)
+
+    # Same document the response_model path would produce, in one pass
+    assert json.loads(response.body) == POST_LIST.dump_python(
+        POST_LIST.validate_python(posts, from_attributes=True), mode="json"
+    )
+    assert response.headers["ETag"] == '"abc"' and response.headers["X-Next-Cursor"] == "next"
+    assert response.headers["Content-Length"] == str(len(response.body))
+
+    comments = db.query(Comment).all()
+    body = json.loads(serialize_response(COMMENT_LIST, comments).body)
+    assert [c["id"] for c in body] == [c.id for c in comments]
+    assert body[0]["content"] == "x" and body[0]["replies"] == []
@@ -0,0 +1,191 @@
+import pytest
+from sqlalchemy import create_engine, func, text
+
+from app.api.votes import VOTE_STATE_MAX_TARGETS
+from app.crud.comment import path_segment, rebuild_comment_paths
+from app.crud.post import compute_hot_score
+from app.models.comment import Comment
+from app.models.notification import Notification
+from app.models.post import Post
+
+
+def make_reply(client, headers, post_id, parent_id=None):
+    params = {"parent_id": parent_id} if parent_id else {}
+    response = client.post(f"/posts/{post_id}/comments/", json={"content": "x"}, params=params, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_vote_transitions(client, db, make_user, make_post):
+    author = make_user("author@example.com")
+    voter = make_user("voter@example.com")
+    post_id = make_post(author)
+
+    # (vote sent, expected status, upvotes, downvotes): add, retract, re-add, switch
+    steps = [
+        (1, "added", 1, 0),
+        (1, "removed", 0, 0),
+        (1, "added", 1, 0),
+        (-1, "switched", 0, 1),
+    ]
+    for vote_type, status, upvotes, downvotes in steps:
+        result = client.post("/votes/", json={"post_id": post_id, "vote_type": vote_type}, headers=voter).json()
+        assert result == {"status": status, "upvotes": upvotes, "downvotes": downvotes}
+
+        db.expire_all()
+        post = db.get(Post, post_id)
+        assert (post.upvotes, post.downvotes) == (upvotes, downvotes)
+        expected = compute_hot_score(post.upvotes, post.downvotes, post.comments_count, post.share_count, post.created_at)
+        assert abs(post.hot_score - expected) < 1e-6
+
+    # Re-adding an upvote must not notify the author twice
+    notifications = db.query(func.count(Notification.id)).filter(
+        Notification.type == "upvote", Notification.reference_id == post_id
+    ).scalar()
+    assert notifications == 1
+
+    state = client.get("/votes/state", params={"post_ids": str(post_id)}, headers=voter).json()
+    assert state["posts"][str(post_id)]["user_vote"] == -1
+
+
+@pytest.fixture
+def migrated_votes_table(database_url):
+    """The votes table as db_migration_profile_voting.py (then
+    add_previous_vote_type_column.py) creates it: partial unique indexes
+    instead of the model's constraints. create_tables() leaves it alone."""
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE votes (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users(id),
+                post_id INTEGER REFERENCES posts(id),
+                comment_id INTEGER REFERENCES comments(id),
+                vote_type INTEGER NOT NULL
+            )
+        """))
+        conn.execute(text("CREATE UNIQUE INDEX unique_user_post_vote ON votes (user_id, post_id) WHERE post_id IS NOT NULL"))
+        conn.execute(text("CREATE UNIQUE INDEX unique_user_comment_vote ON votes (user_id, comment_id) WHERE comment_id IS NOT NULL"))
+        conn.execute(text("ALTER TABLE votes ADD COLUMN previous_vote_type INTEGER DEFAULT 0"))
+    engine.dispose()
+
+
+def test_votes_on_migrated_schema(migrated_votes_table, client, make_user, make_post):
+    user = make_user("migrated@example.com")
+    post_id = make_post(user)
+    comment_id = make_reply(client, user, post_id)
+
+    for target in ({"post_id": post_id}, {"comment_id": comment_id}):
+        statuses = []
+        for vote_type in (1, -1, -1):
+            response = client.post("/votes/", json={**target, "vote_type": vote_type}, headers=user)
+            assert response.status_code == 200, response.text
+            statuses.append(response.json()["status"])
+        assert statuses == ["added", "switched", "removed"], (target, statuses)
+
+
+def _thread_snapshot(db, post_id):
+    rows = db.query(Comment.id, Comment.parent_id, Comment.path, Comment.depth, Comment.descendant_count)\
+        .filter(Comment.post_id == post_id).all()
+    return {row.id: tuple(row) for row in rows}
+
+
+def test_delete_mid_thread(client, db, make_user, make_post):
+    user = make_user("threads@example.com")
+    post_id = make_post(user)
+
+    # root -> mid -> (child_a -> grandchild, child_b)
+    root = make_reply(client, user, post_id)
+    mid = make_reply(client, user, post_id, root)
+    child_a = make_reply(client, user, post_id, mid)
+    child_b = make_reply(client, user, post_id, mid)
+    grandchild = make_reply(client, user, post_id, child_a)
+
+    assert client.delete(f"/posts/{post_id}/comments/{mid}", headers=user).status_code == 204
+
+    after = _thread_snapshot(db, post_id)
+    assert mid not in after
+    # Direct replies move to top level; the subtree below keeps its shape
+    assert after[child_a][1:] == (None, path_segment(child_a), 0, 1)
+    assert after[child_b][1:] == (None, path_segment(child_b), 0, 0)
+    assert after[grandchild][1:] == (child_a, path_segment(child_a) + path_segment(grandchild), 1, 0)
+    # The whole subtree left root's thread
+    assert after[root][4] == 0
+    assert db.get(Post, post_id).comments_count == 4
+
+    # Same answer as recomputing everything from parent_id
+    rebuild_comment_paths(db)
+    db.commit()
+    assert _thread_snapshot(db, post_id) == after
+
+
+def test_comment_paging(client, make_user, make_post):
+    user = make_user("paging@example.com")
+    post_id = make_post(user)
+    roots = [make_reply(client, user, post_id) for _ in range(5)]
+    replies = [make_reply(client, user, post_id, roots[0]) for _ in range(5)]
+
+    walked, cursor = [], None
+    while True:
+        params = {"limit": 2, "replies": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/posts/{post_id}/comments/", params=params)
+        page = response.json()
+        if not walked:
+            # Two roots plus the first root's first two replies
+            assert sorted(c["id"] for c in page) == sorted(roots[:2] + replies[:2])
+            assert page[0]["reply_count"] == 5
+        walked += [c["id"] for c in page if c["parent_id"] is None]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert walked == roots
+
+    more = client.get(f"/posts/{post_id}/comments/{roots[0]}/replies", params={"cursor": replies[1]}).json()
+    assert [c["id"] for c in more] == replies[2:]
+    assert client.get(f"/posts/{post_id}/comments/999999/replies").status_code == 404
+
+
+def test_vote_state_limits(client, make_user, make_post):
+    post_id = make_post(make_user("state@example.com"))
+
+    # Unknown ids are simply absent; anonymous callers get no user_vote
+    state = client.get("/votes/state", params={"post_ids": f"{post_id},999999"}).json()
+    assert list(state["posts"]) == [str(post_id)]
+    assert state["posts"][str(post_id)]["user_vote"] is None
+
+    for params in ({"post_ids": "1,abc"}, {"comment_ids": "1;2"}):
+        assert client.get("/votes/state", params=params).status_code == 400
+
+    limit = VOTE_STATE_MAX_TARGETS
+    posts = ",".join(str(i) for i in range(1, limit // 2 + 1))
+    comments = ",".join(str(i) for i in range(1, limit - limit // 2 + 1))
+    assert client.get("/votes/state", params={"post_ids": posts, "comment_ids": comments}).status_code == 200
+    response = client.get("/votes/state", params={"post_ids": posts, "comment_ids": comments + ",999999"})
+    assert response.status_code == 400
+
+
+def test_threads_before_path_backfill(client, db, make_user, make_post):
+    user = make_user("legacy@example.com")
+    post_id = make_post(user)
+    root = make_reply(client, user, post_id)
+    mid = make_reply(client, user, post_id, root)
+    leaf = make_reply(client, user, post_id, mid)
+    # As the rows were before scripts/add_comment_paths.py ran
+    db.query(Comment).filter(Comment.post_id == post_id).update({Comment.path: None})
+    db.commit()
+
+    thread = client.get(f"/posts/{post_id}/comments/{root}/thread")
+    assert thread.status_code == 200, thread.text
+    assert [c["id"] for c in thread.json()] == [root, mid, leaf]
+    shallow = client.get(f"/posts/{post_id}/comments/{root}/thread", params={"max_depth": 1}).json()
+    assert [c["id"] for c in shallow] == [root, mid]
+
+    reply = make_reply(client, user, post_id, leaf)
+    assert client.delete(f"/posts/{post_id}/comments/{mid}", headers=user).status_code == 204
+
+    db.expire_all()
+    assert db.get(Comment, mid) is None
+    assert db.get(Comment, leaf).parent_id is None
+    assert db.get(Comment, reply).parent_id == leaf
@@ -0,0 +1,249 @@
+import asyncio
+import json
+
+import app.api.realtime as realtime
+import app.core.socket_manager as socket_manager
+
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.counter_updates import CounterCoalescer
+from app.core.socket_manager import ConnectionManager, GOING_AWAY_CLOSE_CODE, SLOW_CONSUMER_CLOSE_CODE, manager
+
+
+def receive_until(ws, frame_type):
+    while True:
+        frame = ws.receive_json()
+        if frame.get("type") == frame_type:
+            return frame
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+
+class StalledSocket(FakeSocket):
+    async def send_text(self, text):
+        # A client that stopped reading: the write never completes
+        await asyncio.Event().wait()
+
+
+async def _slow_consumer():
+    manager = ConnectionManager(queue_size=4, send_timeout=60)
+    fast, stalled = FakeSocket(), StalledSocket()
+    await manager.connect(fast, 1)
+    await manager.connect(stalled, 2)
+
+    for i in range(10):
+        await manager.broadcast({"type": "tick", "n": i})
+        # Let the senders run between messages, as real traffic would
+        await asyncio.sleep(0.001)
+
+    ticks = [text for text in fast.sent if '"tick"' in text]
+    assert len(ticks) == 10, fast.sent
+    assert stalled.close_code == SLOW_CONSUMER_CLOSE_CODE, stalled.close_code
+    assert list(manager.active_connections) == [1]
+    await manager.stop()
+
+
+def test_slow_consumer_eviction():
+    asyncio.run(_slow_consumer())
+
+
+async def _encode_once(monkeypatch):
+    manager = ConnectionManager()
+    sockets = [FakeSocket() for _ in range(3)]
+    for user_id, socket in enumerate(sockets, start=1):
+        await manager.connect(socket, user_id)
+        manager.subscribe(socket, user_id, "department:CSE")
+
+    encoded = []
+    dumps_text = socket_manager.dumps_text
+    monkeypatch.setattr(socket_manager, "dumps_text", lambda message: encoded.append(dumps_text(message)) or encoded[-1])
+    await manager.publish("department:CSE", {"type": "new_post", "id": 5})
+    await manager.broadcast({"type": "tick"})
+    await asyncio.sleep(0.001)
+
+    # One encode per message, and every socket was handed that same string
+    assert len(encoded) == 2
+    for text in encoded:
+        assert all(any(sent is text for sent in socket.sent) for socket in sockets)
+    await manager.stop()
+
+
+def test_fan_out_encodes_once(monkeypatch):
+    asyncio.run(_encode_once(monkeypatch))
+
+
+async def _counter_coalescing():
+    published = []
+
+    async def publish(topic, message, event_id=None):
+        published.append((topic, message))
+
+    coalescer = CounterCoalescer(interval=60)
+    original = manager.publish
+    manager.publish = publish
+    try:
+        for upvotes in range(1, 6):
+            coalescer.record(7, upvotes=upvotes, downvotes=0)
+        coalescer.record(7, comments_count=3)
+        coalescer.record_reaction(7, None, "heart", 1)
+        coalescer.record_reaction(7, None, "heart", 1)
+        coalescer.record_reaction(7, None, "+1", 1)
+        coalescer.record_reaction(7, None, "+1", -1)
+        coalescer.record(7, 12, upvotes=2)
+        await coalescer.flush()
+        # Toggled back and forth: nothing left to say
+        coalescer.record_reaction(8, None, "heart", 1)
+        coalescer.record_reaction(8, None, "heart", -1)
+        await coalescer.flush()
+    finally:
+        manager.publish = original
+
+    assert published == [
+        ("post:7", {"type": "post_counters", "post_id": 7, "upvotes": 5, "downvotes": 0, "comments_count": 3, "reactions": {"heart": 2}}),
+        ("post:7", {"type": "comment_counters", "post_id": 7, "comment_id": 12, "upvotes": 2}),
+    ], published
+
+
+def test_counter_coalescing():
+    asyncio.run(_counter_coalescing())
+
+
+async def _manager_stop():
+    manager = ConnectionManager()
+    sockets = [FakeSocket(), FakeSocket(), FakeSocket()]
+    for user_id, socket in zip((1, 1, 2), sockets):
+        await manager.connect(socket, user_id)
+    senders = [c.sender_task for cs in manager.active_connections.values() for c in cs]
+    assert len(senders) == 3
+
+    await manager.stop()
+    assert all(task.done() for task in senders)
+    assert manager.active_connections == {} and manager.topics == {}
+    assert [s.close_code for s in sockets] == [GOING_AWAY_CLOSE_CODE] * 3
+
+
+def test_manager_stop_closes_connections():
+    asyncio.run(_manager_stop())
+
+
+async def _notification_broadcast():
+    manager = ConnectionManager()
+    published = []
+    deliver = manager.deliver
+
+    async def publish(envelope):
+        published.append(envelope)
+        await deliver(envelope)
+
+    manager._publish = publish
+    sockets = {user_id: FakeSocket() for user_id in (1, 2, 3)}
+    for user_id, socket in sockets.items():
+        await manager.connect(socket, user_id)
+
+    await manager.broadcast_notifications({"type": "announcement"}, {1: 41, 2: 42})
+    await asyncio.sleep(0.001)
+
+    # One envelope for all recipients, each socket sees its own id
+    assert len(published) == 1
+    assert [t for t in sockets[1].sent if "announcement" in t] == ['{"id":41,"type":"announcement"}']
+    assert [t for t in sockets[2].sent if "announcement" in t] == ['{"id":42,"type":"announcement"}']
+    assert not any("announcement" in t for t in sockets[3].sent)
+    await manager.stop()
+
+
+def test_notification_broadcast_is_one_envelope():
+    asyncio.run(_notification_broadcast())
+
+
+def test_announcement_ids_per_recipient(client, make_user):
+    admin = make_user("admin@example.com")
+    alice = make_user("alice@example.com")
+    bob = make_user("bob@example.com")
+
+    with client.websocket_connect("/ws", headers=alice) as ws_alice, \
+            client.websocket_connect("/ws", headers=bob) as ws_bob:
+        response = client.post("/notifications/announcement", params={"title": "Hi", "message": "All hands"}, headers=admin)
+        assert response.json() == {"status": "sent", "count": 2}, response.json()
+        live = {"alice": receive_until(ws_alice, "announcement"), "bob": receive_until(ws_bob, "announcement")}
+
+    # Each live event carries the id the recipient's own row has
+    for name, headers in (("alice", alice), ("bob", bob)):
+        stored = client.get("/notifications/", headers=headers).json()
+        assert [n["id"] for n in stored] == [live[name]["id"]], (name, stored, live[name])
+    assert live["alice"]["id"] != live["bob"]["id"]
+
+
+def test_topic_subscriptions(client, make_user):
+    alice = make_user("alice@example.com")
+    make_user("bob@example.com")
+
+    with client.websocket_connect("/ws", headers=alice) as ws:
+        ws.send_json({"action": "subscribe", "topic": "user:2"})
+        reply = receive_until(ws, "error")
+        assert reply["topic"] == "user:2" and "another user" in reply["detail"], reply
+
+        ws.send_json({"action": "subscribe", "topic": "department:CSE; DROP"})
+        assert receive_until(ws, "error")["detail"].startswith("Invalid topic")
+
+        ws.send_json({"action": "subscribe", "topic": "user:1"})
+        assert receive_until(ws, "subscribed")["topic"] == "user:1"
+        ws.send_json({"action": "subscribe", "topic": "department:CSE"})
+        assert receive_until(ws, "subscribed")["topic"] == "department:CSE"
+
+
+def test_handshake_rejects_bad_tokens(client, make_user):
+    make_user("carol@example.com")
+    for url in ("/ws", "/ws?token=not-a-jwt", "/ws?resume=expired-or-forged"):
+        try:
+            with client.websocket_connect(url) as ws:
+                ws.receive_json()
+            raise AssertionError(f"{url} should have been refused")
+        except WebSocketDisconnect as e:
+            assert e.code == 1008, (url, e.code)
+
+
+def test_resume_token_skips_authentication(client, make_user, monkeypatch):
+    alice = make_user("alice@example.com")
+    with client.websocket_connect("/ws", headers=alice) as ws:
+        resume = receive_until(ws, "resume")["resume_token"]
+
+    def no_full_auth(token):
+        raise AssertionError("resume should not run full verification")
+
+    monkeypatch.setattr(realtime, "authenticate_token", no_full_auth)
+    with client.websocket_connect(f"/ws?resume={resume}") as ws:
+        ws.send_json({"action": "subscribe", "topic": "user:1"})
+        assert receive_until(ws, "subscribed")["topic"] == "user:1"
+
+    # A resume token is not an API credential
+    assert client.get("/notifications/", headers={"Authorization": f"Bearer {resume}"}).status_code == 401
+
+
+def test_handshake_busy_sends_retry_hint(client, make_user, monkeypatch):
+    alice = make_user("alice@example.com")
+    # Every verification slot taken
+    monkeypatch.setattr(realtime, "handshake_slots", asyncio.Semaphore(0))
+    monkeypatch.setattr(realtime.settings, "WS_HANDSHAKE_WAIT_SECONDS", 0.01)
+    try:
+        with client.websocket_connect("/ws", headers=alice) as ws:
+            ws.receive_json()
+        raise AssertionError("handshake should have been turned away")
+    except WebSocketDisconnect as e:
+        assert e.code == realtime.HANDSHAKE_BUSY_CLOSE_CODE
+        retry_after = json.loads(e.reason)["retry_after"]
+        base = realtime.settings.WS_RETRY_AFTER_SECONDS
+        assert 0.5 * base <= retry_after <= 1.5 * base
+
@@ -4,7 +4,7 @@ import { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useToast } from '@/context/ToastContext';
 import CreatePostModal from '@/components/feed/CreatePostModal';
-import { getPosts, deletePost, getCurrentUser } from '@/lib/api';
+import { getPostsPage, deletePost, getCurrentUser } from '@/lib/api';
 import PostSkeleton from '@/components/feed/PostSkeleton';
 import PostCard from '@/components/feed/PostCard';
 import ConfirmationModal from '@/components/common/ConfirmationModal';
@@ -40,6 +40,8 @@ const itemVariants = {
     }
 };
 
+const FEED_PAGE_SIZE = 20;
+
 export default function Home() {
     const { showToast } = useToast();
     const [isCreatePostOpen, setIsCreatePostOpen] = useState(false);
@@ -53,6 +55,8 @@ export default function Home() {
 
     const [posts, setPosts] = useState<Post[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
 
     useEffect(() => {
         // Check auth status
@@ -68,9 +72,10 @@ export default function Home() {
 
     const fetchPosts = async () => {
         try {
-            // Fetch all posts without department filter
-            const data = await getPosts(0, 100, 'ALL');
-            setPosts(data);
+            // First page of all departments; later pages follow the cursor
+            const page = await getPostsPage(null, FEED_PAGE_SIZE, 'ALL');
+            setPosts(page.posts);
+            setNextCursor(page.nextCursor);
         } catch (error) {
             console.error("Failed to fetch posts", error);
         } finally {
@@ -78,8 +83,32 @@ export default function Home() {
         }
     };
 
+    const loadMorePosts = async () => {
+        if (!nextCursor) return;
+        setIsLoadingMore(true);
+        try {
+            const page = await getPostsPage(nextCursor, FEED_PAGE_SIZE, 'ALL');
+            // A post pushed live can also come back in a later page
+            setPosts(prev => {
+                const seen = new Set(prev.map(p => p.id));
+                return [...prev, ...page.posts.filter((p: Post) => !seen.has(p.id))];
+            });
+            setNextCursor(page.nextCursor);
+        } catch (error) {
+            console.error("Failed to load more posts", error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     // Real-time Updates
-    const { lastMessage } = useSocket();
+    const { lastMessage, subscribe, unsubscribe } = useSocket();
+
+    // New posts are only pushed to sockets subscribed to a department topic
+    useEffect(() => {
+        subscribe('department:ALL');
+        return () => unsubscribe('department:ALL');
+    }, [subscribe, unsubscribe]);
 
     useEffect(() => {
         if (!lastMessage) return;
@@ -204,6 +233,16 @@ export default function Home() {
                             </motion.div>
                         )}
                     </AnimatePresence>
+
+                    {nextCursor && !isLoading && (
+                        <button
+                            onClick={loadMorePosts}
+                            disabled={isLoadingMore}
+                            className="w-full text-sm font-medium text-slate-500 hover:text-blue-600 py-3 transition-colors disabled:opacity-50"
+                        >
+                            {isLoadingMore ? 'Loading...' : 'Load more posts'}
+                        </button>
+                    )}
                 </div>
             </div>
 
@@ -1,6 +1,43 @@
+'use client';
+
+import { useState, useEffect } from 'react';
 import EmptyState from '@/components/common/EmptyState';
+import { getHotPosts } from '@/lib/api';
+import { Post } from '@/types';
+import PostLoader from '@/components/feed/PostSkeleton';
+import PostCard from '@/components/feed/PostCard';
+import { useAuth } from '@/context/AuthContext';
+
+type HotWindow = 'day' | 'week' | 'month';
+
+const WINDOWS: { value: HotWindow; label: string }[] = [
+    { value: 'day', label: 'Today' },
+    { value: 'week', label: 'This Week' },
+    { value: 'month', label: 'This Month' },
+];
 
 export default function PopularPage() {
+    const { user } = useAuth();
+    const [timeWindow, setTimeWindow] = useState<HotWindow>('day');
+    const [posts, setPosts] = useState<Post[]>([]);
+    const [loading, setLoading] = useState(true);
+
+    useEffect(() => {
+        const fetchTrending = async () => {
+            setLoading(true);
+            try {
+                // Ranked by the indexed hot score, limited to the selected window
+                const data = await getHotPosts(timeWindow);
+                setPosts(data);
+            } catch (error) {
+                console.error("Failed to fetch trending posts", error);
+            } finally {
+                setLoading(false);
+            }
+        };
+        fetchTrending();
+    }, [timeWindow]);
+
     return (
         <div className="space-y-6">
             <header className="mb-8">
@@ -12,30 +49,51 @@ export default function PopularPage() {
 
             {/* Time filter tabs */}
             <div className="flex gap-2 mb-6">
-                <FilterTab active>Today</FilterTab>
-                <FilterTab>This Week</FilterTab>
-                <FilterTab>This Month</FilterTab>
+                {WINDOWS.map(({ value, label }) => (
+                    <FilterTab key={value} active={timeWindow === value} onClick={() => setTimeWindow(value)}>
+                        {label}
+                    </FilterTab>
+                ))}
             </div>
 
-            {/* Placeholder for now */}
-            <EmptyState
-                icon="🔥"
-                title="No trending posts yet"
-                description="Check back later to see what's hot on campus"
-            />
+            {loading ? (
+                <div className="space-y-6">
+                    <PostLoader />
+                    <PostLoader />
+                </div>
+            ) : posts.length === 0 ? (
+                <EmptyState
+                    icon="🔥"
+                    title="No trending posts yet"
+                    description="Check back later to see what's hot on campus"
+                />
+            ) : (
+                <div className="space-y-6">
+                    {posts.map(post => (
+                        <PostCard
+                            key={post.id}
+                            post={post}
+                            currentUserId={user?.id || null}
+                        />
+                    ))}
+                </div>
+            )}
         </div>
     );
 }
 
 function FilterTab({
     active = false,
+    onClick,
     children
 }: {
     active?: boolean;
+    onClick?: () => void;
     children: React.ReactNode;
 }) {
     return (
         <button
+            onClick={onClick}
             className={`px-4 py-2 rounded-lg font-medium transition-colors ${active
                 ? 'bg-blue-600 text-white'
                 : 'bg-gray-100 text-gray-600 hover:bg-gray-200'
@@ -11,10 +11,12 @@ interface CommentItemProps {
     postId: number;
     depth?: number;
     currentUserId?: number | null;
-    onReplySuccess: () => void;
+    onReplySuccess: (created: any) => void;
+    onDelete: (commentId: number) => void;
+    onLoadReplies?: (comment: any) => void;
 }
 
-export default function CommentItem({ comment, postId, depth = 0, currentUserId, onReplySuccess }: CommentItemProps) {
+export default function CommentItem({ comment, postId, depth = 0, currentUserId, onReplySuccess, onDelete, onLoadReplies }: CommentItemProps) {
     const [isReplying, setIsReplying] = useState(false);
     const [reactions, setReactions] = useState(comment.reactions || []);
     const [upvotes, setUpvotes] = useState(comment.upvotes || 0);
@@ -22,16 +24,16 @@ export default function CommentItem({ comment, postId, depth = 0, currentUserId,
     const [userVote, setUserVote] = useState<1 | -1 | null>(comment.user_vote || null);
 
     const handleReply = async (content: string, isAnonymous: boolean) => {
-        await createComment(postId, content, comment.id, isAnonymous);
+        const created = await createComment(postId, content, comment.id, isAnonymous);
         setIsReplying(false);
-        onReplySuccess();
+        onReplySuccess(created);
     };
 
     const handleDelete = async () => {
         if (!confirm('Are you sure you want to delete this comment?')) return;
         try {
             await deleteComment(postId, comment.id);
-            onReplySuccess(); // Refresh
+            onDelete(comment.id);
         } catch (error) {
             console.error("Failed to delete comment", error);
         }
@@ -203,10 +205,22 @@ export default function CommentItem({ comment, postId, depth = 0, currentUserId,
                             depth={depth + 1}
                             currentUserId={currentUserId}
                             onReplySuccess={onReplySuccess}
+                            onDelete={onDelete}
+                            onLoadReplies={onLoadReplies}
                         />
                     ))}
                 </div>
             )}
+
+            {/* Replies not included in the page */}
+            {onLoadReplies && (comment.reply_count || 0) > (comment.replies?.length || 0) && (
+                <button
+                    onClick={() => onLoadReplies(comment)}
+                    className={`mt-2 text-xs font-medium text-blue-600 hover:text-blue-700 ${depth > 0 ? 'ml-8 sm:ml-12 pl-4' : 'ml-11'}`}
+                >
+                    View {comment.reply_count - (comment.replies?.length || 0)} more {comment.reply_count - (comment.replies?.length || 0) === 1 ? 'reply' : 'replies'}
+                </button>
+            )}
         </div>
     );
 }
@@ -1,6 +1,6 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useMemo } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { getComments, createComment } from '@/lib/api';
+import { getComments, getReplies, createComment } from '@/lib/api';
 import CommentForm from './CommentForm';
 import CommentItem from './CommentItem';
 import FloatingSort, { SortOption } from './FloatingSort';
@@ -13,12 +13,52 @@ interface CommentSectionProps {
 
 export default function CommentSection({ postId, initialCount = 0, currentUserId }: CommentSectionProps) {
     /* eslint-disable @typescript-eslint/no-explicit-any */
-    const [comments, setComments] = useState<any[]>([]);
     const [isLoading, setIsLoading] = useState(false);
     const [isOpen, setIsOpen] = useState(false);
     const [count, setCount] = useState(initialCount);
     const [sortOption, setSortOption] = useState<SortOption>('newest');
 
+    // Oldest/newest are paged server-side; "likes" re-sorts the loaded page
+    const serverSort = sortOption === 'oldest' ? 'oldest' : 'newest';
+
+    // Loaded comments (any depth) by id; the tree is derived from parent_id
+    const [loaded, setLoaded] = useState<Map<number, any>>(new Map());
+    const [nextCursor, setNextCursor] = useState<number | null>(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+    const mergeComments = (incoming: any[], reset = false, fresh = false) => {
+        setLoaded(prev => {
+            const next = new Map(reset ? [] : prev);
+            incoming.forEach((c: any) => {
+                const parent = c.parent_id ? next.get(c.parent_id) : null;
+                if (fresh && !next.has(c.id) && parent) {
+                    // Keep the parent's "more replies" count in step
+                    next.set(parent.id, { ...parent, reply_count: (parent.reply_count || 0) + 1 });
+                }
+                // Fresh comments sit outside the paged ranges, so they never serve as a cursor
+                next.set(c.id, fresh ? { ...c, fresh: true } : c);
+            });
+            return next;
+        });
+    };
+
+    const comments = useMemo(() => {
+        const nodes = new Map<number, any>();
+        loaded.forEach((c, id) => nodes.set(id, { ...c, replies: [] }));
+
+        const roots: any[] = [];
+        Array.from(nodes.values())
+            .sort((a, b) => a.id - b.id)
+            .forEach((c: any) => {
+                if (c.parent_id) {
+                    nodes.get(c.parent_id)?.replies.push(c);
+                } else {
+                    roots.push(c);
+                }
+            });
+        return roots;
+    }, [loaded]);
+
     const getSortedComments = () => {
         return [...comments].sort((a, b) => {
             if (sortOption === 'newest') return new Date(b.created_at).getTime() - new Date(a.created_at).getTime();
@@ -31,36 +71,64 @@ export default function CommentSection({ postId, initialCount = 0, currentUserId
     const fetchComments = useCallback(async () => {
         setIsLoading(true);
         try {
-            const data = await getComments(postId);
-            // Process flat list into tree
-            const commentMap: any = {};
-            const roots: any[] = [];
-
-            // First pass: create map
-            data.forEach((c: any) => {
-                c.replies = [];
-                commentMap[c.id] = c;
-            });
-
-            // Second pass: link properties
-            data.forEach((c: any) => {
-                if (c.parent_id) {
-                    if (commentMap[c.parent_id]) {
-                        commentMap[c.parent_id].replies.push(c);
-                    }
-                } else {
-                    roots.push(c);
-                }
-            });
-
-            setComments(roots);
-            setCount(data.length);
+            const page = await getComments(postId, { sort: serverSort });
+            mergeComments(page.comments, true);
+            setNextCursor(page.nextCursor);
         } catch (error) {
             console.error("Failed to fetch comments", error);
         } finally {
             setIsLoading(false);
         }
-    }, [postId]);
+    }, [postId, serverSort]);
+
+    const loadMoreComments = async () => {
+        if (!nextCursor) return;
+        setIsLoadingMore(true);
+        try {
+            const page = await getComments(postId, { sort: serverSort, cursor: nextCursor });
+            mergeComments(page.comments);
+            setNextCursor(page.nextCursor);
+        } catch (error) {
+            console.error("Failed to load more comments", error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
+    // After posting: merge the comment the server returned; nothing else is fetched
+    const addCreatedComment = (created: any) => {
+        mergeComments([created], false, true);
+        // initialCount and earlier merges never include a comment just created
+        setCount(prev => prev + 1);
+    };
+
+    const loadMoreReplies = async (comment: any) => {
+        const shown = comment.replies.filter((r: any) => !r.fresh).map((r: any) => r.id);
+        try {
+            const page = await getReplies(postId, comment.id, shown.length ? Math.max(...shown) : null);
+            mergeComments(page.comments);
+        } catch (error) {
+            console.error("Failed to load replies", error);
+        }
+    };
+
+    const removeComment = (commentId: number) => {
+        setLoaded(prev => {
+            const next = new Map(prev);
+            const removed = next.get(commentId);
+            next.delete(commentId);
+            const parent = removed?.parent_id ? next.get(removed.parent_id) : null;
+            if (parent) {
+                next.set(parent.id, { ...parent, reply_count: Math.max(0, (parent.reply_count || 0) - 1) });
+            }
+            // The server moves direct replies to the top level; mirror that
+            next.forEach((c, id) => {
+                if (c.parent_id === commentId) next.set(id, { ...c, parent_id: null });
+            });
+            return next;
+        });
+        setCount(prev => Math.max(0, prev - 1));
+    };
 
     useEffect(() => {
         if (isOpen) {
@@ -69,8 +137,8 @@ export default function CommentSection({ postId, initialCount = 0, currentUserId
     }, [isOpen, fetchComments]);
 
     const handleAddComment = async (content: string, isAnonymous: boolean) => {
-        await createComment(postId, content, undefined, isAnonymous);
-        fetchComments(); // Refresh list
+        const created = await createComment(postId, content, undefined, isAnonymous);
+        addCreatedComment(created);
     };
 
     return (
@@ -131,9 +199,21 @@ export default function CommentSection({ postId, initialCount = 0, currentUserId
                                         comment={comment}
                                         postId={postId}
                                         currentUserId={currentUserId}
-                                        onReplySuccess={fetchComments}
+                                        onReplySuccess={addCreatedComment}
+                                        onDelete={removeComment}
+                                        onLoadReplies={loadMoreReplies}
                                     />
                                 ))}
+
+                                {nextCursor && !isLoading && (
+                                    <button
+                                        onClick={loadMoreComments}
+                                        disabled={isLoadingMore}
+                                        className="w-full text-sm font-medium text-slate-500 hover:text-blue-600 py-2 transition-colors disabled:opacity-50"
+                                    >
+                                        {isLoadingMore ? 'Loading...' : 'Load more comments'}
+                                    </button>
+                                )}
                             </div>
                         </div>
                     </motion.div>
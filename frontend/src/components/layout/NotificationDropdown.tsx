@@ -107,19 +107,29 @@ export default function NotificationDropdown() {
         // If message has type 'new_post', we ignore it here (handled in Home)
         // Adjust this if you want notifications about new posts too
         if (lastMessage.type === 'new_post') return;
+        // Live counter updates for subscribed posts are not notifications
+        if (lastMessage.type === 'post_counters' || lastMessage.type === 'comment_counters') return;
 
-        const newNotif = {
-            id: Date.now(),
-            type: lastMessage.type === 'comment' || lastMessage.type === 'upvote' ? 'social' : 'academic',
-            title: lastMessage.title,
-            description: lastMessage.message,
+        const toNotification = (event: any) => ({
+            id: event.id ?? Date.now(),
+            type: event.type === 'comment' || event.type === 'upvote' ? 'social' : 'academic',
+            title: event.title,
+            description: event.message,
             time: 'Just now',
             isRead: false,
-            sender: lastMessage.sender,
+            sender: event.sender,
             raw_created_at: new Date().toISOString()
-        };
+        } as Notification);
+
+        // After a reconnect, everything missed arrives as one "replay" frame (oldest first)
+        const incoming = lastMessage.type === 'replay'
+            ? lastMessage.events.slice().reverse().map(toNotification)
+            : [toNotification(lastMessage)];
 
-        setNotifications(prev => [newNotif as Notification, ...prev]);
+        setNotifications(prev => {
+            const known = new Set(prev.map(n => n.id));
+            return [...incoming.filter((n: Notification) => !known.has(n.id)), ...prev];
+        });
     }, [lastMessage]);
 
     // Close on click outside
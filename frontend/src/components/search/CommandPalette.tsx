@@ -3,20 +3,36 @@
 import { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useRouter } from 'next/navigation';
+import { searchPosts, SearchHit } from '@/lib/api';
 
 interface SearchResult {
     id: string;
+    postId: number;
     title: string;
-    type: 'post' | 'deadline' | 'announcement';
+    type: 'post' | 'comment' | 'deadline' | 'announcement';
     detail: string;
 }
 
-const MOCK_RESULTS: SearchResult[] = [
-    { id: '1', title: 'Mid-Term Exam Schedule', type: 'announcement', detail: 'Academic Calendar' },
-    { id: '2', title: 'Physics 101 Notes', type: 'post', detail: 'by Sarah Jenkins • CS' },
-    { id: '3', title: 'Internship Opportunities', type: 'post', detail: 'by Career Center' },
-    { id: '4', title: 'Project Submission', type: 'deadline', detail: 'Due Tomorrow • Algorithms' },
-];
+const toResult = (hit: SearchHit): SearchResult => ({
+    id: `${hit.type}-${hit.id}`,
+    postId: hit.post_id,
+    title: hit.title,
+    type: hit.type,
+    detail: hit.snippet || '',
+});
+
+// Render <mark> highlights from the API as React nodes (never as raw HTML)
+function Highlighted({ text }: { text: string }) {
+    const parts = text.split(/<\/?mark>/);
+    return (
+        <>
+            {parts.map((part, i) => i % 2 === 1
+                ? <mark key={i} className="bg-yellow-100 text-slate-800 rounded px-0.5">{part}</mark>
+                : <span key={i}>{part}</span>
+            )}
+        </>
+    );
+}
 
 export default function CommandPalette({ isOpen, onClose }: { isOpen: boolean; onClose: () => void }) {
     const [query, setQuery] = useState('');
@@ -33,23 +49,28 @@ export default function CommandPalette({ isOpen, onClose }: { isOpen: boolean; o
         }
     }, [isOpen]);
 
-    // Mock Search Logic
+    // Debounced server-side search
     useEffect(() => {
-        if (!query) {
+        if (!query.trim()) {
             setResults([]);
             return;
         }
 
-        const handler = setTimeout(() => {
-            // Simple filter mock
-            const filtered = MOCK_RESULTS.filter(item =>
-                item.title.toLowerCase().includes(query.toLowerCase()) ||
-                item.detail.toLowerCase().includes(query.toLowerCase())
-            );
-            setResults(filtered);
-        }, 150); // Simulate network delay
-
-        return () => clearTimeout(handler);
+        let cancelled = false;
+        const handler = setTimeout(async () => {
+            try {
+                const hits = await searchPosts(query.trim(), 0, 10);
+                if (!cancelled) setResults(hits.map(toResult));
+            } catch (error) {
+                console.warn("Search failed:", error);
+                if (!cancelled) setResults([]);
+            }
+        }, 150);
+
+        return () => {
+            cancelled = true;
+            clearTimeout(handler);
+        };
     }, [query]);
 
     // Handle Quick Filters
@@ -58,10 +79,10 @@ export default function CommandPalette({ isOpen, onClose }: { isOpen: boolean; o
         inputRef.current?.focus();
     };
 
-    const handleResultClick = (id: string) => {
-        console.log('Navigate to', id);
+    const handleResultClick = (result: SearchResult) => {
+        console.log('Navigate to', result.id);
         onClose();
-        // router.push(`/post/${id}`); 
+        // router.push(`/post/${result.postId}`); 
     };
 
     return (
@@ -153,7 +174,7 @@ export default function CommandPalette({ isOpen, onClose }: { isOpen: boolean; o
                                             {results.map((result) => (
                                                 <button
                                                     key={result.id}
-                                                    onClick={() => handleResultClick(result.id)}
+                                                    onClick={() => handleResultClick(result)}
                                                     className="w-full text-left p-3 hover:bg-slate-50 rounded-lg flex items-center justify-between group transition-colors"
                                                 >
                                                     <div className="flex items-center gap-3">
@@ -168,7 +189,7 @@ export default function CommandPalette({ isOpen, onClose }: { isOpen: boolean; o
                                                         </div>
                                                         <div>
                                                             <p className="font-medium text-slate-800">{result.title}</p>
-                                                            <p className="text-xs text-slate-500">{result.detail}</p>
+                                                            <p className="text-xs text-slate-500"><Highlighted text={result.detail} /></p>
                                                         </div>
                                                     </div>
                                                     <svg className="w-4 h-4 text-slate-300 group-hover:text-slate-500" fill="none" stroke="currentColor" viewBox="0 0 24 24">
@@ -1,12 +1,39 @@
 'use client';
 
-import React, { createContext, useContext, useEffect, useState, ReactNode } from 'react';
+import React, { createContext, useCallback, useContext, useEffect, useRef, useState, ReactNode } from 'react';
 import { useAuth } from '@/context/AuthContext';
+import { getAuthToken } from '@/lib/api';
+
+// Protocol frames handled here, never surfaced as lastMessage
+const CONTROL_TYPES = new Set(['ping', 'resume', 'subscribed', 'unsubscribed', 'error']);
+
+// Server is shedding handshakes; the close reason carries {"retry_after": seconds}
+const TRY_AGAIN_LATER = 1013;
+const MAX_BACKOFF_MS = 30000;
+// WebSocket attempts that never open before falling back to Server-Sent Events
+// (e.g. networks whose proxies block WebSocket upgrades)
+const SSE_FALLBACK_AFTER = 3;
+
+// Full jitter: spreads reconnects so a deploy doesn't bring every client back at once
+const backoffDelay = (attempt: number) => Math.random() * Math.min(MAX_BACKOFF_MS, 1000 * 2 ** attempt);
+
+const retryAfterDelay = (reason: string) => {
+    try {
+        const seconds = JSON.parse(reason).retry_after;
+        if (typeof seconds === 'number') return seconds * 1000;
+    } catch (e) {
+        // not a retry hint
+    }
+    return null;
+};
 
 interface SocketContextType {
     socket: WebSocket | null;
     isConnected: boolean;
     lastMessage: any | null;
+    // Topics: "department:CSE", "post:123" (user:<id> is implicit)
+    subscribe: (topic: string) => void;
+    unsubscribe: (topic: string) => void;
 }
 
 const SocketContext = createContext<SocketContextType | undefined>(undefined);
@@ -16,6 +43,43 @@ export function SocketProvider({ children }: { children: ReactNode }) {
     const [socket, setSocket] = useState<WebSocket | null>(null);
     const [isConnected, setIsConnected] = useState(false);
     const [lastMessage, setLastMessage] = useState<any | null>(null);
+    // Ref-counted so several components can share a topic; replayed on reconnect
+    const topics = useRef<Map<string, number>>(new Map());
+    // Short-lived server token: reconnects present it instead of re-authenticating
+    const resumeToken = useRef<string | null>(null);
+    // Highest notification id received; reconnects ask the server for anything newer
+    const lastEventId = useRef<number | null>(null);
+
+    const trackEventId = (data: any) => {
+        const ids = data.type === 'replay' ? data.events.map((e: any) => e.id) : [data.id];
+        for (const id of ids) {
+            if (typeof id === 'number' && (lastEventId.current === null || id > lastEventId.current)) {
+                lastEventId.current = id;
+            }
+        }
+    };
+
+    const send = (ws: WebSocket | null, action: 'subscribe' | 'unsubscribe', topic: string) => {
+        if (ws?.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({ action, topic }));
+        }
+    };
+
+    const subscribe = useCallback((topic: string) => {
+        const count = topics.current.get(topic) || 0;
+        topics.current.set(topic, count + 1);
+        if (count === 0) send(socket, 'subscribe', topic);
+    }, [socket]);
+
+    const unsubscribe = useCallback((topic: string) => {
+        const count = topics.current.get(topic) || 0;
+        if (count <= 1) {
+            topics.current.delete(topic);
+            send(socket, 'unsubscribe', topic);
+        } else {
+            topics.current.set(topic, count - 1);
+        }
+    }, [socket]);
 
     useEffect(() => {
         if (!user) {
@@ -30,40 +94,122 @@ export function SocketProvider({ children }: { children: ReactNode }) {
         // Avoid multiple connections
         if (socket?.readyState === WebSocket.OPEN) return;
 
-        const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL || "http://localhost:8000";
-        const wsProtocol = baseUrl.startsWith("https") ? "wss" : "ws";
-        const wsHost = baseUrl.replace(/^https?:\/\//, "");
-        const wsUrl = `${wsProtocol}://${wsHost}/notifications/ws/${user.id}`;
-        const ws = new WebSocket(wsUrl);
+        let ws: WebSocket | null = null;
+        let stream: EventSource | null = null;
+        let cancelled = false;
+        let attempt = 0;
+        let everOpened = false;
+        let retryTimer: ReturnType<typeof setTimeout> | null = null;
 
-        ws.onopen = () => {
-            console.log("WS Connected via Context");
-            setIsConnected(true);
+        const scheduleReconnect = (delay: number) => {
+            if (cancelled) return;
+            retryTimer = setTimeout(open, delay);
         };
 
-        ws.onclose = () => {
-            console.log("WS Disconnected");
-            setIsConnected(false);
+        // Receive-only fallback; EventSource reconnects by itself and sends
+        // Last-Event-ID so missed notifications are replayed
+        const openStream = async () => {
+            const token = await getAuthToken();
+            if (!token || cancelled) return;
+            const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL || "http://localhost:8000";
+            const params = new URLSearchParams({ token });
+            if (lastEventId.current !== null) params.set('last_event_id', String(lastEventId.current));
+            if (topics.current.size) params.set('topics', Array.from(topics.current.keys()).join(','));
+            stream = new EventSource(`${baseUrl}/notifications/stream?${params}`);
+            stream.onopen = () => setIsConnected(true);
+            stream.onerror = () => setIsConnected(false);
+            stream.onmessage = (event) => {
+                try {
+                    const data = JSON.parse(event.data);
+                    trackEventId(data);
+                    setLastMessage(data);
+                } catch (e) {
+                    console.error("Failed to parse SSE message", e);
+                }
+            };
         };
 
-        ws.onmessage = (event) => {
-            try {
-                const data = JSON.parse(event.data);
-                setLastMessage(data);
-            } catch (e) {
-                console.error("Failed to parse WS message", e);
+        const open = async () => {
+            const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL || "http://localhost:8000";
+            const wsProtocol = baseUrl.startsWith("https") ? "wss" : "ws";
+            const wsHost = baseUrl.replace(/^https?:\/\//, "");
+
+            // Authenticated once at handshake; the server rejects unknown tokens.
+            // A resume token skips the server's (expensive) token verification.
+            let query: string;
+            if (resumeToken.current) {
+                query = `resume=${encodeURIComponent(resumeToken.current)}`;
+                const token = await getAuthToken();
+                if (token) query += `&token=${encodeURIComponent(token)}`;
+            } else {
+                const token = await getAuthToken();
+                if (!token) return;
+                query = `token=${encodeURIComponent(token)}`;
             }
-        };
+            if (lastEventId.current !== null) query += `&last_event_id=${lastEventId.current}`;
+            if (cancelled) return;
+
+            const socketRef = new WebSocket(`${wsProtocol}://${wsHost}/ws?${query}`);
+            ws = socketRef;
 
-        setSocket(ws);
+            socketRef.onopen = () => {
+                console.log("WS Connected via Context");
+                attempt = 0;
+                everOpened = true;
+                setIsConnected(true);
+                topics.current.forEach((_, topic) => send(socketRef, 'subscribe', topic));
+            };
+
+            socketRef.onclose = (event) => {
+                console.log("WS Disconnected");
+                setIsConnected(false);
+                if (cancelled) return;
+                if (!everOpened && attempt + 1 >= SSE_FALLBACK_AFTER && typeof EventSource !== 'undefined') {
+                    console.warn("WebSocket unavailable, falling back to Server-Sent Events");
+                    openStream();
+                    return;
+                }
+                const hinted = event.code === TRY_AGAIN_LATER ? retryAfterDelay(event.reason) : null;
+                scheduleReconnect(hinted ?? backoffDelay(attempt++));
+            };
+
+            socketRef.onmessage = (event) => {
+                try {
+                    const data = JSON.parse(event.data);
+                    if (data.type === 'ping') {
+                        // Heartbeat: the server evicts sockets that stop answering
+                        socketRef.send(JSON.stringify({ type: 'pong' }));
+                        return;
+                    }
+                    if (data.type === 'resume') {
+                        resumeToken.current = data.resume_token;
+                        return;
+                    }
+                    if (CONTROL_TYPES.has(data.type)) return;
+                    // "replay" batches what was missed while disconnected
+                    trackEventId(data);
+                    setLastMessage(data);
+                } catch (e) {
+                    console.error("Failed to parse WS message", e);
+                }
+            };
+
+            setSocket(socketRef);
+        };
+        open();
 
         return () => {
-            ws.close();
+            cancelled = true;
+            if (retryTimer) clearTimeout(retryTimer);
+            resumeToken.current = null;
+            lastEventId.current = null;
+            ws?.close();
+            stream?.close();
         };
     }, [user]); // Re-connect if user changes
 
     return (
-        <SocketContext.Provider value={{ socket, isConnected, lastMessage }}>
+        <SocketContext.Provider value={{ socket, isConnected, lastMessage, subscribe, unsubscribe }}>
             {children}
         </SocketContext.Provider>
     );
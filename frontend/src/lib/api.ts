@@ -8,27 +8,32 @@ const api = axios.create({
   },
 });
 
-// Attach token automatically from Firebase or Local Admin Token
-api.interceptors.request.use(async (config) => {
+// Current bearer token: Local Admin Token first, then Firebase
+export const getAuthToken = async (): Promise<string | null> => {
   // 1. Priority: Local Admin Token (if present)
   if (typeof window !== "undefined") {
     const adminToken = localStorage.getItem('admin_token');
-    if (adminToken) {
-      config.headers.Authorization = `Bearer ${adminToken}`;
-      return config;
-    }
+    if (adminToken) return adminToken;
   }
 
   // 2. Fallback: Firebase Token
   if (auth.currentUser) {
     try {
       // Force refresh if expired
-      const token = await auth.currentUser.getIdToken();
-      config.headers.Authorization = `Bearer ${token}`;
+      return await auth.currentUser.getIdToken();
     } catch (error) {
       console.error("Error getting token", error);
     }
   }
+  return null;
+};
+
+// Attach token automatically from Firebase or Local Admin Token
+api.interceptors.request.use(async (config) => {
+  const token = await getAuthToken();
+  if (token) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
   return config;
 });
 
@@ -81,6 +86,30 @@ export const getPosts = async (skip = 0, limit = 10, department = 'ALL', tags?:
   return response.data;
 };
 
+// Cursor paging for infinite scroll: pass back nextCursor until it is null
+export const getPostsPage = async (cursor: string | null = null, limit = 10, department = 'ALL', tags?: string) => {
+  const params: any = { limit };
+  if (cursor) params.cursor = cursor;
+  if (department !== 'ALL') params.department = department;
+  if (tags) params.tags = tags;
+
+  const response = await api.get('/posts/', { params });
+  return {
+    posts: response.data,
+    nextCursor: (response.headers['x-next-cursor'] as string | undefined) || null,
+  };
+};
+
+// Trending: ranked by hot score, optionally limited to posts from the last day/week/month
+export const getHotPosts = async (window?: 'day' | 'week' | 'month', skip = 0, limit = 20, department = 'ALL') => {
+  const params: any = { sort: 'hot', skip, limit };
+  if (window) params.window = window;
+  if (department !== 'ALL') params.department = department;
+
+  const response = await api.get('/posts/', { params });
+  return response.data;
+};
+
 export const getCampusNews = async () => {
   try {
     const response = await api.get("/news/");
@@ -117,9 +146,34 @@ export const sharePost = async (postId: number) => {
 };
 
 // Comments
-export const getComments = async (postId: number) => {
-  const response = await api.get(`/posts/${postId}/comments/`);
-  return response.data;
+// Paginated thread: a page of top-level comments, each with its first few
+// replies (flat, threaded via parent_id). Pass back nextCursor until it is null.
+export const getComments = async (
+  postId: number,
+  options: { cursor?: number | null; sort?: 'oldest' | 'newest'; limit?: number } = {}
+) => {
+  const params: any = {};
+  if (options.cursor) params.cursor = options.cursor;
+  if (options.sort) params.sort = options.sort;
+  if (options.limit) params.limit = options.limit;
+
+  const response = await api.get(`/posts/${postId}/comments/`, { params });
+  return {
+    comments: response.data,
+    nextCursor: Number(response.headers['x-next-cursor']) || null,
+  };
+};
+
+// "Load more replies": direct replies of a comment after the last one shown
+export const getReplies = async (postId: number, commentId: number, cursor: number | null = null) => {
+  const params: any = {};
+  if (cursor) params.cursor = cursor;
+
+  const response = await api.get(`/posts/${postId}/comments/${commentId}/replies`, { params });
+  return {
+    comments: response.data,
+    nextCursor: Number(response.headers['x-next-cursor']) || null,
+  };
 };
 
 export const createComment = async (postId: number, content: string, parentId?: number, isAnonymous: boolean = false) => {
@@ -172,6 +226,22 @@ export const getCurrentUser = async () => {
   }
 };
 
+// Search (snippets wrap matched terms in <mark></mark>)
+export interface SearchHit {
+  type: 'post' | 'comment';
+  id: number;
+  post_id: number;
+  title: string;
+  snippet?: string | null;
+  rank: number;
+  created_at?: string | null;
+}
+
+export const searchPosts = async (q: string, skip = 0, limit = 20): Promise<SearchHit[]> => {
+  const response = await api.get('/search/', { params: { q, skip, limit } });
+  return response.data;
+};
+
 // Notifications
 export const getNotifications = async (skip = 0, limit = 20) => {
   const response = await api.get(`/notifications/?skip=${skip}&limit=${limit}`);